@@ -0,0 +1,15 @@
+import os
+
+from configurations.wsgi import get_wsgi_application
+
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "normandy.settings")
+os.environ.setdefault("DJANGO_CONFIGURATION", "Production")
+
+
+wsgi_application = get_wsgi_application()
+
+from normandy.base.asgi import AsyncWSGIApplication  # noqa
+from normandy.recipes.api.v1.fast_classify import ClassifyClientASGIMiddleware  # noqa
+
+application = ClassifyClientASGIMiddleware(AsyncWSGIApplication(wsgi_application))
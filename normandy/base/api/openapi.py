@@ -0,0 +1,102 @@
+"""
+OpenAPI schemas for the API.
+
+Generating a schema introspects every view and serializer, so schemas are
+generated ahead of time by the ``generate_openapi_schema`` management
+command, and served from the files it writes to ``OPENAPI_SCHEMA_ROOT``.
+If a file is missing, the schema is generated the first time it is
+requested and kept in memory. In DEBUG mode, schemas are generated for
+every request, so that changes to the API show up right away.
+"""
+
+import hashlib
+import os
+from functools import lru_cache
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.views import View
+
+from drf_yasg import openapi
+from drf_yasg.codecs import OpenAPICodecJson, OpenAPICodecYaml
+from drf_yasg.generators import OpenAPISchemaGenerator
+from rest_framework.test import APIRequestFactory
+from rest_framework.views import APIView
+
+
+API_INFO = openapi.Info(
+    title="Normandy API",
+    default_version="v1",
+    description="An API to interact with the Normandy Recipe Server",
+    contact=openapi.Contact(email="product-delivery@mozilla.com"),
+    license=openapi.License(name="MPL-2.0"),
+)
+
+#: API versions that have a schema.
+VERSIONS = ["v1", "v3"]
+
+CODECS = {"json": OpenAPICodecJson, "yaml": OpenAPICodecYaml}
+
+CONTENT_TYPES = {
+    "json": "application/json; charset=utf-8",
+    "yaml": "application/yaml; charset=utf-8",
+}
+
+
+def generate_schema(version, format):
+    """Generate the schema for an API version, encoded as ``format``."""
+    # Which endpoints are included depends on the version of the request.
+    request = APIRequestFactory().get(f"/api/{version}/swagger.{format}")
+    request = APIView().initialize_request(request)
+    request.version = version
+
+    generator = OpenAPISchemaGenerator(API_INFO, version)
+    schema = generator.get_schema(request=request, public=True)
+
+    # Without a host or schemes, clients use the ones they fetched the
+    # schema from, instead of the ones it was generated with.
+    schema.pop("host", None)
+    schema.pop("schemes", None)
+
+    return CODECS[format](validators=[]).encode(schema)
+
+
+def get_schema_path(version, format, root=None):
+    return os.path.join(root or settings.OPENAPI_SCHEMA_ROOT, f"{version}.{format}")
+
+
+def make_etag(content):
+    return '"{}"'.format(hashlib.sha256(content).hexdigest())
+
+
+@lru_cache(maxsize=None)
+def load_schema(version, format):
+    """
+    Load a pre-rendered schema, generating it if there isn't one. Returns
+    the encoded schema and its ETag.
+    """
+    try:
+        with open(get_schema_path(version, format), "rb") as f:
+            content = f.read()
+    except FileNotFoundError:
+        content = generate_schema(version, format)
+    return content, make_etag(content)
+
+
+class SchemaView(View):
+    """Serve the schema of the API version in the URL namespace."""
+
+    def get(self, request, format):
+        version = request.resolver_match.namespaces[-1]
+        format = format.lstrip(".")
+
+        if settings.DEBUG:
+            content = generate_schema(version, format)
+            etag = make_etag(content)
+        else:
+            content, etag = load_schema(version, format)
+
+        response = HttpResponse(content, content_type=CONTENT_TYPES[format])
+        response["ETag"] = etag
+        return get_conditional_response(request, etag=etag, response=response)
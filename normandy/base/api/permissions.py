@@ -28,3 +28,10 @@ class CanChangeUser(permissions.BasePermission):
 
     def has_permission(self, request, view):
         return request.user and request.user.has_perm("auth.change_user")
+
+
+class IsSuperuser(permissions.BasePermission):
+    """Only allow superusers."""
+
+    def has_permission(self, request, view):
+        return bool(request.user and request.user.is_superuser)
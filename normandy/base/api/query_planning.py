@@ -0,0 +1,107 @@
+"""
+Derive ``select_related`` and ``prefetch_related`` lookups from serializers.
+
+Serializers declare the relations they read that can't be seen from their
+fields (for example, relations used by model properties) in
+``Meta.select_related`` and ``Meta.prefetch_related``. Nested serializer
+fields are followed automatically, with their requirements prefixed by the
+path they are nested at. Once a path crosses a many-valued relation,
+everything below it must be prefetched instead of joined.
+"""
+
+from django.core.exceptions import FieldDoesNotExist
+
+from rest_framework import serializers
+
+
+def _get_relation(model, name):
+    """Find a field on ``model`` by its name or, for reverse relations, its accessor."""
+    try:
+        return model._meta.get_field(name)
+    except FieldDoesNotExist:
+        for field in model._meta.related_objects:
+            if field.get_accessor_name() == name:
+                return field
+    return None
+
+
+def _resolve_source(model, source):
+    """
+    Follow a dotted serializer ``source`` through ``model``'s relations.
+
+    Returns a tuple of the related model and whether any step of the path was
+    many-valued, or ``None`` if the source is not a chain of relations (such
+    as a property), in which case it can't be planned automatically.
+    """
+    is_many = False
+    for part in source.split("."):
+        if model is None:
+            return None
+        field = _get_relation(model, part)
+        if field is None or not field.is_relation:
+            return None
+        is_many = is_many or field.many_to_many or field.one_to_many
+        model = field.related_model
+    return model, is_many
+
+
+def get_query_plan(serializer_class, prefix="", many=False):
+    """
+    Return a pair of sets of lookups, ``(select_related, prefetch_related)``,
+    that are needed to serialize instances with ``serializer_class`` without
+    making additional queries per instance.
+    """
+    select_related = set()
+    prefetch_related = set()
+
+    meta = getattr(serializer_class, "Meta", None)
+    model = getattr(meta, "model", None)
+    fields = getattr(meta, "fields", None)
+
+    for lookup in getattr(meta, "select_related", []):
+        (prefetch_related if many else select_related).add(prefix + lookup)
+    for lookup in getattr(meta, "prefetch_related", []):
+        prefetch_related.add(prefix + lookup)
+
+    for name, field in getattr(serializer_class, "_declared_fields", {}).items():
+        if isinstance(fields, (list, tuple)) and name not in fields:
+            continue
+
+        if isinstance(field, serializers.ListSerializer):
+            field = field.child
+        if not isinstance(field, serializers.BaseSerializer):
+            continue
+
+        source = field.source or name
+        if source == "*":
+            nested_prefix = prefix
+            nested_many = many
+        else:
+            resolved = _resolve_source(model, source)
+            if resolved is None:
+                continue
+            _, is_many = resolved
+            lookup = prefix + source.replace(".", "__")
+            nested_prefix = lookup + "__"
+            nested_many = many or is_many
+            (prefetch_related if nested_many else select_related).add(lookup)
+
+        nested_select, nested_prefetch = get_query_plan(
+            field.__class__, prefix=nested_prefix, many=nested_many
+        )
+        select_related |= nested_select
+        prefetch_related |= nested_prefetch
+
+    return select_related, prefetch_related
+
+
+def plan_queryset(queryset, serializer_class):
+    """
+    Apply the query plan for ``serializer_class`` to ``queryset``.
+    """
+    select_related, prefetch_related = get_query_plan(serializer_class)
+    if select_related:
+        queryset = queryset.select_related(*sorted(select_related))
+    if prefetch_related:
+        queryset = queryset.prefetch_related(*sorted(prefetch_related))
+    return queryset
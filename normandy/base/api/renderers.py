@@ -1,6 +1,6 @@
 from rest_framework import renderers
 
-from normandy.base.utils import canonical_json_dumps
+from normandy.base.utils import canonical_json
 
 
 class TextRenderer(renderers.BaseRenderer):
@@ -32,7 +32,7 @@ class CanonicalJSONRenderer(renderers.BaseRenderer):
     charset = None
 
     def render(self, data, media_type=None, renderer_context=None):
-        return canonical_json_dumps(data).encode()
+        return canonical_json(data)
 
 
 class CustomBrowsableAPIRenderer(renderers.BrowsableAPIRenderer):
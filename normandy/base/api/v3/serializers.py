@@ -55,3 +55,16 @@ class ServiceInfoSerializer(serializers.Serializer):
 
     class Meta:
         fields = ["github_url", "peer_approval_enforced", "user"]
+
+
+class ProfileSerializer(serializers.Serializer):
+    id = serializers.CharField()
+    method = serializers.CharField()
+    path = serializers.CharField()
+    status = serializers.IntegerField()
+    duration = serializers.FloatField()
+    created = serializers.CharField()
+
+
+class ProfileWithStatsSerializer(ProfileSerializer):
+    stats = serializers.CharField()
@@ -9,6 +9,7 @@ from normandy.base.api.views import APIRootView
 router = MixedViewRouter()
 router.register("user", views.UserViewSet)
 router.register("group", views.GroupViewSet)
+router.register("profile", views.ProfileViewSet, base_name="profile")
 
 
 app_name = "base"
@@ -3,12 +3,16 @@ from django.conf import settings
 
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from normandy.base.api.permissions import AdminEnabled, CanChangeUser
+from normandy.base import profiling
+from normandy.base.api.permissions import AdminEnabled, CanChangeUser, IsSuperuser
 from normandy.base.api.v3.serializers import (
     GroupSerializer,
+    ProfileSerializer,
+    ProfileWithStatsSerializer,
     ServiceInfoSerializer,
     UserOnlyNamesSerializer,
     UserWithGroupsSerializer,
@@ -108,3 +112,30 @@ class GroupViewSet(viewsets.ModelViewSet):
         user.groups.remove(group)
 
         return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class ProfileViewSet(viewsets.ViewSet):
+    """
+    Viewset for viewing recent request profiles.
+
+    Requests are profiled if they are sampled, or if they include a token
+    from the ``token`` endpoint in the ``X-Normandy-Profile`` header.
+    """
+
+    permission_classes = (AdminEnabled, IsSuperuser)
+
+    def list(self, request):
+        profiles = profiling.get_recent_profiles()
+        return Response(ProfileSerializer(profiles, many=True).data)
+
+    def retrieve(self, request, pk=None):
+        profile = profiling.get_profile(pk)
+        if profile is None:
+            raise NotFound()
+        return Response(ProfileWithStatsSerializer(profile).data)
+
+    @action(detail=False, methods=["POST"])
+    def token(self, request):
+        return Response(
+            {"header": "X-Normandy-Profile", "token": profiling.make_profiling_token()}
+        )
@@ -1,11 +1,12 @@
 import re
 
+from functools import lru_cache
 from importlib import import_module
 from urllib.parse import urljoin
 
 from django.conf import settings
 from django.core.exceptions import ValidationError as DjangoValidationError
-from django.urls import NoReverseMatch
+from django.urls import NoReverseMatch, get_script_prefix
 
 from rest_framework import status
 from rest_framework.response import Response
@@ -20,6 +21,59 @@ from normandy.base.api.utils import get_api_endpoints
 from normandy.base.decorators import api_cache_control
 
 
+#: Number of API root responses to remember, one for each combination of
+#: namespace and host.
+ROOT_RESPONSE_CACHE_SIZE = 64
+
+
+@lru_cache(maxsize=None)
+def get_root_endpoints(urlconf, namespace, script_prefix):
+    """
+    Find the GET endpoints in a version namespace of the URL conf, as a list
+    of ``(name, path, allow_cdn)`` tuples.
+
+    This only depends on its arguments, so it is computed once per process.
+    The script prefix is passed so that it is part of the cache key, since
+    it is included in reversed paths.
+    """
+    root_endpoints = []
+    endpoints = get_api_endpoints(urlconf.urlpatterns)
+
+    for endpoint in sorted(endpoints, key=lambda e: e["pattern"].name):
+        name = endpoint["pattern"].name
+        if endpoint["method"] == "GET" and namespace in endpoint["namespace"].split(":"):
+            allow_cdn = getattr(endpoint["pattern"], "allow_cdn", True)
+
+            try:
+                full_name = f'{endpoint["namespace"]}:{name}' if endpoint["namespace"] else name
+                path = reverse(full_name)
+            except NoReverseMatch:
+                continue
+
+            root_endpoints.append((name, path, allow_cdn))
+
+    return root_endpoints
+
+
+@lru_cache(maxsize=ROOT_RESPONSE_CACHE_SIZE)
+def get_root_response_data(urlconf, namespace, script_prefix, base_url, app_server_url):
+    """
+    Build the body of the API root for requests to ``base_url``.
+
+    ``base_url`` should be the root of the site (scheme and host only), so
+    that the cache holds one entry per host the API is served from rather
+    than one per requested URL.
+    """
+    ret = {}
+    for name, path, allow_cdn in get_root_endpoints(urlconf, namespace, script_prefix):
+        if not allow_cdn and app_server_url:
+            base = app_server_url
+        else:
+            base = base_url
+        ret[name] = urljoin(base, path)
+    return ret
+
+
 class APIRootView(APIView):
     """
     An API root view that lists the urls that share it's version namespace.
@@ -31,8 +85,6 @@ class APIRootView(APIView):
 
     @api_cache_control(max_age=settings.API_CACHE_TIME)
     def get(self, request, *args, **kwargs):
-        ret = {}
-
         # Get the version namespace
         namespace = getattr(request.resolver_match, "namespace", "")
         for ns in namespace.split(":"):
@@ -44,30 +96,15 @@ class APIRootView(APIView):
             urlconf = self.urlconf
         else:
             urlconf = import_module(settings.ROOT_URLCONF)
-        endpoints = get_api_endpoints(urlconf.urlpatterns)
-
-        for endpoint in sorted(endpoints, key=lambda e: e["pattern"].name):
-            name = endpoint["pattern"].name
-            if endpoint["method"] == "GET" and namespace in endpoint["namespace"].split(":"):
-                allow_cdn = getattr(endpoint["pattern"], "allow_cdn", True)
-
-                if not allow_cdn and settings.APP_SERVER_URL:
-                    base = settings.APP_SERVER_URL
-                else:
-                    base = request.build_absolute_uri()
-
-                try:
-                    full_name = (
-                        f'{endpoint["namespace"]}:{name}' if endpoint["namespace"] else name
-                    )
-                    path = reverse(full_name, *args, **kwargs)
-                except NoReverseMatch:
-                    continue
-
-                full_url = urljoin(base, path)
-                ret[name] = full_url
-
-        return Response(ret)
+
+        data = get_root_response_data(
+            urlconf,
+            namespace,
+            get_script_prefix(),
+            request.build_absolute_uri("/"),
+            settings.APP_SERVER_URL,
+        )
+        return Response(dict(data))
 
 
 def exception_handler(exc, context):
@@ -1,6 +1,6 @@
 from django.apps import AppConfig
 
-from normandy.base import checks, metrics
+from normandy.base import checks, db, metrics
 
 
 class BaseApp(AppConfig):
@@ -10,4 +10,5 @@ class BaseApp(AppConfig):
 
     def ready(self):
         checks.register()
+        db.register()
         metrics.register()
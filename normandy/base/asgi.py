@@ -0,0 +1,186 @@
+"""
+Support for serving Normandy over ASGI.
+
+Django 2.2 can only handle requests synchronously, so requests are passed
+to the WSGI application on a pool of threads. Request bodies are read and
+responses are sent to the client asynchronously, so a thread is only busy
+while Django is computing a response, and not while waiting on a slow
+client. This lets a single worker hold many slow connections open.
+
+Request bodies are spooled to disk once they are larger than
+``FILE_UPLOAD_MAX_MEMORY_SIZE``, and bodies larger than
+``ASGI_MAX_REQUEST_BODY_SIZE`` are rejected, so slow or large uploads can't
+exhaust a worker's memory.
+"""
+
+import asyncio
+import functools
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+
+
+_executor = None
+
+
+def get_executor():
+    """Get the thread pool used to run synchronous code."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.ASGI_THREADS, thread_name_prefix="normandy-asgi"
+        )
+    return _executor
+
+
+def sync_to_async(func):
+    """
+    Wrap a synchronous function so that it can be awaited, running it on
+    the shared thread pool instead of blocking the event loop.
+    """
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(get_executor(), functools.partial(func, *args, **kwargs))
+
+    return wrapper
+
+
+def get_environ(scope, body=b""):
+    """
+    Build a WSGI environ from an ASGI HTTP connection scope and request
+    body, given as bytes or a file.
+    """
+    server_name, server_port = scope.get("server") or ("localhost", 80)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        # WSGI strings are bytes decoded as latin-1
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server_name,
+        "SERVER_PORT": str(server_port),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": BytesIO(body) if isinstance(body, bytes) else body,
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    if scope.get("client"):
+        client_host, client_port = scope["client"]
+        environ["REMOTE_ADDR"] = client_host
+        environ["REMOTE_PORT"] = str(client_port)
+
+    for name, value in scope.get("headers", []):
+        name = name.decode("latin-1").upper().replace("-", "_")
+        value = value.decode("latin-1")
+        key = name if name in ("CONTENT_TYPE", "CONTENT_LENGTH") else f"HTTP_{name}"
+        if key in environ:
+            # Repeated headers are combined, as WSGI servers do
+            value = environ[key] + "," + value
+        environ[key] = value
+    return environ
+
+
+def run_wsgi_application(application, environ):
+    """
+    Call a WSGI application, and return its status code, headers and
+    complete response body.
+    """
+    response = {}
+    body = []
+
+    def start_response(status, headers, exc_info=None):
+        response["status"] = int(status.split(" ", 1)[0])
+        response["headers"] = headers
+        return body.append
+
+    result = application(environ, start_response)
+    try:
+        body.extend(result)
+    finally:
+        if hasattr(result, "close"):
+            result.close()
+    return response["status"], response["headers"], b"".join(body)
+
+
+#: Response sent for request bodies over ``ASGI_MAX_REQUEST_BODY_SIZE``.
+REQUEST_TOO_LARGE = (413, [("Content-Type", "text/plain")], b"Request body too large")
+
+
+class AsyncWSGIApplication(object):
+    """Serve a WSGI application over ASGI."""
+
+    def __init__(self, application):
+        self.application = application
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self.handle_lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self.handle_http(scope, receive, send)
+        else:
+            raise ValueError(f"Unsupported ASGI connection type {scope['type']!r}")
+
+    async def handle_lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def handle_http(self, scope, receive, send):
+        max_size = settings.ASGI_MAX_REQUEST_BODY_SIZE
+        content_length = dict(scope.get("headers", [])).get(b"content-length", b"")
+        if content_length.isdigit() and int(content_length) > max_size:
+            await self.send_response(send, *REQUEST_TOO_LARGE)
+            return
+
+        body = tempfile.SpooledTemporaryFile(
+            max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE, dir=settings.FILE_UPLOAD_TEMP_DIR
+        )
+        try:
+            size = 0
+            while True:
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    return
+                chunk = message.get("body", b"")
+                size += len(chunk)
+                if size > max_size:
+                    await self.send_response(send, *REQUEST_TOO_LARGE)
+                    return
+                body.write(chunk)
+                if not message.get("more_body", False):
+                    break
+            body.seek(0)
+
+            environ = get_environ(scope, body)
+            status, headers, content = await sync_to_async(run_wsgi_application)(
+                self.application, environ
+            )
+        finally:
+            body.close()
+
+        await self.send_response(send, status, headers, content)
+
+    async def send_response(self, send, status, headers, content):
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [
+                    (name.encode("latin-1"), value.encode("latin-1")) for name, value in headers
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": content})
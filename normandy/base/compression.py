@@ -0,0 +1,80 @@
+"""
+Helpers for serving content that has been compressed ahead of time.
+
+Brotli is only offered if the optional ``brotli`` package is installed.
+"""
+
+from gzip import GzipFile
+from io import BytesIO
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def gzip_compress(content):
+    """Compress bytes with gzip, at the highest level and with no timestamp."""
+    buffer = BytesIO()
+    with GzipFile(mode="wb", compresslevel=9, fileobj=buffer, mtime=0) as f:
+        f.write(content)
+    return buffer.getvalue()
+
+
+def get_encoders():
+    """
+    Return a mapping of content codings to functions to encode bytes with
+    them, in order of preference.
+    """
+    encoders = {}
+    if brotli is not None:
+        encoders["br"] = lambda content: brotli.compress(content, quality=11)
+    encoders["gzip"] = gzip_compress
+    return encoders
+
+
+def compress_variants(content):
+    """
+    Return a dictionary of ``content`` encoded with each supported content
+    coding, including ``"identity"`` for the unencoded content.
+    """
+    variants = {"identity": content}
+    for coding, encode in get_encoders().items():
+        variants[coding] = encode(content)
+    return variants
+
+
+def parse_accept_encoding(header):
+    """Parse an Accept-Encoding header into a mapping of content codings to q-values."""
+    accepted = {}
+    for item in header.split(","):
+        coding, *params = [part.strip() for part in item.split(";")]
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding.lower()] = q
+    return accepted
+
+
+def choose_encoding(header, available):
+    """
+    Pick the content coding from ``available`` that the client likes best
+    according to the Accept-Encoding ``header``, breaking ties with the order
+    of ``available``. Returns ``"identity"`` if none of them are acceptable.
+    """
+    accepted = parse_accept_encoding(header or "")
+    best, best_q = "identity", 0.0
+    for coding in available:
+        if coding == "identity":
+            continue
+        q = accepted.get(coding, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
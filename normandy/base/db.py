@@ -0,0 +1,140 @@
+import logging
+import random
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+INFO_CLOSED_UNUSABLE_CONNECTION = "normandy.base.db.I001"
+
+
+logger = logging.getLogger(__name__)
+
+# Greenlet-local under gevent, since it monkey patches threading.
+_routing_state = threading.local()
+
+
+def close_unusable_connections(**kwargs):
+    """
+    Close persistent connections that the database has dropped since they
+    were last used.
+
+    Django only discards a persistent connection after a query on it has
+    failed, which turns a database restart or a pooler recycling its server
+    connections into an error for the first request on each worker. Checking
+    before the request starts lets Django transparently reconnect instead.
+    """
+    for conn in connections.all():
+        if conn.connection is None or not conn.settings_dict.get("CONN_HEALTH_CHECKS"):
+            continue
+        if not conn.is_usable():
+            logger.info(
+                f"Closing unusable connection to database {conn.alias!r}",
+                extra={"code": INFO_CLOSED_UNUSABLE_CONNECTION, "alias": conn.alias},
+            )
+            conn.close()
+
+
+def get_replica_aliases():
+    """Return the aliases of the databases that are replicas of the primary."""
+    return [
+        alias
+        for alias, config in settings.DATABASES.items()
+        if config.get("TEST", {}).get("MIRROR") == DEFAULT_DB_ALIAS
+    ]
+
+
+@contextmanager
+def read_from(alias):
+    """Send all reads made in this context to the database ``alias``."""
+    previous = getattr(_routing_state, "read_alias", None)
+    _routing_state.read_alias = alias
+    try:
+        yield
+    finally:
+        _routing_state.read_alias = previous
+
+
+@contextmanager
+def read_from_replica():
+    """
+    Send all reads made in this context to a randomly chosen replica, or to
+    the primary if there are no replicas configured.
+    """
+    replicas = get_replica_aliases()
+    with read_from(random.choice(replicas) if replicas else None):
+        yield
+
+
+class ReplicaRouter(object):
+    """
+    Routes reads to a replica inside :func:`read_from_replica`, and
+    everything else to the primary database.
+
+    Reads only go to replicas when explicitly asked for, so management
+    commands and anything else outside of a request that opts in always
+    see the latest data.
+    """
+
+    def db_for_read(self, model, **hints):
+        return getattr(_routing_state, "read_alias", None) or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas have the same data as the primary, so objects from any of
+        # them can be related to each other.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class QueryCounter(object):
+    """
+    Counts the queries made on all database connections, and the time spent
+    on them, while it is used as a context manager.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+        self._exit_stack = None
+
+    def __enter__(self):
+        self._exit_stack = ExitStack()
+        for conn in connections.all():
+            self._exit_stack.enter_context(conn.execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        self._exit_stack.close()
+
+    def __call__(self, execute, sql, params, many, context):
+        start_time = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start_time
+            self.count += 1
+            self.statements[sql] += 1
+
+    @property
+    def duplicates(self):
+        """The number of queries that repeated an earlier statement."""
+        return sum(count - 1 for count in self.statements.values())
+
+    def most_duplicated(self, limit):
+        """Get the most repeated statements, and how many times each was run."""
+        return [(sql, count) for sql, count in self.statements.most_common(limit) if count > 1]
+
+
+def register():
+    request_started.connect(close_unusable_connections)
@@ -0,0 +1,90 @@
+"""
+Report how long it takes to import Normandy and start Django.
+
+This runs a new Python process with ``-X importtime``, which prints how long
+each module took to import, and summarizes the slowest ones. Startup checks
+are deferred, as they would be in production, so that the report covers the
+imports themselves and not requests to other services. Run it with::
+
+    python -m normandy.base.importtime
+"""
+
+import os
+import subprocess
+import sys
+from collections import namedtuple
+
+
+#: Directory that contains the ``normandy`` package.
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+#: Code run in the measured process, to set up Django the way manage.py does.
+STARTUP_CODE = "import configurations; configurations.setup()"
+
+#: Number of modules to list in the report.
+REPORT_LIMIT = 30
+
+
+ImportTime = namedtuple("ImportTime", ["module", "self_us", "cumulative_us", "depth"])
+
+
+def parse_import_times(output):
+    """
+    Parse the output of ``python -X importtime`` into a list of
+    ``ImportTime``, with times in microseconds.
+
+    Modules loaded with ``importlib.import_module``, like the settings and
+    app configs that Django loads, aren't listed themselves, but the modules
+    that they import are.
+    """
+    times = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line.replace("import time:", "", 1).split("|")
+        if len(fields) != 3:
+            continue
+        self_us, cumulative_us, name = fields
+        if not self_us.strip().isdigit():
+            continue  # the header line
+        # Nested imports are indented by two spaces per level
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        times.append(ImportTime(name.strip(), int(self_us), int(cumulative_us), depth))
+    return times
+
+
+def measure_startup():
+    """Start Django in a new process, and return the time spent on each import."""
+    env = {
+        "DJANGO_SETTINGS_MODULE": "normandy.settings",
+        "DJANGO_CONFIGURATION": "Development",
+        **os.environ,
+        "DJANGO_DEFER_STARTUP_CHECKS": "True",
+    }
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", STARTUP_CODE],
+        cwd=ROOT_DIR,
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+    return parse_import_times(result.stderr)
+
+
+def total_seconds(times):
+    """Total import time, counting each top level import once."""
+    return sum(t.cumulative_us for t in times if t.depth == 0) / 1_000_000
+
+
+def main():
+    times = measure_startup()
+    print(f"Total import time: {total_seconds(times):.3f}s\n")
+    print(f"{'cumulative':>12} {'self':>10}  module")
+    for t in sorted(times, key=lambda t: t.cumulative_us, reverse=True)[:REPORT_LIMIT]:
+        print(f"{t.cumulative_us / 1000:>10.1f}ms {t.self_us / 1000:>8.1f}ms  {t.module}")
+
+
+if __name__ == "__main__":
+    main()
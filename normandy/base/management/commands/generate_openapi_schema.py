@@ -0,0 +1,40 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from normandy.base.api.openapi import CODECS, VERSIONS, generate_schema, get_schema_path
+
+
+class Command(BaseCommand):
+    """
+    Generate the OpenAPI schema of each API version, and write them to
+    files that the API serves instead of generating them for each request.
+    """
+
+    help = "Generates the OpenAPI schemas of the API"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output-dir",
+            default=None,
+            help="Directory to write schemas to. Defaults to settings.OPENAPI_SCHEMA_ROOT",
+        )
+        parser.add_argument(
+            "--format",
+            dest="formats",
+            action="append",
+            choices=sorted(CODECS),
+            help="Format to write, may be repeated. Defaults to all formats",
+        )
+
+    def handle(self, *args, output_dir, formats, **options):
+        output_dir = output_dir or settings.OPENAPI_SCHEMA_ROOT
+        os.makedirs(output_dir, exist_ok=True)
+
+        for version in VERSIONS:
+            for format in formats or sorted(CODECS):
+                path = get_schema_path(version, format, root=output_dir)
+                with open(path, "wb") as f:
+                    f.write(generate_schema(version, format))
+                self.stdout.write(f"Wrote {path}")
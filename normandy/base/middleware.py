@@ -12,10 +12,15 @@ from django.utils.cache import patch_cache_control
 from django.middleware.common import CommonMiddleware
 from django.middleware.security import SecurityMiddleware
 
+from rest_framework.permissions import SAFE_METHODS
+from dockerflow.django.middleware import DockerflowMiddleware
 from whitenoise.middleware import WhiteNoiseMiddleware
 
+from normandy.base import db, profiling, tracing
+
 
 DEBUG_HTTP_TO_HTTPS_REDIRECT = "normandy.base.middleware.D001"
+WARNING_MANY_DB_QUERIES = "normandy.base.middleware.W001"
 
 
 logger = logging.getLogger(__name__)
@@ -35,6 +40,55 @@ def request_received_at_middleware(get_response):
     return middleware
 
 
+READ_PRIMARY_COOKIE = "normandy-read-primary"
+
+
+def is_anonymous_request(request):
+    """
+    Check if a request carries no credentials, without looking up the user.
+    """
+    return (
+        "HTTP_AUTHORIZATION" not in request.META
+        and settings.OIDC_REMOTE_AUTH_HEADER not in request.META
+        and settings.SESSION_COOKIE_NAME not in request.COOKIES
+    )
+
+
+def replica_routing_middleware(get_response):
+    """
+    Serve safe requests from anonymous clients from a database replica.
+
+    Authenticated requests always use the primary database, so admins see
+    their own changes right away. As an extra safeguard, clients that
+    recently made a write are also given a cookie that keeps them on the
+    primary for ``DATABASE_REPLICA_STICKY_SECONDS``, in case their later
+    requests don't carry credentials.
+    """
+
+    def middleware(request):
+        if (
+            request.method in SAFE_METHODS
+            and is_anonymous_request(request)
+            and READ_PRIMARY_COOKIE not in request.COOKIES
+        ):
+            with db.read_from_replica():
+                return get_response(request)
+
+        response = get_response(request)
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            response.set_cookie(
+                READ_PRIMARY_COOKIE,
+                "1",
+                max_age=settings.DATABASE_REPLICA_STICKY_SECONDS,
+                secure=request.is_secure(),
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+    return middleware
+
+
 class ConfigurableRemoteUserMiddleware(RemoteUserMiddleware):
     """
     Makes RemoteUserMiddleware customizable via settings.
@@ -52,6 +106,20 @@ class ConfigurableRemoteUserMiddleware(RemoteUserMiddleware):
         return settings.OIDC_REMOTE_AUTH_HEADER
 
 
+class NormandyDockerflowMiddleware(DockerflowMiddleware):
+    """
+    Dockerflow's request summary logging, with the spans traced during the
+    request added to the summary if ``TRACING_LOG_SPANS`` is enabled.
+    """
+
+    def _build_extra_meta(self, request):
+        out = super()._build_extra_meta(request)
+        trace = getattr(request, "_trace", None)
+        if trace is not None and settings.TRACING_LOG_SPANS:
+            out["spans"] = trace.summary()
+        return out
+
+
 class NormandyWhiteNoiseMiddleware(WhiteNoiseMiddleware):
     def is_immutable_file(self, path, url):
         """
@@ -122,27 +190,80 @@ class NormandySecurityMiddleware(SecurityMiddleware):
         return response
 
 
+def get_view_name(request):
+    if request.resolver_match:
+        view = request.resolver_match.func
+        return f"{view.__module__}.{view.__name__}"
+    return "<unknown view>"
+
+
 def response_metrics_middleware(get_response):
     def middleware(request):
         start_time = time.time()
-        response = get_response(request)
+        with db.QueryCounter() as queries:
+            response = get_response(request)
         delta = time.time() - start_time
 
-        if request.resolver_match:
-            view = request.resolver_match.func
-            view_name = f"{view.__module__}.{view.__name__}"
-        else:
-            view_name = "<unknown view>"
-
-        metrics.timing(
-            "response",
-            value=delta * 1000.0,
-            tags=[
-                f"status:{response.status_code}",
-                f"view:{view_name}",
-                f"method:{request.method}",
-            ],
-        )
+        view_name = get_view_name(request)
+        tags = [f"status:{response.status_code}", f"view:{view_name}", f"method:{request.method}"]
+        metrics.timing("response", value=delta * 1000.0, tags=tags)
+        metrics.histogram("response.db.queries", value=queries.count, tags=tags)
+        metrics.histogram("response.db.duplicate_queries", value=queries.duplicates, tags=tags)
+        metrics.timing("response.db.time", value=queries.duration * 1000.0, tags=tags)
+
+        threshold = settings.DB_QUERY_COUNT_LOG_THRESHOLD
+        if threshold and queries.count >= threshold:
+            logger.warning(
+                f"{request.method} {request.path} made {queries.count} database queries",
+                extra={
+                    "code": WARNING_MANY_DB_QUERIES,
+                    "view": view_name,
+                    "queries": queries.count,
+                    "duplicate_queries": queries.duplicates,
+                    "db_time": queries.duration * 1000.0,
+                    "most_duplicated": [
+                        {"sql": sql, "count": count} for sql, count in queries.most_duplicated(5)
+                    ],
+                },
+            )
+
+        return response
+
+    return middleware
+
+
+def profiling_middleware(get_response):
+    """
+    Profile a sample of requests, and requests that ask to be profiled
+    with a profiling token.
+    """
+
+    def middleware(request):
+        if not profiling.should_profile(request):
+            return get_response(request)
+
+        with profiling.RequestProfiler() as profiler:
+            response = get_response(request)
+        response[profiling.PROFILE_ID_HEADER] = profiler.save(request, response)
+        return response
+
+    return middleware
+
+
+def tracing_middleware(get_response):
+    """
+    Collect the spans opened while handling a request, and send their totals
+    as metrics tagged with the view that handled it.
+    """
+
+    def middleware(request):
+        if not settings.TRACING_ENABLED:
+            return get_response(request)
+
+        with tracing.Trace() as trace:
+            response = get_response(request)
+        request._trace = trace
+        trace.send_metrics(tags=[f"view:{get_view_name(request)}"])
         return response
 
     return middleware
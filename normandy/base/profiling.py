@@ -0,0 +1,200 @@
+"""
+Sampled profiling of requests.
+
+Requests are profiled with cProfile if they are picked by
+``PROFILING_SAMPLE_RATE``, or if they carry a valid profiling token in the
+``X-Normandy-Profile`` header. Profiles are kept for ``PROFILING_RETENTION``
+seconds, and can be listed by superusers through the API.
+
+Profiles are stored in ``PROFILING_DIRECTORY`` if it is set, which lets
+all the workers on a server see each other's profiles. Otherwise they are
+stored in the cache.
+"""
+
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import random
+import re
+import time
+import uuid
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.utils import timezone
+
+
+INFO_SAVED_PROFILE = "normandy.base.profiling.I001"
+
+PROFILE_TOKEN_HEADER = "HTTP_X_NORMANDY_PROFILE"
+PROFILE_ID_HEADER = "X-Normandy-Profile-Id"
+
+#: Number of functions to include in the stats of each profile.
+STATS_LIMIT = 100
+
+_TOKEN_SALT = "normandy.base.profiling"
+_INDEX_CACHE_KEY = "profiling:index"
+_PROFILE_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+
+logger = logging.getLogger(__name__)
+
+
+def _profile_cache_key(profile_id):
+    return f"profiling:profile:{profile_id}"
+
+
+def make_profiling_token():
+    """Make a token that enables profiling for requests that send it."""
+    return signing.dumps("profile", salt=_TOKEN_SALT)
+
+
+def is_valid_profiling_token(token):
+    try:
+        signing.loads(token, salt=_TOKEN_SALT, max_age=settings.PROFILING_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return False
+    return True
+
+
+def should_profile(request):
+    token = request.META.get(PROFILE_TOKEN_HEADER)
+    if token and is_valid_profiling_token(token):
+        return True
+    return random.random() < settings.PROFILING_SAMPLE_RATE
+
+
+class RequestProfiler(object):
+    """Collects a profile of a single request."""
+
+    def __init__(self):
+        self.profiler = cProfile.Profile()
+        self.start_time = None
+        self.duration = None
+
+    def __enter__(self):
+        self.start_time = time.time()
+        self.profiler.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.disable()
+        self.duration = time.time() - self.start_time
+
+    def get_stats(self):
+        stream = io.StringIO()
+        stats = pstats.Stats(self.profiler, stream=stream)
+        stats.sort_stats("cumulative").print_stats(STATS_LIMIT)
+        return stream.getvalue()
+
+    def save(self, request, response):
+        """Store the profile, and return its ID."""
+        profile = {
+            "id": uuid.uuid4().hex,
+            "method": request.method,
+            "path": request.get_full_path(),
+            "status": response.status_code,
+            "duration": self.duration * 1000.0,
+            "created": timezone.now().isoformat(),
+            "stats": self.get_stats(),
+        }
+        if settings.PROFILING_DIRECTORY:
+            _save_to_directory(profile)
+        else:
+            _save_to_cache(profile)
+
+        logger.info(
+            f"Saved profile {profile['id']} of {profile['method']} {profile['path']}",
+            extra={
+                "code": INFO_SAVED_PROFILE,
+                "profile_id": profile["id"],
+                "duration": profile["duration"],
+            },
+        )
+        return profile["id"]
+
+
+def _save_to_cache(profile):
+    cache.set(_profile_cache_key(profile["id"]), profile, settings.PROFILING_RETENTION)
+    index = cache.get(_INDEX_CACHE_KEY, [])
+    index = [profile["id"]] + index[: settings.PROFILING_MAX_PROFILES - 1]
+    cache.set(_INDEX_CACHE_KEY, index, settings.PROFILING_RETENTION)
+
+
+def _save_to_directory(profile):
+    directory = settings.PROFILING_DIRECTORY
+    os.makedirs(directory, exist_ok=True)
+    # Write to a temporary file first so that readers never see a partial profile
+    path = os.path.join(directory, f"{profile['id']}.json")
+    with open(path + ".tmp", "w") as f:
+        json.dump(profile, f)
+    os.replace(path + ".tmp", path)
+
+    # Remove profiles that are too old or too many
+    for index, path in enumerate(_list_directory()):
+        if index >= settings.PROFILING_MAX_PROFILES or _is_expired(path):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def _list_directory():
+    """List profile files, most recent first."""
+    directory = settings.PROFILING_DIRECTORY
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    paths = [os.path.join(directory, name) for name in names if name.endswith(".json")]
+    return sorted(paths, key=_get_mtime, reverse=True)
+
+
+def _get_mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except FileNotFoundError:
+        return 0
+
+
+def _is_expired(path):
+    return time.time() - _get_mtime(path) > settings.PROFILING_RETENTION
+
+
+def _load_from_directory(path):
+    if _is_expired(path):
+        return None
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def get_profile(profile_id):
+    if not _PROFILE_ID_RE.match(profile_id):
+        return None
+    if settings.PROFILING_DIRECTORY:
+        return _load_from_directory(
+            os.path.join(settings.PROFILING_DIRECTORY, f"{profile_id}.json")
+        )
+    return cache.get(_profile_cache_key(profile_id))
+
+
+def get_recent_profiles():
+    """Get stored profiles, most recent first."""
+    if settings.PROFILING_DIRECTORY:
+        profiles = [_load_from_directory(path) for path in _list_directory()]
+        return [profile for profile in profiles if profile is not None]
+
+    index = cache.get(_INDEX_CACHE_KEY, [])
+    profiles = cache.get_many([_profile_cache_key(profile_id) for profile_id in index])
+    return [
+        profiles[_profile_cache_key(profile_id)]
+        for profile_id in index
+        if _profile_cache_key(profile_id) in profiles
+    ]
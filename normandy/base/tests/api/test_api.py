@@ -6,12 +6,16 @@ from rest_framework.test import APIClient
 from django.conf.urls import url
 from django.contrib.auth.models import Group, Permission, User
 from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.http import HttpResponse
 from django.views.generic import View
 
+from normandy.base import profiling
+from normandy.base.api import views
 from normandy.base.api.permissions import AdminEnabled
 from normandy.base.api.views import APIView, APIRootView
 from normandy.base.api.routers import MixedViewRouter
-from normandy.base.tests import GroupFactory, UserFactory
+from normandy.base.tests import GroupFactory, UserFactory, Whatever
 
 
 @pytest.mark.django_db
@@ -126,6 +130,42 @@ class TestAPIRootView(object):
         res.render()
         assert json.loads(res.content.decode()) == {"test-view": "http://testserver/test"}
 
+    def test_it_finds_endpoints_once(self, rf, mocker, static_url_pattern_conf):
+        mock_reverse = mocker.patch("normandy.base.api.views.reverse")
+        mock_reverse.return_value = "/test"
+        get_api_endpoints = mocker.patch(
+            "normandy.base.api.views.get_api_endpoints", wraps=views.get_api_endpoints
+        )
+        view = APIRootView.as_view(urlconf=static_url_pattern_conf)
+
+        for _ in range(3):
+            assert view(rf.get("/test")).status_code == 200
+        assert get_api_endpoints.call_count == 1
+        assert mock_reverse.call_count == 1
+
+    def test_it_uses_the_requested_host(self, rf, mocker, settings, static_url_pattern_conf):
+        settings.ALLOWED_HOSTS = ["one.example.com", "two.example.com"]
+        mock_reverse = mocker.patch("normandy.base.api.views.reverse")
+        mock_reverse.return_value = "/test"
+        view = APIRootView.as_view(urlconf=static_url_pattern_conf)
+
+        res = view(rf.get("/test", HTTP_HOST="one.example.com"))
+        assert res.data == {"test-view": "http://one.example.com/test"}
+        res = view(rf.get("/test", HTTP_HOST="two.example.com"))
+        assert res.data == {"test-view": "http://two.example.com/test"}
+        assert mock_reverse.call_count == 1
+
+    def test_query_strings_share_a_cache_entry(self, rf, mocker, static_url_pattern_conf):
+        mock_reverse = mocker.patch("normandy.base.api.views.reverse")
+        mock_reverse.return_value = "/test"
+        view = APIRootView.as_view(urlconf=static_url_pattern_conf)
+        views.get_root_response_data.cache_clear()
+
+        for i in range(views.ROOT_RESPONSE_CACHE_SIZE + 1):
+            res = view(rf.get(f"/test?cachebust={i}"))
+            assert res.data == {"test-view": "http://testserver/test"}
+        assert views.get_root_response_data.cache_info().currsize == 1
+
 
 class TestMixedViewRouter(object):
     def test_register_view_takes_allow_cdn(self):
@@ -409,3 +449,61 @@ class TestGroupAPI(object):
         res = api_client.put(f"/api/v3/group/{g.id}/", {"name": "def"})
         assert res.status_code == 403
         assert res.data["detail"] == AdminEnabled.message
+
+
+@pytest.mark.django_db
+class TestProfileAPI(object):
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        cache.clear()
+        yield
+        cache.clear()
+
+    @pytest.fixture
+    def profile_id(self, rf):
+        with profiling.RequestProfiler() as profiler:
+            sum(range(1000))
+        return profiler.save(rf.get("/api/v1/action/"), HttpResponse())
+
+    def test_it_lists_profiles(self, api_client, profile_id):
+        res = api_client.get("/api/v3/profile/")
+        assert res.status_code == 200
+        assert res.data == [
+            {
+                "id": profile_id,
+                "method": "GET",
+                "path": "/api/v1/action/",
+                "status": 200,
+                "duration": Whatever(),
+                "created": Whatever(),
+            }
+        ]
+
+    def test_it_retrieves_profiles(self, api_client, profile_id):
+        res = api_client.get(f"/api/v3/profile/{profile_id}/")
+        assert res.status_code == 200
+        assert res.data["id"] == profile_id
+        assert "function calls" in res.data["stats"]
+
+    def test_it_404s_for_missing_profiles(self, api_client):
+        res = api_client.get("/api/v3/profile/0123456789abcdef0123456789abcdef/")
+        assert res.status_code == 404
+
+    def test_it_makes_tokens(self, api_client, settings):
+        res = api_client.post("/api/v3/profile/token/")
+        assert res.status_code == 200
+        assert res.data["header"] == "X-Normandy-Profile"
+
+        settings.PROFILING_SAMPLE_RATE = 0
+        res = api_client.get("/api/v3/", HTTP_X_NORMANDY_PROFILE=res.data["token"])
+        assert res.status_code == 200
+        assert profiling.get_profile(res["X-Normandy-Profile-Id"])["path"] == "/api/v3/"
+
+    def test_it_is_only_for_superusers(self, profile_id):
+        user = UserFactory(is_superuser=False)
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        assert client.get("/api/v3/profile/").status_code == 403
+        assert client.get(f"/api/v3/profile/{profile_id}/").status_code == 403
+        assert client.post("/api/v3/profile/token/").status_code == 403
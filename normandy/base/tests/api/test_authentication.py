@@ -1,5 +1,7 @@
+import base64
 import json
 import pytest
+import threading
 import time
 
 from datetime import datetime
@@ -13,7 +15,11 @@ from django.conf.urls import url
 from django.core.cache import cache
 
 from normandy.base.tests import UserFactory
-from normandy.base.api.authentication import BearerTokenAuthentication, InsecureEmailAuthentication
+from normandy.base.api.authentication import (
+    BearerTokenAuthentication,
+    InsecureEmailAuthentication,
+    get_token_expiry,
+)
 
 
 class MockView(APIView):
@@ -132,6 +138,63 @@ class TestBearerTokenAuthentication(object):
         )
         assert response.status_code == 401
 
+    def test_cached_users_are_not_synced_again(
+        self, bare_api_client, mock_oidc, requestsmock, django_assert_num_queries
+    ):
+        user = UserFactory()
+        mock_oidc(user=user)
+        bare_api_client.get("/bearer/", HTTP_AUTHORIZATION="Bearer valid-token")
+
+        # Only the user is loaded, by primary key
+        with django_assert_num_queries(1):
+            response = bare_api_client.get("/bearer/", HTTP_AUTHORIZATION="Bearer valid-token")
+        assert response.status_code == 200
+        assert response.data.get("user") == user.email
+        assert requestsmock.call_count == 1
+
+    def test_failures_are_cached(self, bare_api_client, requestsmock, settings):
+        user = UserFactory()
+        requestsmock.get(
+            settings.OIDC_USER_ENDPOINT,
+            [
+                {"status_code": 401},
+                {"content": json.dumps({"email": user.email}).encode(), "status_code": 200},
+            ],
+        )
+
+        for _ in range(2):
+            response = bare_api_client.get("/bearer/", HTTP_AUTHORIZATION="Bearer invalid-token")
+            assert response.status_code == 401
+            assert response.data.get("detail") == "Unauthorized access token"
+        assert requestsmock.call_count == 1
+
+    def test_cache_is_limited_by_token_expiry(self, bare_api_client, mock_oidc, requestsmock):
+        mock_oidc(user=UserFactory())
+        payload = base64.urlsafe_b64encode(json.dumps({"exp": time.time() - 1}).encode())
+        expired_token = f"header.{payload.decode().rstrip('=')}.signature"
+
+        for _ in range(2):
+            response = bare_api_client.get(
+                "/bearer/", HTTP_AUTHORIZATION=f"Bearer {expired_token}"
+            )
+            assert response.status_code == 200
+        assert requestsmock.call_count == 2
+
+    def test_concurrent_verifications_are_coalesced(self, bare_api_client, requestsmock):
+        user = UserFactory()
+        cache_key = BearerTokenAuthentication.get_cache_key("valid-token")
+        cache.set(f"{cache_key}-lock", True)
+
+        def finish_verification():
+            cache.set(cache_key, {"user_id": user.id})
+            cache.delete(f"{cache_key}-lock")
+
+        threading.Timer(0.2, finish_verification).start()
+        response = bare_api_client.get("/bearer/", HTTP_AUTHORIZATION="Bearer valid-token")
+        assert response.status_code == 200
+        assert response.data.get("user") == user.email
+        assert requestsmock.call_count == 0
+
     def test_user_exists(self, bare_api_client, mock_oidc):
         user = UserFactory()
         mock_oidc(user=user)
@@ -244,6 +307,16 @@ class TestBearerTokenAuthentication(object):
         assert user.email == "john.doe@example.com"
 
 
+class TestGetTokenExpiry(object):
+    def test_it_works(self):
+        payload = base64.urlsafe_b64encode(json.dumps({"exp": 1600000000}).encode()).decode()
+        assert get_token_expiry(f"header.{payload.rstrip('=')}.signature") == 1600000000
+
+    def test_opaque_tokens(self):
+        assert get_token_expiry("401f7ac837da42b97f613d789819ff93537bee6a") is None
+        assert get_token_expiry("not.a.jwt") is None
+
+
 @pytest.mark.django_db
 @pytest.mark.urls("normandy.base.tests.api.test_authentication")
 class TestInsecureEmailAuthentication(object):
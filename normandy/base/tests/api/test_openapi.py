@@ -0,0 +1,93 @@
+import json
+
+from django.core.management import call_command
+
+import pytest
+
+from normandy.base.api import openapi
+
+
+@pytest.fixture(autouse=True)
+def schema_root(settings, tmp_path):
+    settings.OPENAPI_SCHEMA_ROOT = str(tmp_path)
+    openapi.load_schema.cache_clear()
+    yield tmp_path
+    openapi.load_schema.cache_clear()
+
+
+@pytest.mark.django_db
+class TestSchemaView(object):
+    def test_it_works(self, client):
+        res = client.get("/api/v1/swagger.json")
+        assert res.status_code == 200
+        assert res["Content-Type"] == "application/json; charset=utf-8"
+        schema = json.loads(res.content)
+        assert schema["info"]["version"] == "v1"
+        assert "/v1/recipe/" in schema["paths"]
+        assert "/v3/recipe/" not in schema["paths"]
+        # Clients use the host they fetched the schema from
+        assert "host" not in schema
+
+    def test_it_serves_each_version(self, client):
+        res = client.get("/api/v3/swagger.json")
+        assert res.status_code == 200
+        schema = json.loads(res.content)
+        assert schema["info"]["version"] == "v3"
+        assert "/v3/recipe/" in schema["paths"]
+
+    def test_it_supports_conditional_requests(self, client):
+        res = client.get("/api/v1/swagger.json")
+        etag = res["ETag"]
+        res = client.get("/api/v1/swagger.json", HTTP_IF_NONE_MATCH=etag)
+        assert res.status_code == 304
+        assert res.content == b""
+
+    def test_it_generates_schemas_once(self, client, mocker):
+        generate_schema = mocker.patch(
+            "normandy.base.api.openapi.generate_schema", wraps=openapi.generate_schema
+        )
+        for _ in range(3):
+            assert client.get("/api/v1/swagger.json").status_code == 200
+        assert generate_schema.call_count == 1
+
+    def test_it_regenerates_schemas_in_debug_mode(self, client, mocker, settings):
+        settings.DEBUG = True
+        generate_schema = mocker.patch(
+            "normandy.base.api.openapi.generate_schema", wraps=openapi.generate_schema
+        )
+        for _ in range(2):
+            assert client.get("/api/v1/swagger.json").status_code == 200
+        assert generate_schema.call_count == 2
+
+    def test_it_serves_pre_rendered_schemas(self, client, mocker, schema_root):
+        generate_schema = mocker.patch("normandy.base.api.openapi.generate_schema")
+        (schema_root / "v1.json").write_bytes(b'{"swagger": "2.0"}')
+
+        res = client.get("/api/v1/swagger.json")
+        assert res.status_code == 200
+        assert res.content == b'{"swagger": "2.0"}'
+        assert res["ETag"] == openapi.make_etag(b'{"swagger": "2.0"}')
+        assert not generate_schema.called
+
+    def test_swagger_ui_uses_the_pre_rendered_schema(self, client, mocker):
+        generate_schema = mocker.patch("normandy.base.api.openapi.generate_schema")
+        res = client.get("/api/v1/swagger/")
+        assert res.status_code == 200
+        assert b"../swagger.json" in res.content
+        assert not generate_schema.called
+
+
+@pytest.mark.django_db
+class TestGenerateOpenAPISchemaCommand(object):
+    def test_it_writes_each_version(self, client, schema_root):
+        call_command("generate_openapi_schema", "--format", "json")
+
+        assert sorted(p.name for p in schema_root.iterdir()) == ["v1.json", "v3.json"]
+        v3 = (schema_root / "v3.json").read_bytes()
+        assert v3 == openapi.generate_schema("v3", "json")
+        assert client.get("/api/v3/swagger.json").content == v3
+
+    def test_it_takes_an_output_directory(self, tmp_path):
+        output_dir = tmp_path / "schemas"
+        call_command("generate_openapi_schema", "--format", "json", "--output-dir", output_dir)
+        assert json.loads((output_dir / "v1.json").read_bytes())["info"]["version"] == "v1"
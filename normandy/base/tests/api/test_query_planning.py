@@ -0,0 +1,64 @@
+from django.contrib.auth.models import Group, User
+
+from rest_framework import serializers
+
+from normandy.base.api.query_planning import get_query_plan, plan_queryset
+from normandy.base.api.v3.serializers import UserWithGroupsSerializer
+
+
+class GroupWithUsersSerializer(serializers.ModelSerializer):
+    user_set = UserWithGroupsSerializer(many=True)
+
+    class Meta:
+        model = Group
+        fields = ["id", "user_set"]
+
+
+class UserWithDeclaredLookupsSerializer(serializers.ModelSerializer):
+    groups = serializers.SerializerMethodField()
+    itself = UserWithGroupsSerializer(source="*")
+    full_name = serializers.CharField(source="get_full_name")
+
+    class Meta:
+        model = User
+        fields = ["groups", "itself", "full_name"]
+        prefetch_related = ["groups__permissions"]
+
+    def get_groups(self, user):
+        return [
+            {"name": group.name, "permissions": group.permissions.count()}
+            for group in user.groups.all()
+        ]
+
+
+class TestGetQueryPlan(object):
+    def test_many_relations_are_prefetched(self):
+        assert get_query_plan(UserWithGroupsSerializer) == (set(), {"groups"})
+
+    def test_nested_lookups_are_prefixed(self):
+        assert get_query_plan(GroupWithUsersSerializer) == (
+            set(),
+            {"user_set", "user_set__groups"},
+        )
+
+    def test_declared_lookups_and_star_sources(self):
+        assert get_query_plan(UserWithDeclaredLookupsSerializer) == (
+            set(),
+            {"groups", "groups__permissions"},
+        )
+
+    def test_select_related_below_a_prefetch_is_prefetched(self):
+        class Serializer(serializers.ModelSerializer):
+            class Meta:
+                model = User
+                fields = ["id"]
+                select_related = ["profile"]
+
+        assert get_query_plan(Serializer, prefix="user_set__", many=True) == (
+            set(),
+            {"user_set__profile"},
+        )
+
+    def test_plan_queryset(self):
+        queryset = plan_queryset(Group.objects.all(), GroupWithUsersSerializer)
+        assert sorted(queryset._prefetch_related_lookups) == ["user_set", "user_set__groups"]
@@ -0,0 +1,189 @@
+import asyncio
+import json
+
+from normandy.base.asgi import AsyncWSGIApplication, get_environ, sync_to_async
+
+
+def make_scope(method="GET", path="/", headers=None, query_string=b""):
+    return {
+        "type": "http",
+        "http_version": "1.1",
+        "method": method,
+        "path": path,
+        "root_path": "",
+        "query_string": query_string,
+        "scheme": "https",
+        "server": ("normandy.example.com", 443),
+        "client": ("1.2.3.4", 5678),
+        "headers": headers or [],
+    }
+
+
+def run_asgi(application, scope, messages):
+    """Run an ASGI application to completion, returning the messages it sent."""
+    sent = []
+    messages = list(messages)
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(application(scope, receive, send))
+    return sent
+
+
+class TestGetEnviron(object):
+    def test_it_works(self):
+        scope = make_scope(
+            method="POST",
+            path="/api/v3/recipe/",
+            query_string=b"page=2",
+            headers=[
+                (b"host", b"normandy.example.com"),
+                (b"content-type", b"application/json"),
+                (b"x-forwarded-for", b"1.1.1.1"),
+                (b"x-forwarded-for", b"2.2.2.2"),
+            ],
+        )
+        environ = get_environ(scope, b"{}")
+
+        assert environ["REQUEST_METHOD"] == "POST"
+        assert environ["PATH_INFO"] == "/api/v3/recipe/"
+        assert environ["QUERY_STRING"] == "page=2"
+        assert environ["SERVER_NAME"] == "normandy.example.com"
+        assert environ["SERVER_PORT"] == "443"
+        assert environ["REMOTE_ADDR"] == "1.2.3.4"
+        assert environ["wsgi.url_scheme"] == "https"
+        assert environ["wsgi.input"].read() == b"{}"
+        assert environ["HTTP_HOST"] == "normandy.example.com"
+        assert environ["CONTENT_TYPE"] == "application/json"
+        assert "HTTP_CONTENT_TYPE" not in environ
+        assert environ["HTTP_X_FORWARDED_FOR"] == "1.1.1.1,2.2.2.2"
+
+    def test_it_encodes_paths_like_wsgi(self):
+        environ = get_environ(make_scope(path="/café/"))
+        assert environ["PATH_INFO"].encode("latin-1").decode("utf-8") == "/café/"
+
+
+class TestSyncToAsync(object):
+    def test_it_works(self):
+        @sync_to_async
+        def add(a, b=0):
+            return a + b
+
+        assert asyncio.run(add(1, b=2)) == 3
+
+
+class TestAsyncWSGIApplication(object):
+    def test_it_serves_wsgi_applications(self):
+        def wsgi_app(environ, start_response):
+            body = environ["wsgi.input"].read()
+            start_response("201 Created", [("Content-Type", "text/plain")])
+            return [b"got ", body]
+
+        sent = run_asgi(
+            AsyncWSGIApplication(wsgi_app),
+            make_scope(method="POST"),
+            [
+                {"type": "http.request", "body": b"hello ", "more_body": True},
+                {"type": "http.request", "body": b"world", "more_body": False},
+            ],
+        )
+
+        assert sent == [
+            {
+                "type": "http.response.start",
+                "status": 201,
+                "headers": [(b"Content-Type", b"text/plain")],
+            },
+            {"type": "http.response.body", "body": b"got hello world"},
+        ]
+
+    def test_it_spools_large_bodies_to_disk(self, settings):
+        settings.FILE_UPLOAD_MAX_MEMORY_SIZE = 10
+        inputs = []
+
+        def wsgi_app(environ, start_response):
+            inputs.append(environ["wsgi.input"])
+            start_response("200 OK", [])
+            return [environ["wsgi.input"].read()]
+
+        sent = run_asgi(
+            AsyncWSGIApplication(wsgi_app),
+            make_scope(method="POST"),
+            [
+                {"type": "http.request", "body": b"a" * 8, "more_body": True},
+                {"type": "http.request", "body": b"b" * 8, "more_body": False},
+            ],
+        )
+        assert sent[1]["body"] == b"a" * 8 + b"b" * 8
+        assert inputs[0]._rolled
+        assert inputs[0].closed
+
+    def test_it_rejects_large_content_lengths(self, settings, mocker):
+        settings.ASGI_MAX_REQUEST_BODY_SIZE = 10
+        wsgi_app = mocker.Mock()
+        scope = make_scope(method="POST", headers=[(b"content-length", b"11")])
+        sent = run_asgi(AsyncWSGIApplication(wsgi_app), scope, [])
+        assert sent[0]["status"] == 413
+        assert not wsgi_app.called
+
+    def test_it_rejects_large_streamed_bodies(self, settings, mocker):
+        settings.ASGI_MAX_REQUEST_BODY_SIZE = 10
+        wsgi_app = mocker.Mock()
+        sent = run_asgi(
+            AsyncWSGIApplication(wsgi_app),
+            make_scope(method="POST"),
+            [
+                {"type": "http.request", "body": b"a" * 8, "more_body": True},
+                {"type": "http.request", "body": b"b" * 8, "more_body": True},
+            ],
+        )
+        assert sent[0]["status"] == 413
+        assert sent[1]["body"] == b"Request body too large"
+        assert not wsgi_app.called
+
+    def test_it_closes_responses(self, mocker):
+        result = mocker.MagicMock()
+        result.__iter__.return_value = [b"body"]
+
+        def wsgi_app(environ, start_response):
+            start_response("200 OK", [])
+            return result
+
+        run_asgi(AsyncWSGIApplication(wsgi_app), make_scope(), [{"type": "http.request"}])
+        assert result.close.called
+
+    def test_it_stops_when_the_client_disconnects(self, mocker):
+        wsgi_app = mocker.Mock()
+        sent = run_asgi(
+            AsyncWSGIApplication(wsgi_app), make_scope(), [{"type": "http.disconnect"}]
+        )
+        assert sent == []
+        assert not wsgi_app.called
+
+    def test_it_handles_lifespan_events(self, mocker):
+        sent = run_asgi(
+            AsyncWSGIApplication(mocker.Mock()),
+            {"type": "lifespan"},
+            [{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}],
+        )
+        assert sent == [
+            {"type": "lifespan.startup.complete"},
+            {"type": "lifespan.shutdown.complete"},
+        ]
+
+    def test_it_serves_django(self):
+        from django.core.handlers.wsgi import WSGIHandler
+
+        sent = run_asgi(
+            AsyncWSGIApplication(WSGIHandler()),
+            make_scope(path="/api/v3/", headers=[(b"host", b"testserver")]),
+            [{"type": "http.request"}],
+        )
+
+        assert sent[0]["status"] == 200
+        assert (b"Content-Type", b"application/json") in sent[0]["headers"]
+        assert "recipe-list" in json.loads(sent[1]["body"])
@@ -0,0 +1,55 @@
+import gzip
+
+from normandy.base.compression import (
+    choose_encoding,
+    compress_variants,
+    gzip_compress,
+    parse_accept_encoding,
+)
+
+
+class TestGzipCompress(object):
+    def test_it_round_trips(self):
+        assert gzip.decompress(gzip_compress(b"console.log('hi');")) == b"console.log('hi');"
+
+    def test_it_is_deterministic(self):
+        assert gzip_compress(b"a" * 1000) == gzip_compress(b"a" * 1000)
+
+
+class TestCompressVariants(object):
+    def test_it_includes_identity_and_gzip(self):
+        variants = compress_variants(b"hello world")
+        assert variants["identity"] == b"hello world"
+        assert gzip.decompress(variants["gzip"]) == b"hello world"
+
+
+class TestParseAcceptEncoding(object):
+    def test_it_works(self):
+        assert parse_accept_encoding("gzip, br;q=0.5, *;q=0") == {"gzip": 1.0, "br": 0.5, "*": 0.0}
+
+    def test_it_handles_bad_q_values(self):
+        assert parse_accept_encoding("gzip;q=lots") == {"gzip": 0.0}
+
+    def test_it_handles_empty_headers(self):
+        assert parse_accept_encoding("") == {}
+
+
+class TestChooseEncoding(object):
+    available = ["identity", "br", "gzip"]
+
+    def test_it_prefers_the_first_available(self):
+        assert choose_encoding("gzip, deflate, br", self.available) == "br"
+
+    def test_it_respects_q_values(self):
+        assert choose_encoding("br;q=0.1, gzip", self.available) == "gzip"
+
+    def test_it_skips_unacceptable_encodings(self):
+        assert choose_encoding("br;q=0, gzip", self.available) == "gzip"
+
+    def test_it_handles_wildcards(self):
+        assert choose_encoding("*", self.available) == "br"
+
+    def test_it_falls_back_to_identity(self):
+        assert choose_encoding(None, self.available) == "identity"
+        assert choose_encoding("deflate", self.available) == "identity"
+        assert choose_encoding("gzip", ["identity"]) == "identity"
@@ -0,0 +1,106 @@
+from django.db import connection
+
+import pytest
+
+from normandy.base.db import (
+    QueryCounter,
+    ReplicaRouter,
+    close_unusable_connections,
+    get_replica_aliases,
+    read_from_replica,
+)
+from normandy.base.tests import Whatever
+from normandy.recipes.models import Recipe
+
+
+@pytest.mark.django_db
+class TestCloseUnusableConnections(object):
+    @pytest.fixture
+    def health_checks(self):
+        original = connection.settings_dict.get("CONN_HEALTH_CHECKS")
+        connection.settings_dict["CONN_HEALTH_CHECKS"] = True
+        yield
+        connection.settings_dict["CONN_HEALTH_CHECKS"] = original
+
+    def test_it_keeps_usable_connections(self, health_checks, mocker):
+        connection.ensure_connection()
+        close = mocker.patch.object(connection, "close")
+        close_unusable_connections()
+        assert not close.called
+
+    def test_it_closes_unusable_connections(self, health_checks, mocker):
+        connection.ensure_connection()
+        mocker.patch.object(connection, "is_usable", return_value=False)
+        close = mocker.patch.object(connection, "close")
+        close_unusable_connections()
+        assert close.called
+
+    def test_it_respects_the_setting(self, mocker):
+        connection.settings_dict["CONN_HEALTH_CHECKS"] = False
+        try:
+            connection.ensure_connection()
+            is_usable = mocker.patch.object(connection, "is_usable", return_value=False)
+            close = mocker.patch.object(connection, "close")
+            close_unusable_connections()
+            assert not is_usable.called
+            assert not close.called
+        finally:
+            connection.settings_dict["CONN_HEALTH_CHECKS"] = True
+
+
+class TestReplicaRouter(object):
+    @pytest.fixture
+    def replicas(self, mocker):
+        return mocker.patch(
+            "normandy.base.db.get_replica_aliases", return_value=["replica0", "replica1"]
+        )
+
+    def test_reads_go_to_the_primary_by_default(self, replicas):
+        assert ReplicaRouter().db_for_read(Recipe) == "default"
+
+    def test_reads_go_to_a_replica_when_requested(self, replicas):
+        with read_from_replica():
+            assert ReplicaRouter().db_for_read(Recipe) in ["replica0", "replica1"]
+        assert ReplicaRouter().db_for_read(Recipe) == "default"
+
+    def test_writes_always_go_to_the_primary(self, replicas):
+        with read_from_replica():
+            assert ReplicaRouter().db_for_write(Recipe) == "default"
+
+    def test_it_uses_the_primary_without_replicas(self, mocker):
+        mocker.patch("normandy.base.db.get_replica_aliases", return_value=[])
+        with read_from_replica():
+            assert ReplicaRouter().db_for_read(Recipe) == "default"
+
+    def test_it_only_migrates_the_primary(self):
+        assert ReplicaRouter().allow_migrate("default", "recipes")
+        assert not ReplicaRouter().allow_migrate("replica0", "recipes")
+
+
+class TestGetReplicaAliases(object):
+    def test_it_finds_mirrors_of_the_primary(self, settings):
+        settings.DATABASES = {
+            "default": {"NAME": "normandy", "TEST": {}},
+            "replica0": {"NAME": "normandy", "TEST": {"MIRROR": "default"}},
+        }
+        assert get_replica_aliases() == ["replica0"]
+
+
+@pytest.mark.django_db
+class TestQueryCounter(object):
+    def test_it_counts_queries(self):
+        with QueryCounter() as queries:
+            list(Recipe.objects.all())
+            list(Recipe.objects.filter(id=1))
+            list(Recipe.objects.filter(id=2))
+
+        assert queries.count == 3
+        assert queries.duration > 0
+        assert queries.duplicates == 1
+        assert queries.most_duplicated(5) == [(Whatever.contains("WHERE"), 2)]
+
+    def test_it_stops_counting_on_exit(self):
+        with QueryCounter() as queries:
+            pass
+        list(Recipe.objects.all())
+        assert queries.count == 0
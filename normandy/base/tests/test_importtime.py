@@ -0,0 +1,37 @@
+from normandy.base import importtime
+
+
+#: Generous limit on the time to import Normandy and set up Django, in
+#: seconds. It is meant to catch expensive imports being added, not small
+#: changes, so it is several times higher than a normal startup.
+IMPORT_TIME_BUDGET = 5
+
+SAMPLE_OUTPUT = """\
+import time: self [us] | cumulative | imported package
+import time:        50 |         50 |     _weakrefset
+import time:       400 |        450 |   abc
+import time:       100 |        550 | os
+import time:       200 |        200 | json
+some other output
+"""
+
+
+class TestParseImportTimes(object):
+    def test_it_works(self):
+        assert importtime.parse_import_times(SAMPLE_OUTPUT) == [
+            importtime.ImportTime("_weakrefset", 50, 50, 2),
+            importtime.ImportTime("abc", 400, 450, 1),
+            importtime.ImportTime("os", 100, 550, 0),
+            importtime.ImportTime("json", 200, 200, 0),
+        ]
+
+    def test_total_counts_top_level_imports(self):
+        times = importtime.parse_import_times(SAMPLE_OUTPUT)
+        assert importtime.total_seconds(times) == 0.00075
+
+
+def test_startup_imports_are_within_budget():
+    times = importtime.measure_startup()
+    modules = {t.module for t in times}
+    assert "normandy.recipes.checks" in modules
+    assert importtime.total_seconds(times) < IMPORT_TIME_BUDGET
@@ -1,14 +1,27 @@
 from random import randint
 
 import pytest
-from markus import TIMING
+from django import http
+from django.core.cache import cache
+from markus import HISTOGRAM, TIMING
 from markus.testing import MetricsMock
 
+from normandy.base import profiling, tracing
+from normandy.base.db import ReplicaRouter
 from normandy.base.middleware import (
     NormandyCommonMiddleware,
+    NormandyDockerflowMiddleware,
     NormandySecurityMiddleware,
     DEBUG_HTTP_TO_HTTPS_REDIRECT,
+    READ_PRIMARY_COOKIE,
+    WARNING_MANY_DB_QUERIES,
+    profiling_middleware,
+    replica_routing_middleware,
+    response_metrics_middleware,
+    tracing_middleware,
 )
+from normandy.base.tests import Whatever
+from normandy.recipes.models import Recipe
 
 
 @pytest.fixture
@@ -103,3 +116,170 @@ class TestResponseMetricsMiddleware(object):
                 stat="normandy.response",
                 tags=["status:200", "view:normandy.base.api.views.APIRootView", "method:GET"],
             )
+
+    @pytest.mark.django_db
+    def test_it_sends_database_metrics(self, rf):
+        def view(request):
+            list(Recipe.objects.all())
+            list(Recipe.objects.all())
+            return http.HttpResponse()
+
+        middleware = response_metrics_middleware(view)
+        with MetricsMock() as mm:
+            middleware(rf.get("/"))
+            tags = ["status:200", "view:<unknown view>", "method:GET"]
+            assert mm.has_record(
+                HISTOGRAM, stat="normandy.response.db.queries", value=2, tags=tags
+            )
+            assert mm.has_record(
+                HISTOGRAM, stat="normandy.response.db.duplicate_queries", value=1, tags=tags
+            )
+            assert mm.has_record(TIMING, stat="normandy.response.db.time", tags=tags)
+
+    @pytest.mark.django_db
+    def test_it_logs_requests_with_many_queries(self, rf, settings, mock_logger):
+        settings.DB_QUERY_COUNT_LOG_THRESHOLD = 3
+
+        def view(request):
+            for _ in range(3):
+                list(Recipe.objects.all())
+            return http.HttpResponse()
+
+        response_metrics_middleware(view)(rf.get("/api/v1/recipe/"))
+        mock_logger.warning.assert_called_with(
+            "GET /api/v1/recipe/ made 3 database queries",
+            extra={
+                "code": WARNING_MANY_DB_QUERIES,
+                "view": "<unknown view>",
+                "queries": 3,
+                "duplicate_queries": 2,
+                "db_time": Whatever(),
+                "most_duplicated": [{"sql": Whatever.contains("recipes_recipe"), "count": 3}],
+            },
+        )
+
+    @pytest.mark.django_db
+    def test_it_doesnt_log_requests_with_few_queries(self, rf, settings, mock_logger):
+        settings.DB_QUERY_COUNT_LOG_THRESHOLD = 3
+
+        def view(request):
+            list(Recipe.objects.all())
+            return http.HttpResponse()
+
+        response_metrics_middleware(view)(rf.get("/api/v1/recipe/"))
+        assert not mock_logger.warning.called
+
+
+class TestReplicaRoutingMiddleware(object):
+    @pytest.fixture
+    def replicas(self, mocker):
+        return mocker.patch("normandy.base.db.get_replica_aliases", return_value=["replica0"])
+
+    @pytest.fixture
+    def middleware(self):
+        def get_response(request):
+            response = http.HttpResponse()
+            response.read_alias = ReplicaRouter().db_for_read(None)
+            return response
+
+        return replica_routing_middleware(get_response)
+
+    def test_anonymous_reads_use_a_replica(self, rf, replicas, middleware):
+        res = middleware(rf.get("/api/v1/recipe/signed/"))
+        assert res.read_alias == "replica0"
+        assert READ_PRIMARY_COOKIE not in res.cookies
+
+    def test_authenticated_reads_use_the_primary(self, rf, replicas, middleware):
+        res = middleware(rf.get("/api/v3/recipe/", HTTP_AUTHORIZATION="Bearer token"))
+        assert res.read_alias == "default"
+
+    def test_session_reads_use_the_primary(self, rf, replicas, middleware, settings):
+        req = rf.get("/api/v3/recipe/")
+        req.COOKIES[settings.SESSION_COOKIE_NAME] = "session"
+        assert middleware(req).read_alias == "default"
+
+    def test_writes_set_a_sticky_cookie(self, rf, replicas, middleware, settings):
+        settings.DATABASE_REPLICA_STICKY_SECONDS = 42
+        res = middleware(rf.post("/api/v3/recipe/", HTTP_AUTHORIZATION="Bearer token"))
+        assert res.read_alias == "default"
+        assert res.cookies[READ_PRIMARY_COOKIE]["max-age"] == 42
+
+    def test_failed_writes_do_not_set_a_sticky_cookie(self, rf, replicas):
+        middleware = replica_routing_middleware(lambda request: http.HttpResponseBadRequest())
+        res = middleware(rf.post("/api/v3/recipe/"))
+        assert READ_PRIMARY_COOKIE not in res.cookies
+
+    def test_reads_after_writes_use_the_primary(self, rf, replicas, middleware):
+        req = rf.get("/api/v1/recipe/signed/")
+        req.COOKIES[READ_PRIMARY_COOKIE] = "1"
+        assert middleware(req).read_alias == "default"
+
+    def test_authenticated_reads_without_the_cookie_use_the_primary(
+        self, rf, replicas, middleware
+    ):
+        middleware(rf.post("/api/v3/recipe/", HTTP_AUTHORIZATION="Bearer token"))
+        # API clients don't keep cookies between requests
+        res = middleware(rf.get("/api/v3/approval_request/", HTTP_AUTHORIZATION="Bearer token"))
+        assert res.read_alias == "default"
+
+
+class TestProfilingMiddleware(object):
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        cache.clear()
+        yield
+        cache.clear()
+
+    def test_it_profiles_sampled_requests(self, rf, settings):
+        settings.PROFILING_SAMPLE_RATE = 1
+        middleware = profiling_middleware(lambda request: http.HttpResponse())
+
+        res = middleware(rf.get("/api/v1/"))
+
+        profile = profiling.get_profile(res[profiling.PROFILE_ID_HEADER])
+        assert profile["path"] == "/api/v1/"
+
+    def test_it_skips_other_requests(self, rf, settings):
+        settings.PROFILING_SAMPLE_RATE = 0
+        middleware = profiling_middleware(lambda request: http.HttpResponse())
+
+        res = middleware(rf.get("/api/v1/"))
+
+        assert profiling.PROFILE_ID_HEADER not in res
+        assert profiling.get_recent_profiles() == []
+
+
+def traced_view(request):
+    with tracing.span("test.span"):
+        pass
+    return http.HttpResponse()
+
+
+class TestTracingMiddleware(object):
+    def test_it_sends_span_metrics(self, rf):
+        with MetricsMock() as mm:
+            tracing_middleware(traced_view)(rf.get("/"))
+            assert mm.has_record(
+                TIMING, stat="normandy.span.test.span", tags=["view:<unknown view>"]
+            )
+
+    def test_it_does_nothing_when_disabled(self, rf, settings):
+        settings.TRACING_ENABLED = False
+        request = rf.get("/")
+        tracing_middleware(traced_view)(request)
+        assert not hasattr(request, "_trace")
+
+
+class TestNormandyDockerflowMiddleware(object):
+    def get_summary(self, rf):
+        request = rf.get("/")
+        tracing_middleware(traced_view)(request)
+        return NormandyDockerflowMiddleware()._build_extra_meta(request)
+
+    def test_it_logs_spans(self, rf, settings):
+        settings.TRACING_LOG_SPANS = True
+        summary = self.get_summary(rf)
+        assert summary["spans"] == {"test.span": {"count": 1, "time": Whatever()}}
+
+    def test_it_doesnt_log_spans_by_default(self, rf):
+        assert "spans" not in self.get_summary(rf)
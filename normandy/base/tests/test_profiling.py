@@ -0,0 +1,102 @@
+import os
+import time
+
+import pytest
+from django.core.cache import cache
+from django.http import HttpResponse
+
+from normandy.base import profiling
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def make_profile(rf, path="/api/v1/action/"):
+    with profiling.RequestProfiler() as profiler:
+        sum(range(1000))
+    return profiler.save(rf.get(path), HttpResponse(status=200))
+
+
+class TestProfilingTokens(object):
+    def test_tokens_are_valid(self):
+        assert profiling.is_valid_profiling_token(profiling.make_profiling_token())
+
+    def test_tampered_tokens_are_invalid(self):
+        assert not profiling.is_valid_profiling_token(profiling.make_profiling_token() + "x")
+        assert not profiling.is_valid_profiling_token("profile")
+
+    def test_tokens_expire(self, settings):
+        token = profiling.make_profiling_token()
+        settings.PROFILING_TOKEN_MAX_AGE = -1
+        assert not profiling.is_valid_profiling_token(token)
+
+
+class TestShouldProfile(object):
+    def test_it_samples_requests(self, rf, settings):
+        settings.PROFILING_SAMPLE_RATE = 1
+        assert profiling.should_profile(rf.get("/"))
+        settings.PROFILING_SAMPLE_RATE = 0
+        assert not profiling.should_profile(rf.get("/"))
+
+    def test_it_profiles_requests_with_tokens(self, rf, settings):
+        settings.PROFILING_SAMPLE_RATE = 0
+        token = profiling.make_profiling_token()
+        assert profiling.should_profile(rf.get("/", HTTP_X_NORMANDY_PROFILE=token))
+        assert not profiling.should_profile(rf.get("/", HTTP_X_NORMANDY_PROFILE="bad"))
+
+
+class TestRequestProfiler(object):
+    def test_it_saves_to_the_cache(self, rf):
+        profile_id = make_profile(rf)
+
+        profile = profiling.get_profile(profile_id)
+        assert profile["id"] == profile_id
+        assert profile["method"] == "GET"
+        assert profile["path"] == "/api/v1/action/"
+        assert profile["status"] == 200
+        assert profile["duration"] >= 0
+        assert "function calls" in profile["stats"]
+        assert profiling.get_recent_profiles() == [profile]
+
+    def test_it_lists_recent_profiles_first(self, rf, settings):
+        settings.PROFILING_MAX_PROFILES = 2
+        make_profile(rf, "/1/")
+        make_profile(rf, "/2/")
+        make_profile(rf, "/3/")
+        assert [p["path"] for p in profiling.get_recent_profiles()] == ["/3/", "/2/"]
+
+    def test_it_saves_to_a_directory(self, rf, settings, tmp_path):
+        settings.PROFILING_DIRECTORY = str(tmp_path / "profiles")
+        profile_id = make_profile(rf)
+
+        assert os.listdir(settings.PROFILING_DIRECTORY) == [f"{profile_id}.json"]
+        assert profiling.get_profile(profile_id)["path"] == "/api/v1/action/"
+        assert [p["id"] for p in profiling.get_recent_profiles()] == [profile_id]
+        assert cache.get("profiling:index") is None
+
+    def test_it_prunes_the_directory(self, rf, settings, tmp_path):
+        settings.PROFILING_DIRECTORY = str(tmp_path)
+        settings.PROFILING_MAX_PROFILES = 2
+        old_id = make_profile(rf, "/1/")
+        old_time = time.time() - 10
+        os.utime(tmp_path / f"{old_id}.json", (old_time, old_time))
+        make_profile(rf, "/2/")
+        make_profile(rf, "/3/")
+
+        assert len(os.listdir(tmp_path)) == 2
+        assert [p["path"] for p in profiling.get_recent_profiles()] == ["/3/", "/2/"]
+
+    def test_it_ignores_expired_profiles(self, rf, settings, tmp_path):
+        settings.PROFILING_DIRECTORY = str(tmp_path)
+        profile_id = make_profile(rf)
+        settings.PROFILING_RETENTION = -1
+        assert profiling.get_profile(profile_id) is None
+        assert profiling.get_recent_profiles() == []
+
+    def test_it_rejects_invalid_ids(self, settings, tmp_path):
+        settings.PROFILING_DIRECTORY = str(tmp_path)
+        assert profiling.get_profile("../../etc/passwd") is None
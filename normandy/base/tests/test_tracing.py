@@ -0,0 +1,71 @@
+from markus import TIMING
+from markus.testing import MetricsMock
+
+from normandy.base import tracing
+from normandy.base.tests import Whatever
+
+
+class TestSpan(object):
+    def test_it_sends_a_timing_outside_of_a_trace(self):
+        with MetricsMock() as mm:
+            with tracing.span("test.span"):
+                pass
+            assert mm.has_record(TIMING, stat="normandy.span.test.span")
+
+    def test_it_does_nothing_when_disabled(self, settings):
+        settings.TRACING_ENABLED = False
+        assert isinstance(tracing.span("test.span"), tracing.NoopSpan)
+        with MetricsMock() as mm:
+            with tracing.Trace() as trace:
+                with tracing.span("test.span"):
+                    pass
+            assert trace.spans == {}
+            assert mm.get_records() == []
+
+    def test_traced_times_each_call(self):
+        @tracing.traced("test.func")
+        def func(value):
+            return value * 2
+
+        with tracing.Trace() as trace:
+            assert func(2) == 4
+            assert func(3) == 6
+        assert trace.summary() == {"test.func": {"count": 2, "time": Whatever()}}
+
+
+class TestTrace(object):
+    def test_it_combines_spans_by_name(self):
+        with tracing.Trace() as trace:
+            with tracing.span("outer"):
+                for _ in range(3):
+                    with tracing.span("inner"):
+                        pass
+
+        assert trace.spans["outer"][0] == 1
+        assert trace.spans["inner"][0] == 3
+        assert trace.spans["outer"][1] >= trace.spans["inner"][1]
+
+    def test_it_collects_spans_instead_of_sending_them(self):
+        with MetricsMock() as mm:
+            with tracing.Trace():
+                with tracing.span("test.span"):
+                    pass
+            assert mm.get_records() == []
+
+    def test_it_restores_the_previous_trace(self):
+        with tracing.Trace() as outer:
+            with tracing.Trace() as inner:
+                assert tracing.get_current_trace() is inner
+            assert tracing.get_current_trace() is outer
+        assert tracing.get_current_trace() is None
+
+    def test_send_metrics(self):
+        trace = tracing.Trace()
+        trace.add("test.span", 2.0)
+        trace.add("test.span", 3.0)
+
+        with MetricsMock() as mm:
+            trace.send_metrics(tags=["view:test"])
+            assert mm.has_record(
+                TIMING, stat="normandy.span.test.span", value=5.0, tags=["view:test"]
+            )
@@ -1,6 +1,20 @@
 import json
+import math
+import random
 
-from normandy.base.utils import canonical_json_dumps, get_client_ip, sri_hash
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+
+from normandy.base import utils
+from normandy.base.utils import (
+    canonical_json,
+    canonical_json_dumps,
+    get_canonical_json_backend,
+    get_client_ip,
+    orjson_canonical_json,
+    sri_hash,
+    stdlib_canonical_json,
+)
 
 
 class TestGetClientIp(object):
@@ -53,6 +67,120 @@ class TestCanonicalJsonDumps(object):
         json.loads(dumped)
 
 
+def random_json(rng, depth=0):
+    """Generate a random value that can be encoded as JSON."""
+    kinds = ["int", "float", "str", "bool", "none"]
+    if depth < 4:
+        kinds += ["list", "dict"] * 2
+    kind = rng.choice(kinds)
+
+    if kind == "int":
+        bits = rng.choice([4, 63, 64, 70])
+        return rng.randint(-(2 ** bits), 2 ** bits)
+    elif kind == "float":
+        return rng.choice(
+            [
+                rng.uniform(-1e6, 1e6),
+                rng.random() * 10 ** rng.randint(-30, 30),
+                float(rng.randint(-100, 100)),
+                rng.choice([0.1, -0.0, 1e-05, 1e-07, 1e16, 5e-324, math.inf, -math.inf, math.nan]),
+            ]
+        )
+    elif kind == "str":
+        alphabet = 'ab"\\/\b\f\n\r\t\x00\x1f\x7f\u00e9\u20ac\U0001f600 nul'
+        return "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 10)))
+    elif kind == "bool":
+        return rng.random() < 0.5
+    elif kind == "none":
+        return None
+    elif kind == "list":
+        return [random_json(rng, depth + 1) for _ in range(rng.randint(0, 5))]
+    else:
+        return {
+            random_json_key(rng): random_json(rng, depth + 1) for _ in range(rng.randint(0, 5))
+        }
+
+
+def random_json_key(rng):
+    key = rng.choice(["a", "b", "B", "é", "€", "\U0001f600", "", "1", "10", "a b", "\n"])
+    return key * rng.randint(1, 3)
+
+
+class TestCanonicalJson(object):
+    @pytest.mark.parametrize("backend", [stdlib_canonical_json, orjson_canonical_json])
+    def test_it_returns_bytes(self, backend):
+        if backend is orjson_canonical_json:
+            pytest.importorskip("orjson")
+        assert backend({"b": [1, 2.5, None], "a": "€"}) == b'{"a":"\\u20ac","b":[1,2.5,null]}'
+
+    def test_backends_are_equivalent(self):
+        pytest.importorskip("orjson")
+        rng = random.Random(0)
+        for _ in range(5000):
+            data = random_json(rng)
+            assert orjson_canonical_json(data) == stdlib_canonical_json(data), repr(data)
+
+    def test_backends_are_equivalent_for_recipes(self):
+        pytest.importorskip("orjson")
+        data = {
+            "id": 1,
+            "name": "A recipe",
+            "revision_id": "12",
+            "action": "preference-experiment",
+            "arguments": {"slug": "test", "branches": [{"ratio": 1, "value": True}]},
+            "filter_expression": '(normandy.channel in ["release"]) && 2 + 2 == 4',
+            "capabilities": ["action.preference-experiment", "capabilities-v1"],
+            "uses_only_baseline_capabilities": False,
+        }
+        assert orjson_canonical_json(data) == stdlib_canonical_json(data)
+
+    def test_none_does_not_fall_back_to_the_stdlib(self, mocker):
+        pytest.importorskip("orjson")
+        stdlib = mocker.patch.object(utils, "stdlib_canonical_json")
+        assert orjson_canonical_json({"a": None, "b": [None, 1.5]}) == b'{"a":null,"b":[null,1.5]}'
+        assert not stdlib.called
+
+    def test_non_finite_floats_fall_back_to_the_stdlib(self):
+        pytest.importorskip("orjson")
+        for value in [math.nan, math.inf, -math.inf]:
+            data = {"a": None, "b": [{"c": value}]}
+            assert orjson_canonical_json(data) == stdlib_canonical_json(data)
+
+    def test_unencodable_values_raise_type_errors(self):
+        pytest.importorskip("orjson")
+        for data in [{"a": {1, 2}}, {"a": object()}, {1: "a", "b": "c"}]:
+            with pytest.raises(TypeError):
+                stdlib_canonical_json(data)
+            with pytest.raises(TypeError):
+                orjson_canonical_json(data)
+
+    def test_backend_setting(self, settings):
+        settings.CANONICAL_JSON_BACKEND = "stdlib"
+        assert get_canonical_json_backend() is stdlib_canonical_json
+        assert canonical_json({"a": 1}) == b'{"a":1}'
+
+    def test_auto_backend_prefers_orjson(self, settings, mocker):
+        settings.CANONICAL_JSON_BACKEND = "auto"
+        mocker.patch.object(utils, "orjson", object())
+        assert get_canonical_json_backend() is orjson_canonical_json
+
+    def test_auto_backend_without_orjson(self, settings, mocker):
+        settings.CANONICAL_JSON_BACKEND = "auto"
+        mocker.patch.object(utils, "orjson", None)
+        assert get_canonical_json_backend() is stdlib_canonical_json
+
+    def test_orjson_backend_must_be_installed(self, settings, mocker):
+        settings.CANONICAL_JSON_BACKEND = "orjson"
+        mocker.patch.object(utils, "orjson", None)
+        with pytest.raises(ImproperlyConfigured):
+            get_canonical_json_backend()
+
+    def test_unknown_backend(self, settings):
+        settings.CANONICAL_JSON_BACKEND = "fast"
+        with pytest.raises(ImproperlyConfigured):
+            get_canonical_json_backend()
+
+
 class TestSRIHash(object):
     def test_it_works(self):
         # Pre-generated base64 hash of the string "foobar"
@@ -0,0 +1,133 @@
+"""
+Lightweight timing spans for code on hot paths.
+
+A span times a block of code. While a request is being traced, the spans
+opened on its thread are collected and, once the response is ready, sent
+as one timing per span name for the view and optionally added to the
+request summary log. Spans opened outside of a trace, such as in
+management commands, are sent to the metrics backend immediately.
+
+When ``TRACING_ENABLED`` is off, :func:`span` returns a shared no-op
+context manager, so spans can be left in code that runs many times per
+request.
+"""
+
+import threading
+import time
+from functools import wraps
+
+import markus
+from django.conf import settings
+
+
+metrics = markus.get_metrics("normandy")
+
+_local = threading.local()
+
+
+def get_current_trace():
+    """Get the trace collecting spans on this thread, if any."""
+    return getattr(_local, "trace", None)
+
+
+class Span(object):
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        duration = (time.perf_counter() - self.start) * 1000.0
+        trace = get_current_trace()
+        if trace is None:
+            metrics.timing(f"span.{self.name}", value=duration)
+        else:
+            trace.add(self.name, duration)
+
+
+class NoopSpan(object):
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+
+_noop_span = NoopSpan()
+
+
+def span(name):
+    """
+    Time a block of code as the span ``name``.
+
+    .. code:: python
+
+        with tracing.span("recipes.revision.filter_expression"):
+            ...
+    """
+    if not settings.TRACING_ENABLED:
+        return _noop_span
+    return Span(name)
+
+
+def traced(name):
+    """Decorator that times every call to a function as the span ``name``."""
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+class Trace(object):
+    """
+    Collects the spans opened on this thread while it is active.
+
+    Spans with the same name are combined, keeping the number of times the
+    span was opened and the total time spent in it. Nested spans are each
+    timed in full, so their times overlap.
+    """
+
+    def __init__(self):
+        self.spans = {}
+        self._previous = None
+
+    def __enter__(self):
+        self._previous = get_current_trace()
+        _local.trace = self
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _local.trace = self._previous
+        self._previous = None
+
+    def add(self, name, duration):
+        totals = self.spans.get(name)
+        if totals is None:
+            self.spans[name] = [1, duration]
+        else:
+            totals[0] += 1
+            totals[1] += duration
+
+    def summary(self):
+        """Get the collected spans in a form suitable for logging."""
+        return {
+            name: {"count": count, "time": round(duration, 3)}
+            for name, (count, duration) in self.spans.items()
+        }
+
+    def send_metrics(self, tags=None):
+        for name, (count, duration) in self.spans.items():
+            metrics.timing(f"span.{name}", value=duration, tags=tags)
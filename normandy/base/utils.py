@@ -1,13 +1,27 @@
 import json
+import math
+import re
 from base64 import b64encode, urlsafe_b64encode
 from datetime import datetime
 from hashlib import sha384
 from urllib.parse import parse_qs, urlencode, urlparse, urlunparse
 
 from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
 from django.db.models import Count
 from django.utils import timezone
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Matches small numbers and numbers written with an exponent, which orjson
+# and the standard library can format differently (``0.00001`` vs ``1e-05``,
+# ``1e-7`` vs ``1e-07``).
+_UNSTABLE_FLOAT_RE = re.compile(rb"(?:^|[:,\[])-?(?:0\.0000|[0-9]+(?:\.[0-9]+)?e)")
+
 
 def aware_datetime(*args, **kwargs):
     """Return an aware datetime using Django's configured timezone."""
@@ -54,8 +68,88 @@ def get_client_ip(request):
             return None
 
 
+def stdlib_canonical_json(data):
+    """Encode ``data`` as canonical JSON bytes using the standard library."""
+    return json.dumps(data, ensure_ascii=True, separators=(",", ":"), sort_keys=True).encode()
+
+
+def _has_non_finite_float(data):
+    """Check whether ``data`` contains NaN or infinity anywhere inside it."""
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, float):
+            if not math.isfinite(value):
+                return True
+        elif isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+    return False
+
+
+def orjson_canonical_json(data):
+    """
+    Encode ``data`` as canonical JSON bytes using orjson.
+
+    The output is identical to :func:`stdlib_canonical_json`. Anything orjson
+    would encode differently (non-ASCII text, NaN and infinity, very small or
+    large floats, integers larger than 64 bits, non-string keys) falls back to
+    the standard library. orjson writes NaN and infinity as ``null``, so when
+    the output contains ``null`` the data is checked for them, and ``None``
+    values alone stay on the fast path.
+    """
+    try:
+        encoded = orjson.dumps(
+            data,
+            option=(
+                orjson.OPT_SORT_KEYS
+                | orjson.OPT_PASSTHROUGH_DATETIME
+                | orjson.OPT_PASSTHROUGH_DATACLASS
+            ),
+        )
+    except TypeError:
+        return stdlib_canonical_json(data)
+
+    if (
+        not encoded.isascii()
+        or b"\x7f" in encoded
+        or _UNSTABLE_FLOAT_RE.search(encoded)
+        # orjson encodes NaN and infinity as null
+        or (b"null" in encoded and _has_non_finite_float(data))
+    ):
+        return stdlib_canonical_json(data)
+    return encoded
+
+
+CANONICAL_JSON_BACKENDS = {"stdlib": stdlib_canonical_json, "orjson": orjson_canonical_json}
+
+
+def get_canonical_json_backend():
+    """
+    Get the function used to encode canonical JSON, as configured by
+    settings.CANONICAL_JSON_BACKEND. ``"auto"`` uses orjson if it is
+    installed, and the standard library otherwise.
+    """
+    name = settings.CANONICAL_JSON_BACKEND
+    if name == "auto":
+        name = "stdlib" if orjson is None else "orjson"
+    elif name == "orjson" and orjson is None:
+        raise ImproperlyConfigured("CANONICAL_JSON_BACKEND is orjson, but it is not installed")
+
+    try:
+        return CANONICAL_JSON_BACKENDS[name]
+    except KeyError:
+        raise ImproperlyConfigured(f"Unknown CANONICAL_JSON_BACKEND {name!r}")
+
+
+def canonical_json(data):
+    """Encode ``data`` as canonical JSON bytes, suitable for signing."""
+    return get_canonical_json_backend()(data)
+
+
 def canonical_json_dumps(data):
-    return json.dumps(data, ensure_ascii=True, separators=(",", ":"), sort_keys=True)
+    return canonical_json(data).decode()
 
 
 def filter_m2m(qs, field, values):
@@ -22,6 +22,17 @@ def api_client():
     return client
 
 
+@pytest.fixture
+def run_on_commit(mocker):
+    """
+    Run ``transaction.on_commit`` callbacks right away. Tests run in a
+    transaction that is rolled back, so they would otherwise never run.
+    """
+    return mocker.patch(
+        "django.db.transaction.on_commit", side_effect=lambda func, using=None: func()
+    )
+
+
 @pytest.fixture
 def gql_client():
     """Fixture to provide a Graphene client."""
@@ -57,7 +57,8 @@ class BaselineCapabilitiesFilter(django_filters.Filter):
                     and recipe.approved_revision.uses_only_baseline_capabilities()
                 ):
                     match_ids.append(recipe.id)
-            return Recipe.objects.filter(id__in=match_ids)
+            # Keep the queryset's related lookups for the serializer
+            return qs.filter(id__in=match_ids)
 
         return qs
 
@@ -0,0 +1,222 @@
+"""
+A fast path for ``/api/v1/classify_client/``.
+
+Every client polls this endpoint and it can't be cached, but all it does is
+look up the client's country. These handlers answer it directly from the
+WSGI environ or ASGI scope, before Django's middleware, URL resolver and
+DRF are involved, with the same body and headers that the full stack would
+produce. Requests that would get a different response from the full stack
+(such as other methods, the browsable API, SSL redirects or disallowed
+hosts) are passed through to the wrapped application unchanged.
+"""
+
+import json
+import time
+from functools import lru_cache
+from types import SimpleNamespace
+from urllib.parse import parse_qs
+
+import markus
+from corsheaders.conf import conf as cors_conf
+from csp.utils import build_policy
+from django.conf import settings
+from django.http.request import split_domain_port, validate_host
+from django.test.signals import setting_changed
+from django.utils import timezone
+from django.utils.http import http_date
+
+from normandy.base.asgi import get_environ
+from normandy.base.utils import get_client_ip
+from normandy.recipes.geolocation import get_country_code
+
+
+CLASSIFY_CLIENT_PATH = "/api/v1/classify_client/"
+CLASSIFY_CLIENT_VIEW_NAME = "normandy.recipes.api.v1.views.ClassifyClient"
+
+#: Media ranges in an Accept header for which DRF would pick the JSON renderer.
+JSON_MEDIA_RANGES = {"*/*", "application/*", "application/json"}
+
+
+metrics = markus.get_metrics("normandy")
+
+
+def _accepts_json(accept):
+    if not accept:
+        return True
+    media_ranges = {media_range.split(";")[0].strip() for media_range in accept.split(",")}
+    return media_ranges <= JSON_MEDIA_RANGES
+
+
+def _is_secure(meta):
+    if settings.SECURE_PROXY_SSL_HEADER:
+        header, value = settings.SECURE_PROXY_SSL_HEADER
+        if meta.get(header) is not None:
+            return meta[header] == value
+    return meta.get("wsgi.url_scheme") == "https"
+
+
+def _is_allowed_host(meta):
+    if settings.USE_X_FORWARDED_HOST and "HTTP_X_FORWARDED_HOST" in meta:
+        host = meta["HTTP_X_FORWARDED_HOST"]
+    else:
+        host = meta.get("HTTP_HOST") or meta.get("SERVER_NAME")
+    if not host:
+        return False
+
+    allowed_hosts = settings.ALLOWED_HOSTS
+    if settings.DEBUG and not allowed_hosts:
+        allowed_hosts = [".localhost", "127.0.0.1", "[::1]"]
+    domain, port = split_domain_port(host)
+    return bool(domain) and validate_host(domain, allowed_hosts)
+
+
+@lru_cache(maxsize=None)
+def _get_static_headers(secure):
+    """
+    Headers that only depend on settings, in the order the full stack adds them.
+    """
+    headers = [
+        ("Content-Type", "application/json"),
+        ("Cache-Control", "max-age=0, no-cache, no-store, must-revalidate"),
+        ("Vary", "Accept, Origin"),
+        ("Allow", "GET, HEAD, OPTIONS"),
+    ]
+
+    csp_excluded_prefixes = tuple(getattr(settings, "CSP_EXCLUDE_URL_PREFIXES", ()))
+    if not CLASSIFY_CLIENT_PATH.startswith(csp_excluded_prefixes):
+        csp_header = "Content-Security-Policy"
+        if getattr(settings, "CSP_REPORT_ONLY", False):
+            csp_header += "-Report-Only"
+        headers.append((csp_header, build_policy()))
+
+    headers.append(("X-Frame-Options", getattr(settings, "X_FRAME_OPTIONS", "SAMEORIGIN").upper()))
+
+    if secure and settings.SECURE_HSTS_SECONDS:
+        sts = f"max-age={settings.SECURE_HSTS_SECONDS}"
+        if settings.SECURE_HSTS_INCLUDE_SUBDOMAINS:
+            sts += "; includeSubDomains"
+        if settings.SECURE_HSTS_PRELOAD:
+            sts += "; preload"
+        headers.append(("Strict-Transport-Security", sts))
+    if settings.SECURE_CONTENT_TYPE_NOSNIFF:
+        headers.append(("X-Content-Type-Options", "nosniff"))
+    if settings.SECURE_BROWSER_XSS_FILTER:
+        headers.append(("X-XSS-Protection", "1; mode=block"))
+
+    return headers
+
+
+def _clear_static_headers(**kwargs):
+    _get_static_headers.cache_clear()
+
+
+setting_changed.connect(_clear_static_headers)
+
+
+@lru_cache(maxsize=512)
+def _encode_country(country):
+    return json.dumps(country).encode()
+
+
+def encode_classification(country, request_time):
+    """Encode a classification as the v1 API's canonical JSON would."""
+    request_time = request_time.isoformat()
+    if request_time.endswith("+00:00"):
+        request_time = request_time[:-6] + "Z"
+    return b'{"country":%s,"request_time":"%s"}' % (
+        _encode_country(country),
+        request_time.encode(),
+    )
+
+
+def get_fast_response(meta):
+    """
+    Respond to a classify client request described by the WSGI-style
+    ``meta``, if it can be answered by the fast path.
+
+    Returns a tuple of the status code, a list of headers and the body, or
+    ``None`` if the request must be handled by the full stack.
+    """
+    if not settings.CLASSIFY_CLIENT_FAST_PATH:
+        return None
+    if meta.get("REQUEST_METHOD") != "GET" or meta.get("PATH_INFO") != CLASSIFY_CLIENT_PATH:
+        return None
+    if "format" in parse_qs(meta.get("QUERY_STRING", "")):
+        return None
+    if not _accepts_json(meta.get("HTTP_ACCEPT")):
+        return None
+
+    secure = _is_secure(meta)
+    if settings.SECURE_SSL_REDIRECT and not secure:
+        return None
+    if not cors_conf.CORS_ORIGIN_ALLOW_ALL or cors_conf.CORS_ALLOW_CREDENTIALS:
+        return None
+    if not _is_allowed_host(meta):
+        return None
+
+    start_time = time.time()
+    request_time = timezone.now()
+    country = get_country_code(get_client_ip(SimpleNamespace(META=meta)))
+    body = encode_classification(country, request_time)
+
+    headers = [
+        ("Expires", http_date()),
+        *_get_static_headers(secure),
+        ("Content-Length", str(len(body))),
+    ]
+    if meta.get("HTTP_ORIGIN"):
+        headers.append(("Access-Control-Allow-Origin", "*"))
+        if cors_conf.CORS_EXPOSE_HEADERS:
+            headers.append(
+                ("Access-Control-Expose-Headers", ", ".join(cors_conf.CORS_EXPOSE_HEADERS))
+            )
+
+    metrics.timing(
+        "response",
+        value=(time.time() - start_time) * 1000.0,
+        tags=["status:200", f"view:{CLASSIFY_CLIENT_VIEW_NAME}", "method:GET"],
+    )
+    return 200, headers, body
+
+
+class ClassifyClientWSGIMiddleware(object):
+    """WSGI middleware that serves classify client requests from the fast path."""
+
+    def __init__(self, application):
+        self.application = application
+
+    def __call__(self, environ, start_response):
+        response = get_fast_response(environ)
+        if response is None:
+            return self.application(environ, start_response)
+
+        status, headers, body = response
+        start_response(f"{status} OK", headers)
+        return [body]
+
+
+class ClassifyClientASGIMiddleware(object):
+    """ASGI middleware that serves classify client requests from the fast path."""
+
+    def __init__(self, application):
+        self.application = application
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            response = get_fast_response(get_environ(scope))
+            if response is not None:
+                status, headers, body = response
+                await send(
+                    {
+                        "type": "http.response.start",
+                        "status": status,
+                        "headers": [
+                            (name.encode("latin-1"), value.encode("latin-1"))
+                            for name, value in headers
+                        ],
+                    }
+                )
+                await send({"type": "http.response.body", "body": body})
+                return
+
+        await self.application(scope, receive, send)
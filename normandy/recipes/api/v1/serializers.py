@@ -1,3 +1,4 @@
+import json
 import urllib.parse as urlparse
 from urllib.parse import urlencode
 
@@ -53,6 +54,9 @@ class SignedActionSerializer(serializers.ModelSerializer):
 
     def get_action(self, action):
         # `action` here is the main object for the serializer.
+        if action.signature and action.signature.data is not None:
+            # Serve what was signed, until a newer signature replaces it
+            return json.loads(action.signature.data)
         return ActionSerializer(action).data
 
 
@@ -157,6 +161,21 @@ class RecipeSerializer(serializers.ModelSerializer):
             "identicon_seed",
             "capabilities",
         ]
+        # Both revisions are read by `to_representation`, which the
+        # declared fields don't reflect.
+        select_related = [
+            "approved_revision__action",
+            "approved_revision__enabled_state",
+            "latest_revision__action",
+        ]
+        prefetch_related = [
+            "approved_revision__channels",
+            "approved_revision__countries",
+            "approved_revision__locales",
+            "latest_revision__channels",
+            "latest_revision__countries",
+            "latest_revision__locales",
+        ]
 
 
 class MinimalRecipeSerializer(RecipeSerializer):
@@ -216,6 +235,9 @@ class RecipeRevisionSerializer(serializers.ModelSerializer):
     class Meta:
         model = RecipeRevision
         fields = ["id", "date_created", "recipe", "comment", "approval_request"]
+        # `serializable_recipe` renders the recipe using this revision's data
+        select_related = ["action", "enabled_state", "recipe"]
+        prefetch_related = ["channels", "countries", "locales"]
 
 
 class ClientSerializer(serializers.Serializer):
@@ -225,12 +247,18 @@ class ClientSerializer(serializers.Serializer):
 
 class SignedRecipeSerializer(serializers.ModelSerializer):
     signature = SignatureSerializer()
-    recipe = serializers.SerializerMethodField()
+    # `recipe` here is the main object for the serializer.
+    recipe = MinimalRecipeSerializer(source="*", read_only=True)
 
     class Meta:
         model = Recipe
         fields = ["signature", "recipe"]
 
-    def get_recipe(self, recipe):
-        # `recipe` here is the main object for the serializer.
-        return MinimalRecipeSerializer(recipe).data
+    def to_representation(self, recipe):
+        if recipe.signature is None or recipe.signature.data is None:
+            return super().to_representation(recipe)
+        # Serve what was signed, until a newer signature replaces it
+        return {
+            "signature": self.fields["signature"].to_representation(recipe.signature),
+            "recipe": json.loads(recipe.signature.data),
+        }
@@ -1,6 +1,11 @@
+from functools import lru_cache
+
 from django.conf import settings
+from django.core.cache import cache
 from django.db import transaction
 from django.db.models import Q
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
 from django.views.decorators.cache import never_cache
 
 import django_filters
@@ -11,7 +16,9 @@ from rest_framework.response import Response
 
 from normandy.base.api.mixins import CachingViewsetMixin
 from normandy.base.api.permissions import AdminEnabledOrReadOnly
+from normandy.base.api.query_planning import plan_queryset
 from normandy.base.api.renderers import JavaScriptRenderer
+from normandy.base.compression import choose_encoding, compress_variants
 from normandy.base.decorators import api_cache_control
 from normandy.recipes.models import Action, ApprovalRequest, Client, Recipe, RecipeRevision
 from normandy.recipes.api.filters import (
@@ -44,14 +51,45 @@ class ActionViewSet(CachingViewsetMixin, viewsets.ReadOnlyModelViewSet):
     @api_cache_control()
     def signed(self, request, pk=None):
         actions = self.filter_queryset(self.get_queryset()).exclude(signature=None)
+        actions = plan_queryset(actions, SignedActionSerializer)
         serializer = SignedActionSerializer(actions, many=True)
         return Response(serializer.data)
 
 
+@lru_cache(maxsize=32)
+def get_implementation_variants(name, impl_hash):
+    """
+    Get the encoded implementation of an action, along with pre-compressed
+    variants of it, from the local or shared cache if possible.
+
+    Implementations never change for a given hash, so the result is cached
+    indefinitely, even once the action has a new implementation. Callers
+    must check that ``impl_hash`` is still the action's current hash. Raises
+    ``Action.DoesNotExist`` if no action with the given name has an
+    implementation with the given hash.
+    """
+    cache_key = f"action-implementation:{name}:{impl_hash}"
+    variants = cache.get(cache_key)
+    if variants is None:
+        implementation = (
+            Action.objects.filter(name=name, implementation_hash=impl_hash)
+            .values_list("implementation", flat=True)
+            .first()
+        )
+        if implementation is None:
+            raise Action.DoesNotExist()
+        variants = compress_variants(implementation.encode(JavaScriptRenderer.charset))
+        cache.set(cache_key, variants, None)
+    return variants
+
+
 class ActionImplementationView(generics.RetrieveAPIView):
     """
     Retrieves the implementation code for an action. Raises a 404 if the
     given hash doesn't match the hash we've stored.
+
+    The response is compressed according to the Accept-Encoding header,
+    using variants that are compressed once and then cached.
     """
 
     queryset = Action.objects.all()
@@ -63,11 +101,26 @@ class ActionImplementationView(generics.RetrieveAPIView):
 
     @api_cache_control(max_age=settings.IMMUTABLE_CACHE_TIME)
     def retrieve(self, request, name, impl_hash):
-        action = self.get_object()
-        if impl_hash != action.implementation_hash:
+        try:
+            # Cached variants may be for an implementation that has since
+            # been replaced, so check the hash is still current first.
+            if not Action.objects.filter(name=name, implementation_hash=impl_hash).exists():
+                raise Action.DoesNotExist()
+            variants = get_implementation_variants(name, impl_hash)
+        except Action.DoesNotExist:
+            # Raise the usual 404 if there is no such action at all
+            self.get_object()
             raise NotFound("Hash does not match current stored action.")
 
-        return Response(action.implementation)
+        encoding = choose_encoding(request.META.get("HTTP_ACCEPT_ENCODING"), variants)
+        response = HttpResponse(
+            variants[encoding],
+            content_type=f"{JavaScriptRenderer.media_type}; charset={JavaScriptRenderer.charset}",
+        )
+        if encoding != "identity":
+            response["Content-Encoding"] = encoding
+        patch_vary_headers(response, ["Accept-Encoding"])
+        return response
 
 
 class RecipeFilters(django_filters.FilterSet):
@@ -90,17 +143,7 @@ class SignedRecipeFilters(RecipeFilters):
 class RecipeViewSet(CachingViewsetMixin, viewsets.ReadOnlyModelViewSet):
     """Viewset for viewing and uploading recipes."""
 
-    queryset = (
-        Recipe.objects.all()
-        # Foreign keys
-        .select_related("latest_revision")
-        .select_related("latest_revision__action")
-        .select_related("latest_revision__approval_request")
-        # Many-to-many
-        .prefetch_related("latest_revision__channels")
-        .prefetch_related("latest_revision__countries")
-        .prefetch_related("latest_revision__locales")
-    )
+    queryset = plan_queryset(Recipe.objects.all(), RecipeSerializer)
     serializer_class = RecipeSerializer
     filterset_class = RecipeFilters
     permission_classes = [permissions.DjangoModelPermissionsOrAnonReadOnly, AdminEnabledOrReadOnly]
@@ -137,6 +180,7 @@ class RecipeViewSet(CachingViewsetMixin, viewsets.ReadOnlyModelViewSet):
     @api_cache_control()
     def signed(self, request, pk=None):
         recipes = self.filter_queryset(self.get_queryset()).exclude(signature=None)
+        recipes = plan_queryset(recipes, SignedRecipeSerializer)
         serializer = SignedRecipeSerializer(recipes, many=True)
         return Response(serializer.data)
 
@@ -144,30 +188,20 @@ class RecipeViewSet(CachingViewsetMixin, viewsets.ReadOnlyModelViewSet):
     @api_cache_control()
     def history(self, request, pk=None):
         recipe = self.get_object()
-        serializer = RecipeRevisionSerializer(
-            recipe.revisions.all(), many=True, context={"request": request}
-        )
+        revisions = plan_queryset(recipe.revisions.all(), RecipeRevisionSerializer)
+        serializer = RecipeRevisionSerializer(revisions, many=True, context={"request": request})
         return Response(serializer.data)
 
 
 class RecipeRevisionViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = (
-        RecipeRevision.objects.all()
-        .select_related("action")
-        .select_related("approval_request")
-        .select_related("recipe")
-        # Many-to-many
-        .prefetch_related("channels")
-        .prefetch_related("countries")
-        .prefetch_related("locales")
-    )
+    queryset = plan_queryset(RecipeRevision.objects.all(), RecipeRevisionSerializer)
     serializer_class = RecipeRevisionSerializer
     permission_classes = [AdminEnabledOrReadOnly, permissions.DjangoModelPermissionsOrAnonReadOnly]
     pagination_class = None
 
 
 class ApprovalRequestViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = ApprovalRequest.objects.all()
+    queryset = plan_queryset(ApprovalRequest.objects.all(), ApprovalRequestSerializer)
     serializer_class = ApprovalRequestSerializer
     permission_classes = [AdminEnabledOrReadOnly, permissions.DjangoModelPermissionsOrAnonReadOnly]
     pagination_class = None
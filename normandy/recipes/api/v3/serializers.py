@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from factory.fuzzy import FuzzyText
 
+from normandy.base import tracing
 from normandy.base.api.v3.serializers import UserSerializer
 from normandy.base.jexl import get_normandy_jexl
 from normandy.recipes import filters
@@ -9,6 +10,7 @@ from normandy.recipes.models import (
     Action,
     ApprovalRequest,
     EnabledState,
+    Job,
     Recipe,
     RecipeRevision,
     Signature,
@@ -37,20 +39,28 @@ class ActionSerializer(serializers.ModelSerializer):
         fields = ["arguments_schema", "name", "id", "implementation_url"]
 
 
+class RecipeLinkSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Recipe
+        fields = ["approved_revision_id", "id", "latest_revision_id"]
+
+
+class RecipeRevisionLinkSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = RecipeRevision
+        fields = ["id", "recipe_id"]
+
+
 class ApprovalRequestSerializer(serializers.ModelSerializer):
     approver = UserSerializer()
     created = serializers.DateTimeField(read_only=True)
     creator = UserSerializer()
-    revision = serializers.SerializerMethodField(read_only=True)
+    revision = RecipeRevisionLinkSerializer(read_only=True)
 
     class Meta:
         model = ApprovalRequest
         fields = ["approved", "approver", "comment", "created", "creator", "id", "revision"]
 
-    def get_revision(self, instance):
-        serializer = RecipeRevisionLinkSerializer(instance.revision)
-        return serializer.data
-
 
 class EnabledStateSerializer(CustomizableSerializerMixin, serializers.ModelSerializer):
     creator = UserSerializer()
@@ -60,8 +70,27 @@ class EnabledStateSerializer(CustomizableSerializerMixin, serializers.ModelSeria
         fields = ["id", "revision_id", "created", "creator", "enabled", "carryover_from"]
 
 
+class JobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Job
+        fields = [
+            "id",
+            "kind",
+            "status",
+            "recipe_id",
+            "action_id",
+            "extension_id",
+            "attempts",
+            "last_error",
+            "created",
+            "run_after",
+            "started",
+            "finished",
+        ]
+
+
 class RecipeRevisionSerializer(serializers.ModelSerializer):
-    action = serializers.SerializerMethodField(read_only=True)
+    action = ActionSerializer(read_only=True)
     approval_request = ApprovalRequestSerializer(read_only=True)
     capabilities = serializers.ListField(read_only=True)
     comment = serializers.CharField(required=False)
@@ -69,7 +98,7 @@ class RecipeRevisionSerializer(serializers.ModelSerializer):
     date_created = serializers.DateTimeField(source="created", read_only=True)
     enabled_states = EnabledStateSerializer(many=True, exclude_fields=["revision_id"])
     filter_object = serializers.ListField(child=FilterObjectField())
-    recipe = serializers.SerializerMethodField(read_only=True)
+    recipe = RecipeLinkSerializer(read_only=True)
 
     class Meta:
         model = RecipeRevision
@@ -94,16 +123,9 @@ class RecipeRevisionSerializer(serializers.ModelSerializer):
             "recipe",
             "updated",
         ]
-
-    def get_recipe(self, instance):
-        serializer = RecipeLinkSerializer(instance.recipe)
-        return serializer.data
-
-    def get_action(self, instance):
-        serializer = ActionSerializer(
-            instance.action, read_only=True, context={"request": self.context.get("request")}
-        )
-        return serializer.data
+        # Used by `enabled`, and by `filter_expression` respectively
+        select_related = ["enabled_state"]
+        prefetch_related = ["channels", "countries", "locales"]
 
 
 class SignatureSerializer(serializers.ModelSerializer):
@@ -197,7 +219,8 @@ class RecipeSerializer(CustomizableSerializerMixin, serializers.ModelSerializer)
         if value:
             jexl = get_normandy_jexl()
 
-            errors = list(jexl.validate(value))
+            with tracing.span("recipes.filters.validate_jexl"):
+                errors = list(jexl.validate(value))
             if errors:
                 raise serializers.ValidationError(errors)
 
@@ -297,18 +320,3 @@ class RecipeSerializer(CustomizableSerializerMixin, serializers.ModelSerializer)
             raise serializers.ValidationError(errors)
 
         return value
-
-
-class RecipeLinkSerializer(RecipeSerializer):
-    class Meta(RecipeSerializer.Meta):
-        fields = ["approved_revision_id", "id", "latest_revision_id"]
-
-
-class RecipeRevisionLinkSerializer(RecipeRevisionSerializer):
-    recipe_id = serializers.SerializerMethodField(read_only=True)
-
-    class Meta(RecipeSerializer.Meta):
-        fields = ["id", "recipe_id"]
-
-    def get_recipe_id(self, instance):
-        return instance.recipe.id
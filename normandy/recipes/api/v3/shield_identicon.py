@@ -1,6 +1,79 @@
+import hashlib
 import random
+from functools import lru_cache
 
-from django.template.loader import render_to_string
+from django.conf import settings
+from django.core.cache import cache
+
+
+#: Number of rendered identicons to keep in each process.
+IDENTICON_CACHE_SIZE = 2048
+
+# Pieces of the identicon SVG. Identicons are immutable, so the output must
+# stay byte-for-byte identical to what was served before, when this was
+# rendered from a Django template. That is what the blank, indented lines
+# are left over from.
+SVG_START = """\
+<?xml version="1.0" encoding="utf-8"?>
+<!DOCTYPE svg PUBLIC "-//W3C//DTD SVG 1.1//EN" "http://www.w3.org/Graphics/SVG/1.1/DTD/svg11.dtd">
+<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 100 105" width="200" height="200">
+    <g filter="url(#shadow)">
+        <defs>
+            <filter id="shadow">
+                <feDropShadow dx="0" dy="4" flood-opacity="0.2" stdDeviation="2" />
+            </filter>
+            <clipPath id="shield-border" transform="scale(100)">
+                <path d="M 0.5 0.0
+                         C 0.6 0.1, 0.7 0.15, 0.9 0.15
+                         C 0.9 0.5, 0.9 0.8, 0.5 1.0
+                         C 0.1 0.8, 0.1 0.5, 0.1 0.15
+                         C 0.3 0.15, 0.4 0.1, 0.5 0.0"/>
+            </clipPath>
+        </defs>
+        <g clip-path="url(#shield-border)">
+            <rect fill="{field_color}" width="100" height="100"/>
+            """
+
+SVG_TWO_COLOR = """
+                <g transform="{transform}">
+                    <rect fill="{pattern_color}" x="-0.25" y="-0.25" width="1.5" height="0.75" />
+                </g>
+            """
+
+SVG_STRIPES_START = """
+                <g transform="{transform}">
+                """
+
+SVG_STRIPE = """
+                    <rect
+                        x="{stripe_x}"
+                        y="-0.25"
+                        width="{stride}"
+                        height="1.5"
+                        fill="{pattern_color}"
+                    />,
+                """
+
+SVG_STRIPES_END = """
+                </g>
+            """
+
+SVG_END = """
+            <text
+                fill="#fff"
+                font-family="serif"
+                font-size="48"
+                font-weight="bold"
+                text-anchor="middle"
+                x="50"
+                y="72"
+            >
+                {emoji}
+            </text>
+        </g>
+    </g>
+</svg>
+"""
 
 
 class Color:
@@ -171,4 +244,40 @@ def generate_svg(genome):
     }
     context.update(treatment_context(genome))
 
-    return render_to_string("identicon.svg", context)
+    return render_svg(context)
+
+
+def render_svg(context):
+    """
+    Build the SVG for an identicon from the choices made by the treatments.
+
+    None of the values need escaping, since they all come from the fixed
+    lists of colors and emoji, or are numbers.
+    """
+    parts = [SVG_START.format(**context)]
+    if context["treatment"] == "TwoColor":
+        parts.append(SVG_TWO_COLOR.format(**context))
+    elif context["treatment"] == "Stripes":
+        parts.append(SVG_STRIPES_START.format(**context))
+        for stripe_x in context["stripe_x_list"]:
+            parts.append(SVG_STRIPE.format(stripe_x=stripe_x, **context))
+        parts.append(SVG_STRIPES_END)
+    parts.append(SVG_END.format(**context))
+    return "".join(parts)
+
+
+@lru_cache(maxsize=IDENTICON_CACHE_SIZE)
+def get_identicon_svg(seed):
+    """
+    Render the v1 identicon for ``seed``, as SVG bytes.
+
+    Identicons never change, so rendered ones are kept in the shared cache,
+    as well as in a per-process LRU.
+    """
+    # Seeds can contain characters that aren't allowed in cache keys
+    cache_key = f"identicon::v1::{hashlib.sha256(seed.encode()).hexdigest()}"
+    svg = cache.get(cache_key)
+    if svg is None:
+        svg = generate_svg(Genome(seed)).encode()
+        cache.set(cache_key, svg, settings.IMMUTABLE_CACHE_TIME)
+    return svg
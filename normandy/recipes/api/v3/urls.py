@@ -12,6 +12,7 @@ router.register("action", views.ActionViewSet)
 router.register("recipe", views.RecipeViewSet)
 router.register("recipe_revision", views.RecipeRevisionViewSet)
 router.register("approval_request", views.ApprovalRequestViewSet)
+router.register("job", views.JobViewSet)
 router.register_view("filters", views.Filters, name="filters")
 
 urlpatterns = [
@@ -21,4 +22,9 @@ urlpatterns = [
         views.IdenticonView.as_view(),
         name="identicon",
     ),
+    url(
+        r"^identicon/(?P<generation>v[0-9])/$",
+        views.IdenticonBatchView.as_view(),
+        name="identicon-batch",
+    ),
 ]
@@ -15,6 +15,7 @@ from normandy.base.api import UpdateOrCreateModelViewSet
 from normandy.base.api.filters import AliasedOrderingFilter
 from normandy.base.api.mixins import CachingViewsetMixin
 from normandy.base.api.permissions import AdminEnabledOrReadOnly
+from normandy.base.api.query_planning import plan_queryset
 from normandy.base.decorators import api_cache_control
 from normandy.recipes.models import (
     Action,
@@ -22,6 +23,7 @@ from normandy.recipes.models import (
     EnabledState,
     Channel,
     Country,
+    Job,
     Locale,
     Recipe,
     RecipeRevision,
@@ -37,6 +39,7 @@ from normandy.recipes.api.v3 import shield_identicon
 from normandy.recipes.api.v3.serializers import (
     ActionSerializer,
     ApprovalRequestSerializer,
+    JobSerializer,
     RecipeRevisionSerializer,
     RecipeSerializer,
 )
@@ -75,33 +78,7 @@ class RecipeOrderingFilter(AliasedOrderingFilter):
 class RecipeViewSet(CachingViewsetMixin, UpdateOrCreateModelViewSet):
     """Viewset for viewing and uploading recipes."""
 
-    queryset = (
-        Recipe.objects.all()
-        .select_related(
-            "approved_revision__action",
-            "approved_revision__user",
-            "approved_revision__approval_request",
-            "approved_revision__approval_request__creator",
-            "approved_revision__approval_request__approver",
-            "latest_revision__action",
-            "latest_revision__user",
-            "latest_revision__approval_request",
-            "latest_revision__approval_request__creator",
-            "latest_revision__approval_request__approver",
-        )
-        .prefetch_related(
-            "approved_revision__channels",
-            "approved_revision__countries",
-            "approved_revision__enabled_states",
-            "approved_revision__enabled_states__creator",
-            "approved_revision__locales",
-            "latest_revision__channels",
-            "latest_revision__countries",
-            "latest_revision__enabled_states",
-            "latest_revision__enabled_states__creator",
-            "latest_revision__locales",
-        )
-    )
+    queryset = plan_queryset(Recipe.objects.all(), RecipeSerializer)
     serializer_class = RecipeSerializer
     filterset_class = RecipeFilters
     filter_backends = [django_filters.rest_framework.DjangoFilterBackend, RecipeOrderingFilter]
@@ -144,9 +121,8 @@ class RecipeViewSet(CachingViewsetMixin, UpdateOrCreateModelViewSet):
     @api_cache_control()
     def history(self, request, pk=None):
         recipe = self.get_object()
-        serializer = RecipeRevisionSerializer(
-            recipe.revisions.all(), many=True, context={"request": request}
-        )
+        revisions = plan_queryset(recipe.revisions.all(), RecipeRevisionSerializer)
+        serializer = RecipeRevisionSerializer(revisions, many=True, context={"request": request})
         return Response(serializer.data)
 
     @action(detail=True, methods=["POST"])
@@ -181,11 +157,7 @@ class RecipeViewSet(CachingViewsetMixin, UpdateOrCreateModelViewSet):
 
 
 class RecipeRevisionViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = (
-        RecipeRevision.objects.all()
-        .select_related("action", "approval_request", "recipe")
-        .prefetch_related("enabled_states", "channels", "countries", "locales")
-    )
+    queryset = plan_queryset(RecipeRevision.objects.all(), RecipeRevisionSerializer)
     serializer_class = RecipeRevisionSerializer
     permission_classes = [AdminEnabledOrReadOnly, permissions.DjangoModelPermissionsOrAnonReadOnly]
 
@@ -215,11 +187,7 @@ class ApprovalRequestFilters(django_filters.FilterSet):
 
 
 class ApprovalRequestViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = (
-        ApprovalRequest.objects.all()
-        # prefetch?
-        .select_related("revision", "revision__recipe",)
-    )
+    queryset = plan_queryset(ApprovalRequest.objects.all(), ApprovalRequestSerializer)
     serializer_class = ApprovalRequestSerializer
     permission_classes = [AdminEnabledOrReadOnly, permissions.DjangoModelPermissionsOrAnonReadOnly]
     filterset_class = ApprovalRequestFilters
@@ -245,6 +213,11 @@ class ApprovalRequestViewSet(viewsets.ReadOnlyModelViewSet):
                 {"error": "You cannot approve your own approval request."},
                 status=status.HTTP_403_FORBIDDEN,
             )
+        except ApprovalRequest.ExtensionsNotReady:
+            return Response(
+                {"error": "All extensions used by this revision must be valid before approval."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
         return Response(ApprovalRequestSerializer(approval_request).data)
 
@@ -279,6 +252,20 @@ class ApprovalRequestViewSet(viewsets.ReadOnlyModelViewSet):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
+class JobViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Viewset for checking on background jobs.
+
+    Jobs record the errors returned by Autograph and Remote Settings, so
+    they are only visible to signed in users.
+    """
+
+    queryset = Job.objects.order_by("-id")
+    serializer_class = JobSerializer
+    permission_classes = [AdminEnabledOrReadOnly, permissions.DjangoModelPermissions]
+    filterset_fields = ["kind", "status", "recipe", "action", "extension"]
+
+
 class Filters(views.APIView):
     authentication_classes = []
     permission_classes = []
@@ -297,15 +284,44 @@ class Filters(views.APIView):
         )
 
 
+def invalid_identicon_generation():
+    return Response(
+        {"error": "Invalid identicon generation, only v1 is supported."},
+        status=status.HTTP_400_BAD_REQUEST,
+    )
+
+
 class IdenticonView(views.APIView):
     @api_cache_control(max_age=settings.IMMUTABLE_CACHE_TIME, immutable=True)
     def get(self, request, *, generation, seed):
         if generation != "v1":
-            return Response(
-                {"error": "Invalid identicon generation, only v1 is supported."},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
+            return invalid_identicon_generation()
 
-        genome = shield_identicon.Genome(seed)
-        identicon_svg = shield_identicon.generate_svg(genome)
+        identicon_svg = shield_identicon.get_identicon_svg(seed)
         return HttpResponse(identicon_svg, content_type="image/svg+xml")
+
+
+class IdenticonBatchView(views.APIView):
+    """
+    Render several identicons in one request, given as repeated ``seed``
+    query parameters. Returns an object mapping each seed to its SVG.
+    """
+
+    max_seeds = 100
+
+    @api_cache_control(max_age=settings.IMMUTABLE_CACHE_TIME, immutable=True)
+    def get(self, request, *, generation):
+        if generation != "v1":
+            return invalid_identicon_generation()
+
+        seeds = request.query_params.getlist("seed")
+        if not seeds:
+            raise ParseError("At least one seed is required.")
+        if len(seeds) > self.max_seeds:
+            raise ParseError(f"At most {self.max_seeds} seeds can be requested at once.")
+        if not all(1 <= len(seed) <= 64 for seed in seeds):
+            raise ParseError("Seeds must be between 1 and 64 characters long.")
+
+        return Response(
+            {seed: shield_identicon.get_identicon_svg(seed).decode() for seed in seeds}
+        )
@@ -1,4 +1,5 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 from normandy.recipes import checks
 from normandy.recipes.geolocation import load_geoip_database
@@ -12,5 +13,6 @@ class RecipesApp(AppConfig):
 
     def ready(self):
         checks.register()
-        RemoteSettings().check_config()
-        load_geoip_database()
+        if not settings.DEFER_STARTUP_CHECKS:
+            RemoteSettings().check_config()
+            load_geoip_database()
@@ -0,0 +1,210 @@
+"""
+Benchmarks for the paths that need to be fast.
+
+:func:`generate_recipes` creates a reproducible set of synthetic recipes,
+and :func:`run_benchmarks` times the hot paths against them in process,
+through the full middleware stack. Results are plain JSON so that they can
+be saved and compared between commits with :func:`compare_results`.
+"""
+
+import base64
+import hashlib
+import platform
+import random
+import statistics
+import time
+
+import fastecdsa.curve
+import fastecdsa.ecdsa
+import fastecdsa.keys
+from django.db.models import Max
+from django.test import Client
+from django.utils import timezone
+
+from normandy.recipes import checks
+from normandy.recipes.api.v3 import shield_identicon
+from normandy.recipes.load_data import PREFIX, generate_load_data
+from normandy.recipes.models import Recipe, Signature
+
+
+#: Paths hit by self repair and clients that need to be very fast. Keep this
+#: in sync with ``contract-tests/v1_api/test_performance.py``.
+HOT_PATHS = [
+    "/en-US/repair",
+    "/en-US/repair/",
+    "/api/v1/recipe/?enabled=1",
+    "/api/v1/recipe/signed/?enabled=1",
+    "/api/v1/action/",
+]
+
+#: Other API paths that are benchmarked along with the hot paths.
+API_PATHS = [
+    "/api/v3/recipe/",
+    f"/api/v3/recipe/?text={PREFIX}",
+    "/api/v3/recipe/?enabled=true&ordering=-last_updated",
+    "/api/v3/capabilities/",
+]
+
+#: Number of identicons rendered in each round of the identicon benchmark.
+IDENTICON_COUNT = 100
+
+#: DER prefix of a SubjectPublicKeyInfo for an uncompressed P-384 point.
+P384_PUBLIC_KEY_PREFIX = bytes.fromhex("3076301006072a8648ce3d020106052b81040022036200")
+
+
+def summarize(durations):
+    """Summarize a list of durations, in seconds, as milliseconds."""
+    durations = sorted(durations)
+
+    def percentile(p):
+        return durations[min(len(durations) - 1, int(len(durations) * p))] * 1000
+
+    return {
+        "rounds": len(durations),
+        "min": durations[0] * 1000,
+        "median": statistics.median(durations) * 1000,
+        "mean": statistics.mean(durations) * 1000,
+        "p95": percentile(0.95),
+        "p99": percentile(0.99),
+        "max": durations[-1] * 1000,
+    }
+
+
+def measure(func, rounds, warmup=1):
+    """Call ``func`` repeatedly and summarize how long each call took."""
+    for _ in range(warmup):
+        func()
+
+    durations = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return summarize(durations)
+
+
+def make_signature(data, private_key):
+    """Sign ``data`` as Autograph would, with a local P-384 key."""
+    r, s = fastecdsa.ecdsa.sign(
+        b"Content-Signature:\x00" + data,
+        private_key,
+        curve=fastecdsa.curve.P384,
+        hashfunc=hashlib.sha384,
+    )
+    public_key = fastecdsa.keys.get_public_key(private_key, fastecdsa.curve.P384)
+    public_key_der = (
+        P384_PUBLIC_KEY_PREFIX
+        + b"\x04"
+        + public_key.x.to_bytes(48, "big")
+        + public_key.y.to_bytes(48, "big")
+    )
+    return Signature.for_data(
+        data,
+        {
+            "signature": base64.urlsafe_b64encode(
+                r.to_bytes(48, "big") + s.to_bytes(48, "big")
+            ).decode(),
+            "public_key": base64.b64encode(public_key_der).decode(),
+            "x5u": None,
+            "timestamp": timezone.now(),
+        },
+    )
+
+
+def generate_recipes(count, seed=0, revisions=3):
+    """
+    Create ``count`` synthetic recipes with :func:`generate_load_data`, each
+    with a history of up to ``revisions`` revisions, and sign the enabled
+    ones with a local key. Returns the new recipes.
+    """
+    rng = random.Random(seed)
+    private_key = rng.randrange(1, fastecdsa.curve.P384.q)
+
+    last_id = Recipe.objects.aggregate(Max("id"))["id__max"] or 0
+    generate_load_data(
+        recipes=count, revisions=revisions, extensions=max(1, count // 10), seed=seed
+    )
+    recipes = list(Recipe.objects.filter(id__gt=last_id).order_by("id"))
+
+    for recipe in recipes:
+        if recipe.approved_revision and recipe.approved_revision.enabled:
+            signature = make_signature(recipe.canonical_json(), private_key)
+            signature.save()
+            recipe.signature = signature
+            recipe.save()
+
+    return recipes
+
+
+def get_benchmarks(host="testserver"):
+    """Get a dictionary of benchmark names to functions to time."""
+    client = Client(HTTP_HOST=host)
+
+    def get(path):
+        def request():
+            response = client.get(path, secure=True)
+            if response.status_code != 200:
+                raise AssertionError(f"GET {path} returned {response.status_code}")
+
+        return request
+
+    def canonical_json():
+        for recipe in Recipe.objects.all():
+            recipe.canonical_json()
+
+    def signature_checks():
+        errors = checks.recipe_signatures_are_correct(None)
+        if errors:
+            raise AssertionError(errors[0].msg)
+
+    def identicons():
+        # Render directly, since the view would serve them from the cache
+        for i in range(IDENTICON_COUNT):
+            shield_identicon.generate_svg(shield_identicon.Genome(f"{PREFIX}-{i}"))
+
+    benchmarks = {f"GET {path}": get(path) for path in HOT_PATHS + API_PATHS}
+    benchmarks["Recipe.canonical_json"] = canonical_json
+    benchmarks["shield_identicon.generate_svg"] = identicons
+    benchmarks["recipe_signatures_are_correct"] = signature_checks
+    return benchmarks
+
+
+def run_benchmarks(rounds=20, host="testserver", only=None):
+    """
+    Time each benchmark, and return the results as a JSON-serializable dict.
+
+    A benchmark that fails is reported with its error instead of timings.
+    """
+    results = {}
+    for name, func in get_benchmarks(host).items():
+        if only and not any(pattern in name for pattern in only):
+            continue
+        try:
+            results[name] = measure(func, rounds)
+        except Exception as exc:
+            results[name] = {"error": f"{type(exc).__name__}: {exc}"}
+
+    return {
+        "created": timezone.now().isoformat(),
+        "python": platform.python_version(),
+        "recipes": Recipe.objects.count(),
+        "benchmarks": results,
+    }
+
+
+def compare_results(baseline, current):
+    """
+    Compare the median timings of two sets of results.
+
+    Returns a list of ``(name, baseline_median, current_median, change)``
+    tuples, where ``change`` is the relative change from the baseline, for
+    the benchmarks that succeeded in both.
+    """
+    comparison = []
+    for name, result in current["benchmarks"].items():
+        before = baseline["benchmarks"].get(name, {})
+        if "median" not in result or "median" not in before:
+            continue
+        change = (result["median"] - before["median"]) / before["median"]
+        comparison.append((name, before["median"], result["median"], change))
+    return comparison
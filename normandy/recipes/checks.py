@@ -7,9 +7,11 @@ from django.core.checks import Error, Info, Warning, register as register_check
 from django.core.exceptions import ImproperlyConfigured
 from django.db.utils import OperationalError, ProgrammingError
 
+import kinto_http
 import requests.exceptions
 
 from normandy.recipes import signing, geolocation
+from normandy.recipes.exports import RemoteSettings
 
 
 INFO_COULD_NOT_RETRIEVE_ACTIONS = "normandy.recipes.I001"
@@ -23,6 +25,10 @@ ERROR_INVALID_ACTION_SIGNATURE = "normandy.recipes.E004"
 ERROR_COULD_NOT_VERIFY_CERTIFICATE = "normandy.recipes.E005"
 ERROR_GEOIP_DB_NOT_AVAILABLE = "normandy.recipes.E006"
 ERROR_GEOIP_DB_UNEXPECTED_RESULT = "normandy.recipes.E007"
+ERROR_RECIPE_CHANGED_SINCE_SIGNING = "normandy.recipes.E008"
+ERROR_ACTION_CHANGED_SINCE_SIGNING = "normandy.recipes.E009"
+ERROR_REMOTE_SETTINGS_MISCONFIGURED = "normandy.recipes.E010"
+ERROR_REMOTE_SETTINGS_UNAVAILABLE = "normandy.recipes.E011"
 
 
 def actions_have_consistent_hashes(app_configs, **kwargs):
@@ -56,6 +62,14 @@ def recipe_signatures_are_correct(app_configs, **kwargs):
     try:
         for recipe in signed_recipes:
             data = recipe.canonical_json()
+            if not recipe.signature.matches_data(data):
+                msg = (
+                    f"Recipe '{recipe}' (id={recipe.id}) has changed since it was signed: the "
+                    f"signed data had sha384 {recipe.signature.data_sha384}, but it is now "
+                    f"{recipe.signature.hash_data(data)}"
+                )
+                errors.append(Error(msg, id=ERROR_RECIPE_CHANGED_SINCE_SIGNING))
+                continue
             signature = recipe.signature.signature
             pubkey = recipe.signature.public_key
             x5u = recipe.signature.x5u
@@ -97,6 +111,14 @@ def action_signatures_are_correct(app_configs, **kwargs):
     try:
         for action in signed_actions:
             data = action.canonical_json()
+            if not action.signature.matches_data(data):
+                msg = (
+                    f"Action '{action}' (id={action.id}) has changed since it was signed: the "
+                    f"signed data had sha384 {action.signature.data_sha384}, but it is now "
+                    f"{action.signature.hash_data(data)}"
+                )
+                errors.append(Error(msg, id=ERROR_ACTION_CHANGED_SINCE_SIGNING))
+                continue
             signature = action.signature.signature
             pubkey = action.signature.public_key
             x5u = action.signature.x5u
@@ -187,9 +209,29 @@ def geoip_db_is_available(app_configs, **kwargs):
     return errors
 
 
+def remote_settings_are_configured(app_configs, **kwargs):
+    errors = []
+    try:
+        RemoteSettings().check_config()
+    except ImproperlyConfigured as exc:
+        msg = f"Remote Settings is misconfigured: {exc}"
+        errors.append(Error(msg, id=ERROR_REMOTE_SETTINGS_MISCONFIGURED))
+    except (kinto_http.KintoException, requests.RequestException) as exc:
+        msg = f"Remote Settings could not be checked due to a network error: {exc}"
+        errors.append(Error(msg, id=ERROR_REMOTE_SETTINGS_UNAVAILABLE))
+
+    return errors
+
+
 def register():
     register_check(actions_have_consistent_hashes)
     register_check(recipe_signatures_are_correct)
     register_check(action_signatures_are_correct)
-    register_check(signatures_use_good_certificates)
-    register_check(geoip_db_is_available)
+
+    # Checks that make network requests or load the GeoIP database are only
+    # run by `check --deploy` when startup checks are deferred, so that other
+    # management commands don't depend on them.
+    deferred = settings.DEFER_STARTUP_CHECKS
+    register_check(signatures_use_good_certificates, deploy=deferred)
+    register_check(geoip_db_is_available, deploy=deferred)
+    register_check(remote_settings_are_configured, deploy=True)
@@ -3,6 +3,8 @@ import logging
 import kinto_http
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
+
+from normandy.base import tracing
 from normandy.base.utils import ScopedSettings
 
 
@@ -157,6 +159,7 @@ class RemoteSettings:
         )
         return capabilities_records
 
+    @tracing.traced("recipes.remote_settings.publish")
     def publish(self, recipe, approve_changes=True):
         """
         Publish the specified `recipe` on the remote server by upserting a record.
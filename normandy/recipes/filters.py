@@ -25,6 +25,7 @@ from datetime import datetime
 
 from rest_framework import serializers
 
+from normandy.base import tracing
 from normandy.base.jexl import get_normandy_jexl
 
 
@@ -993,7 +994,8 @@ class JexlFilter(BaseFilter):
         built_expression = "(" + self.initial_data["expression"] + ")"
         jexl = get_normandy_jexl()
 
-        errors = list(jexl.validate(built_expression))
+        with tracing.span("recipes.filters.validate_jexl"):
+            errors = list(jexl.validate(built_expression))
         if errors:
             raise serializers.ValidationError(errors)
 
@@ -1,14 +1,26 @@
 import logging
+import os
+import time
+from functools import lru_cache
 
 from django.conf import settings
 
-from geoip2.database import Reader
+from geoip2.database import MODE_MEMORY, MODE_MMAP, MODE_MMAP_EXT, Reader
 from geoip2.errors import GeoIP2Error, AddressNotFoundError
+from maxminddb import InvalidDatabaseError
 
 
+INFO_RELOADING_DATABASE = "normandy.geolocation.I001"
 WARNING_CANNOT_LOAD_DATABASE = "normandy.geolocation.W001"
 WARNING_UNKNOWN_GEOIP_ERROR = "normandy.geolocation.W002"
 
+#: Modes to try to open the database with, from fastest to most compatible.
+#: Memory mapping lets worker processes share a single copy of the database.
+READER_MODES = [MODE_MMAP_EXT, MODE_MMAP, MODE_MEMORY]
+
+#: Number of recent lookups to remember.
+COUNTRY_CODE_CACHE_SIZE = 8192
+
 
 logger = logging.getLogger(__name__)
 
@@ -16,25 +28,97 @@ logger = logging.getLogger(__name__)
 #: Shared instance of the GeoIP2 database reader.
 geoip_reader = None
 
+#: Identifies the version of the database file that was loaded, if any.
+_database_stat = None
+_last_checked_at = None
+
+
+def _stat_database():
+    try:
+        stat = os.stat(settings.GEOIP2_DATABASE)
+    except OSError:
+        return None
+    return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+
+def _open_reader(path):
+    error = None
+    for mode in READER_MODES:
+        try:
+            return Reader(path, mode=mode)
+        except ValueError as exc:
+            # This mode isn't usable here, such as MODE_MMAP_EXT without the
+            # C extension, or memory mapping on an unsupported filesystem.
+            error = exc
+    raise IOError(error)
+
 
 def load_geoip_database():
-    global geoip_reader
+    global geoip_reader, _database_stat, _last_checked_at
 
+    # Record the attempt before making it, so that if loading fails in a way
+    # that isn't handled here, it isn't retried on every lookup.
+    _database_stat = _stat_database()
+    _last_checked_at = time.monotonic()
     try:
-        geoip_reader = Reader(settings.GEOIP2_DATABASE)
-    except IOError:
+        reader = _open_reader(settings.GEOIP2_DATABASE)
+    except (IOError, InvalidDatabaseError):
         logger.warning(
             "Geolocation is disabled: Cannot load database.",
             extra={"code": WARNING_CANNOT_LOAD_DATABASE},
         )
+    else:
+        # Swap in the new reader in a single step, so concurrent lookups use
+        # either the old database or the new one, never a mix of the two.
+        geoip_reader = reader
+        _lookup_country_code.cache_clear()
+
+
+def reload_geoip_database_if_changed():
+    """
+    Reload the database if the file has changed since it was loaded.
+
+    The file is checked at most once every ``GEOIP2_RELOAD_INTERVAL``
+    seconds. Updates should replace the file atomically (by renaming a new
+    file over it) rather than writing to it in place.
+    """
+    global _last_checked_at
+
+    interval = settings.GEOIP2_RELOAD_INTERVAL
+    if not interval or _last_checked_at is None:
+        return
+    if time.monotonic() - _last_checked_at < interval:
+        return
+
+    _last_checked_at = time.monotonic()
+    if _stat_database() != _database_stat:
+        logger.info(
+            "Geolocation database has changed, reloading it.",
+            extra={"code": INFO_RELOADING_DATABASE},
+        )
+        load_geoip_database()
+
+
+@lru_cache(maxsize=COUNTRY_CODE_CACHE_SIZE)
+def _lookup_country_code(reader, ip_address):
+    # The reader is part of the cache key so that results from a database
+    # that has since been replaced are never returned.
+    try:
+        return reader.country(ip_address).country.iso_code
+    except AddressNotFoundError:
+        return None
 
 
 def get_country_code(ip_address):
+    if geoip_reader is None and _last_checked_at is None:
+        # The database wasn't loaded when the app started
+        load_geoip_database()
+    else:
+        reload_geoip_database_if_changed()
+
     if geoip_reader and ip_address:
         try:
-            return geoip_reader.country(ip_address).country.iso_code
-        except AddressNotFoundError:
-            pass
+            return _lookup_country_code(geoip_reader, ip_address)
         except GeoIP2Error as exc:
             logger.warning(exc, extra={"code": WARNING_UNKNOWN_GEOIP_ERROR})
             pass
@@ -0,0 +1,135 @@
+"""
+A database backed queue for slow work, such as signing with Autograph,
+publishing to Remote Settings and validating uploaded extensions.
+
+Jobs are created with :meth:`normandy.recipes.models.Job.enqueue` and run
+by the ``run_jobs`` management command. Failed jobs are retried with
+exponential backoff until ``JOBS_MAX_ATTEMPTS`` is reached.
+"""
+
+import logging
+from datetime import timedelta
+
+import markus
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from normandy.recipes.exports import RemoteSettings
+from normandy.recipes.models import Job, Signature
+
+
+WARNING_JOB_WILL_RETRY = "normandy.recipes.jobs.W001"
+ERROR_JOB_FAILED = "normandy.recipes.jobs.E001"
+
+logger = logging.getLogger(__name__)
+metrics = markus.get_metrics("normandy.jobs")
+
+
+def sign_recipe(job):
+    job.recipe.update_signature()
+    job.recipe.save()
+
+
+def publish_recipe(job):
+    """
+    Make Remote Settings match the current state of the recipe. Since this
+    doesn't depend on what caused the job, retries can't publish stale data.
+    """
+    recipe = job.recipe
+    if recipe.approved_revision and recipe.approved_revision.enabled:
+        # The recipe may have changed since it was last signed, if the
+        # signing job hasn't run yet or failed.
+        signature = recipe.signature
+        if signature is None or signature.data_sha384 != Signature.hash_data(
+            recipe.canonical_json()
+        ):
+            recipe.update_signature()
+            recipe.save()
+        RemoteSettings().publish(recipe)
+    else:
+        RemoteSettings().unpublish(recipe)
+
+
+def sign_action(job):
+    job.action.update_signature()
+    job.action.save()
+
+
+def validate_extension(job):
+    job.extension.validate()
+
+
+HANDLERS = {
+    Job.SIGN_RECIPE: sign_recipe,
+    Job.PUBLISH_RECIPE: publish_recipe,
+    Job.SIGN_ACTION: sign_action,
+    Job.VALIDATE_EXTENSION: validate_extension,
+}
+
+
+def claim_job():
+    """
+    Mark the oldest job that is ready to run as running, and return it. Jobs
+    that have been running for longer than ``JOBS_TIMEOUT`` are assumed to
+    belong to a worker that died, and can be claimed again.
+    """
+    now = timezone.now()
+    ready = Q(status=Job.PENDING, run_after__lte=now)
+    abandoned = Q(status=Job.RUNNING, started__lt=now - timedelta(seconds=settings.JOBS_TIMEOUT))
+    with transaction.atomic():
+        job = (
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(ready | abandoned)
+            .order_by("id")
+            .first()
+        )
+        if job is not None:
+            job.status = Job.RUNNING
+            job.attempts += 1
+            job.started = now
+            job.save(update_fields=["status", "attempts", "started"])
+    return job
+
+
+def run_job(job):
+    """Run a claimed job, and record the result on it."""
+    try:
+        HANDLERS[job.kind](job)
+    except Exception as exc:
+        job.last_error = f"{type(exc).__name__}: {exc}"
+        if job.attempts >= settings.JOBS_MAX_ATTEMPTS:
+            logger.exception(
+                f"Job {job.id} ({job.kind}) failed after {job.attempts} attempts",
+                extra={"code": ERROR_JOB_FAILED, "job_id": job.id},
+            )
+            job.status = Job.FAILED
+            job.finished = timezone.now()
+        else:
+            delay = settings.JOBS_RETRY_DELAY * 2 ** (job.attempts - 1)
+            logger.warning(
+                f"Job {job.id} ({job.kind}) failed, retrying in {delay} seconds: {exc}",
+                extra={"code": WARNING_JOB_WILL_RETRY, "job_id": job.id},
+            )
+            job.status = Job.PENDING
+            job.run_after = timezone.now() + timedelta(seconds=delay)
+    else:
+        job.status = Job.SUCCEEDED
+        job.finished = timezone.now()
+
+    job.save()
+    metrics.incr(job.status, tags=[f"kind:{job.kind}"])
+    return job
+
+
+def run_pending_jobs(limit=None):
+    """Run jobs until none are ready, or ``limit`` have run. Returns the number run."""
+    count = 0
+    while limit is None or count < limit:
+        job = claim_job()
+        if job is None:
+            break
+        run_job(job)
+        count += 1
+    return count
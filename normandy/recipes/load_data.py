@@ -0,0 +1,376 @@
+"""
+Generate large, realistic data sets for load testing and query planning.
+
+Unlike the test factories, everything here is created with ``bulk_create``,
+a level of revision history at a time, so thousands of recipes take seconds
+rather than minutes. The generated data only depends on the seed, apart
+from database ids, and nothing is signed or published.
+"""
+
+import itertools
+import json
+import random
+from collections import Counter
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from normandy.recipes import filters
+from normandy.recipes.models import (
+    Action,
+    ApprovalRequest,
+    Channel,
+    Country,
+    EnabledState,
+    Locale,
+    Recipe,
+    RecipeRevision,
+    WindowsVersion,
+)
+from normandy.studies.models import Extension, find_extension_references
+
+
+PREFIX = "load-data"
+
+#: All generated data is timestamped after this, so that it doesn't depend
+#: on when it was generated.
+START_TIME = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+CHANNELS = [("release", "Release"), ("beta", "Beta"), ("aurora", "Developer Edition")]
+COUNTRIES = [("US", "United States"), ("DE", "Germany"), ("FR", "France"), ("SE", "Sweden")]
+LOCALES = [("en-US", "English (US)"), ("de", "German"), ("fr", "French"), ("sv-SE", "Swedish")]
+WINDOWS_VERSIONS = [(Decimal("6.1"), "Windows 7"), (Decimal("10.0"), "Windows 10")]
+SAMPLE_INPUTS = [["normandy.userId"], ["normandy.userId", "normandy.recipe.id"]]
+
+#: Actions that generated recipes use, and whether their arguments have a slug.
+ACTIONS = {"console-log": False, "preference-rollout": True, "branched-addon-study": True}
+
+
+def _pref(rng):
+    return f"browser.{PREFIX}.pref-{rng.randint(0, 100)}"
+
+
+def _sample(rng):
+    return {"input": rng.choice(SAMPLE_INPUTS)}
+
+
+#: Functions to build realistic data for each type of filter.
+FILTER_GENERATORS = {
+    "channel": lambda rng: {"channels": [rng.choice(CHANNELS)[0]]},
+    "locale": lambda rng: {"locales": [rng.choice(LOCALES)[0]]},
+    "country": lambda rng: {"countries": [rng.choice(COUNTRIES)[0]]},
+    "platform": lambda rng: {"platforms": [rng.choice(["all_linux", "all_mac", "all_windows"])]},
+    "addonActive": lambda rng: {
+        "addons": [f"{PREFIX}-{rng.randint(0, 50)}@example.com"],
+        "any_or_all": rng.choice(["any", "all"]),
+    },
+    "addonInstalled": lambda rng: {
+        "addons": [f"{PREFIX}-{rng.randint(0, 50)}@example.com"],
+        "any_or_all": rng.choice(["any", "all"]),
+    },
+    "preferenceValue": lambda rng: {
+        "pref": _pref(rng),
+        "value": rng.choice([True, "default", 10]),
+        "comparison": rng.choice(["equal", "not_equal", "greater_than"]),
+    },
+    "preferenceExists": lambda rng: {"pref": _pref(rng), "value": rng.choice([True, False])},
+    "preferenceIsUserSet": lambda rng: {"pref": _pref(rng), "value": rng.choice([True, False])},
+    "bucketSample": lambda rng: {
+        **_sample(rng),
+        "start": rng.randint(0, 5000),
+        "count": rng.randint(1, 5000),
+        "total": 10000,
+    },
+    "stableSample": lambda rng: {**_sample(rng), "rate": round(rng.random(), 2)},
+    "namespaceSample": lambda rng: {
+        "namespace": f"{PREFIX}-{rng.randint(0, 10)}",
+        "start": rng.randint(0, 5000),
+        "count": rng.randint(1, 5000),
+    },
+    "version": lambda rng: {"versions": sorted(rng.sample(range(70, 90), rng.randint(1, 4)))},
+    "versionRange": lambda rng: {"min_version": "72.0b5", "max_version": "75.0.1"},
+    "dateRange": lambda rng: {
+        "not_before": "2020-01-01T00:00:00Z",
+        "not_after": f"2020-{rng.randint(2, 12):02}-01T00:00:00Z",
+    },
+    "windowsBuildNumber": lambda rng: {
+        "value": rng.choice([15063, 17134, 18362]),
+        "comparison": rng.choice(["equal", "greater_than"]),
+    },
+    "windowsVersion": lambda rng: {"versions_list": [float(WINDOWS_VERSIONS[0][0])]},
+    "negate": lambda rng: {"filter_to_negate": make_filter("channel", rng)},
+    "and": lambda rng: {"subfilters": [make_filter("locale", rng), make_filter("country", rng)]},
+    "or": lambda rng: {
+        "subfilters": [make_filter("preferenceExists", rng), make_filter("addonActive", rng)]
+    },
+    "profileCreationDate": lambda rng: {
+        "direction": rng.choice(["olderThan", "newerThan"]),
+        "date": "2019-06-01",
+    },
+    "jexl": lambda rng: {
+        "expression": "normandy.telemetry.main.length > 0",
+        "capabilities": [],
+        "comment": "Has main pings",
+    },
+    "preset": lambda rng: {"name": "pocket-1"},
+    "qaOnly": lambda rng: {},
+}
+
+
+def make_filter(filter_type, rng):
+    return {"type": filter_type, **FILTER_GENERATORS[filter_type](rng)}
+
+
+def make_filter_object(rng, extra_type, has_slug):
+    """
+    Build a filter object with the usual channel and sampling filters, and
+    one filter of ``extra_type``.
+    """
+    filter_object = [make_filter("channel", rng), make_filter("stableSample", rng)]
+    if extra_type == "qaOnly" and not has_slug:
+        # The QA only filter can only be used with actions that have slugs
+        extra_type = "bucketSample"
+    filter_object.append(make_filter(extra_type, rng))
+    return filter_object
+
+
+def make_arguments(action_name, slug, extension_ids):
+    if action_name == "preference-rollout":
+        return {"slug": slug, "preferences": [{"preferenceName": f"{slug}.pref", "value": True}]}
+    if action_name == "branched-addon-study":
+        return {
+            "slug": slug,
+            "userFacingName": slug,
+            "userFacingDescription": f"Description of {slug}",
+            "isEnrollmentPaused": False,
+            "branches": [
+                {"slug": f"branch-{i}", "ratio": 1, "extensionApiId": extension_id}
+                for i, extension_id in enumerate(extension_ids)
+            ],
+        }
+    return {"message": slug}
+
+
+def _get_or_create_all(model, key, values):
+    return [model.objects.get_or_create(**{key: v}, defaults={"name": n})[0] for v, n in values]
+
+
+@transaction.atomic
+def generate_load_data(
+    recipes=1000, revisions=10, extensions=100, seed=0, batch_size=500, stdout=None
+):
+    """
+    Create ``recipes`` recipes with between 1 and ``revisions`` revisions
+    each, along with approval requests, enabled states and ``extensions``
+    extensions used by add-on study recipes.
+
+    Returns a count of the objects created by model name.
+    """
+    rng = random.Random(seed)
+    created = Counter()
+    tick = itertools.count()
+
+    def next_time():
+        return START_TIME + timedelta(minutes=next(tick))
+
+    def log(message):
+        if stdout:
+            stdout.write(message)
+
+    channels = _get_or_create_all(Channel, "slug", CHANNELS)
+    countries = _get_or_create_all(Country, "code", COUNTRIES)
+    locales = _get_or_create_all(Locale, "code", LOCALES)
+    _get_or_create_all(WindowsVersion, "nt_version", WINDOWS_VERSIONS)
+    # Actions are only created if they don't exist yet. They are bulk created
+    # so that they aren't signed.
+    Action.objects.bulk_create([Action(name=name) for name in ACTIONS], ignore_conflicts=True)
+    actions = {action.name: action for action in Action.objects.filter(name__in=ACTIONS.keys())}
+
+    usernames = [f"{PREFIX}-{seed}-user-{i}" for i in range(20)]
+    User.objects.bulk_create(
+        [User(username=username) for username in usernames], ignore_conflicts=True
+    )
+    users = list(User.objects.filter(username__in=usernames).order_by("username"))
+
+    log(f"Creating {extensions} extensions...")
+    extension_objects = [
+        Extension(
+            name=f"{PREFIX} extension {seed}-{i}",
+            xpi=f"extensions/{PREFIX}-{seed}-{i}.xpi",
+            extension_id=f"{PREFIX}-{seed}-{i}@example.com",
+            version=f"1.0.{i}",
+            hash=f"{rng.getrandbits(256):064x}",
+            hash_algorithm="sha256",
+        )
+        for i in range(extensions)
+    ]
+    Extension.objects.bulk_create(extension_objects, batch_size=batch_size, ignore_conflicts=True)
+    # Ids aren't set on objects that are bulk created while ignoring conflicts
+    extension_ids = list(
+        Extension.objects.filter(xpi__in=[e.xpi.name for e in extension_objects])
+        .order_by("xpi")
+        .values_list("id", flat=True)
+    )
+    created["Extension"] = len(extension_objects)
+
+    log(f"Creating {recipes} recipes...")
+    recipe_objects = Recipe.objects.bulk_create(
+        [Recipe() for _ in range(recipes)], batch_size=batch_size
+    )
+    created["Recipe"] = len(recipe_objects)
+
+    # Plan each recipe's history up front, so that revisions can be created
+    # one level of history at a time.
+    filter_types = sorted(filters.by_type.keys())
+    plans = []
+    for i, recipe in enumerate(recipe_objects):
+        action_name = rng.choice(sorted(ACTIONS.keys()))
+        if action_name == "branched-addon-study" and not extension_ids:
+            action_name = "console-log"
+        plans.append(
+            {
+                "recipe": recipe,
+                "action": actions[action_name],
+                "slug": f"{PREFIX}-{seed}-{i}",
+                "extension_ids": rng.sample(extension_ids, min(2, len(extension_ids))),
+                "revisions": rng.randint(1, revisions),
+                "enabled": rng.random() < 0.6,
+            }
+        )
+
+    revisions_by_recipe = {plan["recipe"].id: [] for plan in plans}
+    count = 0
+    for depth in range(revisions):
+        level = []
+        for plan in plans:
+            if depth >= plan["revisions"]:
+                continue
+            history = revisions_by_recipe[plan["recipe"].id]
+            action = plan["action"]
+            created_at = next_time()
+            level.append(
+                RecipeRevision(
+                    recipe=plan["recipe"],
+                    parent=history[-1] if history else None,
+                    created=created_at,
+                    updated=created_at,
+                    user=rng.choice(users),
+                    name=f"{PREFIX} recipe {plan['slug']} revision {depth}",
+                    action=action,
+                    arguments_json=json.dumps(
+                        make_arguments(action.name, plan["slug"], plan["extension_ids"])
+                    ),
+                    extra_filter_expression=rng.choice(["", "normandy.telemetry.main"]),
+                    filter_object_json=json.dumps(
+                        make_filter_object(
+                            rng, filter_types[count % len(filter_types)], ACTIONS[action.name]
+                        )
+                    ),
+                    identicon_seed=f"v1:{plan['slug']}",
+                    comment=f"Revision {depth}",
+                    experimenter_slug=plan["slug"] if rng.random() < 0.3 else None,
+                )
+            )
+            count += 1
+
+        level = RecipeRevision.objects.bulk_create(level, batch_size=batch_size)
+        for revision in level:
+            revisions_by_recipe[revision.recipe_id].append(revision)
+        log(f"Created {len(level)} revisions at depth {depth}")
+    created["RecipeRevision"] = count
+
+    # Filter the revisions on a few channels, countries and locales
+    through_objects = {
+        RecipeRevision.channels.through: ("channel", channels),
+        RecipeRevision.countries.through: ("country", countries),
+        RecipeRevision.locales.through: ("locale", locales),
+    }
+    for through, (name, options) in through_objects.items():
+        rows = []
+        for history in revisions_by_recipe.values():
+            for revision in history:
+                for option in rng.sample(options, rng.randint(0, 2)):
+                    rows.append(
+                        through(reciperevision_id=revision.id, **{f"{name}_id": option.id})
+                    )
+        through.objects.bulk_create(rows, batch_size=batch_size)
+        created[through.__name__] = len(rows)
+
+    # Record the extensions each revision uses, as RecipeRevision.save would
+    extensions_by_xpi = dict(
+        Extension.objects.filter(id__in=extension_ids).values_list("xpi", "id")
+    )
+    known_ids = set(extension_ids)
+    rows = []
+    for history in revisions_by_recipe.values():
+        for revision in history:
+            used = set()
+            for path, field, value in find_extension_references(revision.arguments):
+                if field == "id" and value in known_ids:
+                    used.add(value)
+                elif field == "xpi" and value in extensions_by_xpi:
+                    used.add(extensions_by_xpi[value])
+            rows.extend(
+                RecipeRevision.extensions.through(
+                    reciperevision_id=revision.id, extension_id=extension_id
+                )
+                for extension_id in sorted(used)
+            )
+    RecipeRevision.extensions.through.objects.bulk_create(rows, batch_size=batch_size)
+    created[RecipeRevision.extensions.through.__name__] = len(rows)
+
+    # Every revision but the latest was approved. The latest revision is
+    # usually approved too, but may be pending or rejected.
+    approvals = []
+    for plan in plans:
+        history = revisions_by_recipe[plan["recipe"].id]
+        for revision in history:
+            creator, approver = rng.sample(users, 2)
+            approved = True
+            if revision is history[-1] and len(history) > 1:
+                approved = rng.choice([True, True, True, None, False])
+            plan["approved"] = revision if approved else history[-2]
+            approvals.append(
+                ApprovalRequest(
+                    revision=revision,
+                    created=revision.created,
+                    creator=creator,
+                    approved=approved,
+                    approver=approver if approved is not None else None,
+                    comment="r+" if approved else ("r-" if approved is False else None),
+                )
+            )
+    ApprovalRequest.objects.bulk_create(approvals, batch_size=batch_size)
+    created["ApprovalRequest"] = len(approvals)
+
+    enabled_states = []
+    for plan in plans:
+        if plan["enabled"]:
+            enabled_states.append(
+                EnabledState(
+                    revision=plan["approved"],
+                    created=next_time(),
+                    creator=rng.choice(users),
+                    enabled=True,
+                )
+            )
+    enabled_states = EnabledState.objects.bulk_create(enabled_states, batch_size=batch_size)
+    created["EnabledState"] = len(enabled_states)
+
+    enabled_revisions = []
+    for state in enabled_states:
+        state.revision.enabled_state = state
+        enabled_revisions.append(state.revision)
+    RecipeRevision.objects.bulk_update(enabled_revisions, ["enabled_state"], batch_size=batch_size)
+
+    for plan in plans:
+        plan["recipe"].latest_revision = revisions_by_recipe[plan["recipe"].id][-1]
+        plan["recipe"].approved_revision = plan["approved"]
+    Recipe.objects.bulk_update(
+        recipe_objects, ["latest_revision", "approved_revision"], batch_size=batch_size
+    )
+
+    return created
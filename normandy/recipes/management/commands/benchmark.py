@@ -0,0 +1,102 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import override_settings
+
+from normandy.recipes.benchmarks import compare_results, generate_recipes, run_benchmarks
+
+
+class Command(BaseCommand):
+    """
+    Time the hot paths in process, optionally against synthetic recipes.
+
+    Synthetic recipes are created in a transaction that is rolled back when
+    the benchmarks finish, so they never remain in the database.
+    """
+
+    help = "Benchmark the hot paths and compare the results to a baseline"
+    requires_system_checks = False
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--recipes",
+            type=int,
+            default=100,
+            help="Number of synthetic recipes to create. Use 0 to use existing data",
+        )
+        parser.add_argument("--seed", type=int, default=0, help="Seed for the synthetic data")
+        parser.add_argument(
+            "--revisions",
+            type=int,
+            default=3,
+            help="Maximum number of revisions per synthetic recipe",
+        )
+        parser.add_argument("--rounds", type=int, default=20, help="Timed calls per benchmark")
+        parser.add_argument(
+            "--host", default="testserver", help="Host header to send, must be an allowed host"
+        )
+        parser.add_argument(
+            "--only",
+            action="append",
+            help="Only run benchmarks whose names contain this, can be repeated",
+        )
+        parser.add_argument("--output", help="Write the results as JSON to this file")
+        parser.add_argument("--compare", help="Compare the results to a previous JSON output")
+        parser.add_argument(
+            "--max-slowdown",
+            type=float,
+            help="With --compare, fail if a median is more than this fraction slower",
+        )
+
+    def handle(
+        self,
+        *args,
+        recipes,
+        seed,
+        revisions,
+        rounds,
+        host,
+        only,
+        output,
+        compare,
+        max_slowdown,
+        **options,
+    ):
+        # Synthetic recipes must never be signed by Autograph or published.
+        with override_settings(AUTOGRAPH_URL=None, REMOTE_SETTINGS_URL=None):
+            with transaction.atomic():
+                if recipes:
+                    self.stdout.write(f"Creating {recipes} synthetic recipes...")
+                    generate_recipes(recipes, seed=seed, revisions=revisions)
+                results = run_benchmarks(rounds=rounds, host=host, only=only)
+                transaction.set_rollback(True)
+        results["seed"] = seed
+
+        self.stdout.write(f"{'Benchmark':<60} {'Median (ms)':>12} {'p95 (ms)':>10}")
+        for name, result in results["benchmarks"].items():
+            if "error" in result:
+                self.stdout.write(f"{name:<60} {result['error']}")
+            else:
+                self.stdout.write(f"{name:<60} {result['median']:>12.3f} {result['p95']:>10.3f}")
+
+        if output:
+            with open(output, "w") as f:
+                json.dump(results, f, indent=2, sort_keys=True)
+
+        if compare:
+            with open(compare) as f:
+                baseline = json.load(f)
+            self.compare(baseline, results, max_slowdown)
+
+    def compare(self, baseline, results, max_slowdown):
+        self.stdout.write("")
+        self.stdout.write(f"{'Benchmark':<60} {'Before':>10} {'After':>10} {'Change':>8}")
+        slower = []
+        for name, before, after, change in compare_results(baseline, results):
+            self.stdout.write(f"{name:<60} {before:>10.3f} {after:>10.3f} {change:>+8.1%}")
+            if max_slowdown is not None and change > max_slowdown:
+                slower.append(name)
+
+        if slower:
+            raise CommandError(f"Benchmarks slower than the baseline: {', '.join(slower)}")
@@ -0,0 +1,103 @@
+import asyncio
+import time
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+
+from normandy.recipes.api.v1.fast_classify import (
+    CLASSIFY_CLIENT_PATH,
+    ClassifyClientASGIMiddleware,
+    ClassifyClientWSGIMiddleware,
+)
+
+
+class Command(BaseCommand):
+    """
+    Measure the throughput of the classify client endpoint in process, both
+    through the full Django and DRF stack and through the fast path.
+    """
+
+    help = "Benchmark the classify client fast path against the full stack"
+    requires_system_checks = False
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "-n", "--requests", type=int, default=2000, help="Number of requests per handler"
+        )
+        parser.add_argument(
+            "--host", default="localhost", help="Host header to send, must be an allowed host"
+        )
+        parser.add_argument(
+            "--ip", default="207.126.102.129", help="Client IP address to classify"
+        )
+
+    def handle(self, *args, requests, host, ip, **options):
+        factory = RequestFactory()
+
+        def make_environ():
+            return factory.get(
+                CLASSIFY_CLIENT_PATH,
+                secure=True,
+                HTTP_HOST=host,
+                HTTP_ACCEPT="application/json",
+                HTTP_X_FORWARDED_FOR=ip,
+                REMOTE_ADDR=ip,
+            ).environ
+
+        full_stack = WSGIHandler()
+        fast_wsgi = ClassifyClientWSGIMiddleware(self.passthrough_wsgi)
+        fast_asgi = ClassifyClientASGIMiddleware(self.passthrough_asgi)
+
+        def call_wsgi(application):
+            statuses = []
+            body = application(make_environ(), lambda status, headers: statuses.append(status))
+            b"".join(body)
+            if hasattr(body, "close"):
+                body.close()
+            if not statuses[0].startswith("200"):
+                raise CommandError(f"Unexpected response status {statuses[0]}")
+
+        def call_asgi():
+            scope = {
+                "type": "http",
+                "method": "GET",
+                "path": CLASSIFY_CLIENT_PATH,
+                "query_string": b"",
+                "scheme": "https",
+                "client": (ip, 0),
+                "headers": [
+                    (b"host", host.encode()),
+                    (b"accept", b"application/json"),
+                    (b"x-forwarded-for", ip.encode()),
+                ],
+            }
+            return fast_asgi(scope, None, self.discard_asgi_message)
+
+        async def run_asgi():
+            for _ in range(requests):
+                await call_asgi()
+
+        handlers = [
+            ("Full stack (WSGI)", lambda: [call_wsgi(full_stack) for _ in range(requests)]),
+            ("Fast path (WSGI)", lambda: [call_wsgi(fast_wsgi) for _ in range(requests)]),
+            ("Fast path (ASGI)", lambda: asyncio.run(run_asgi())),
+        ]
+
+        self.stdout.write(f"{'Handler':<20} {'Requests/s':>12} {'Mean (ms)':>10}")
+        for name, run in handlers:
+            start = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - start
+            self.stdout.write(
+                f"{name:<20} {requests / elapsed:>12.0f} {elapsed / requests * 1000:>10.3f}"
+            )
+
+    def passthrough_wsgi(self, environ, start_response):
+        raise CommandError("The fast path did not handle the request, check --host")
+
+    async def passthrough_asgi(self, scope, receive, send):
+        raise CommandError("The fast path did not handle the request, check --host")
+
+    async def discard_asgi_message(self, message):
+        pass
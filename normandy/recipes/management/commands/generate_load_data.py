@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from normandy.recipes.load_data import generate_load_data
+
+
+class Command(BaseCommand):
+    """
+    Bulk create a large, reproducible set of recipes for load testing and
+    query plan verification. Extensions are created without XPI files, and
+    nothing is signed or published.
+    """
+
+    help = "Generate synthetic recipes, revisions and extensions"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--recipes", type=int, default=1000, help="Number of recipes")
+        parser.add_argument(
+            "--revisions", type=int, default=10, help="Maximum number of revisions per recipe"
+        )
+        parser.add_argument("--extensions", type=int, default=100, help="Number of extensions")
+        parser.add_argument("--seed", type=int, default=0, help="Seed for the generated data")
+        parser.add_argument(
+            "--batch-size", type=int, default=500, help="Number of rows to insert per query"
+        )
+
+    def handle(self, *args, recipes, revisions, extensions, seed, batch_size, **options):
+        created = generate_load_data(
+            recipes=recipes,
+            revisions=revisions,
+            extensions=extensions,
+            seed=seed,
+            batch_size=batch_size,
+            stdout=self.stdout,
+        )
+        for name, count in sorted(created.items()):
+            self.stdout.write(f"Created {count} {name} objects")
@@ -0,0 +1,93 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+
+from normandy.recipes.benchmarks import API_PATHS, HOT_PATHS, summarize
+
+
+class Command(BaseCommand):
+    """
+    Send concurrent requests to a running server, such as a local runserver
+    or gunicorn, and report the throughput and latency of each path.
+    """
+
+    help = "Load test the hot paths of a running server"
+    requires_system_checks = False
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--server", default="http://localhost:8000", help="Base URL of the server to test"
+        )
+        parser.add_argument(
+            "--path",
+            action="append",
+            dest="paths",
+            help="Path to request, can be repeated. Defaults to the hot paths",
+        )
+        parser.add_argument(
+            "-n",
+            "--requests",
+            type=int,
+            default=200,
+            dest="count",
+            help="Number of requests per path",
+        )
+        parser.add_argument(
+            "-c", "--concurrency", type=int, default=10, help="Number of concurrent requests"
+        )
+        parser.add_argument("--output", help="Write the results as JSON to this file")
+
+    def handle(self, *args, server, paths, count, concurrency, output, **options):
+        paths = paths or HOT_PATHS + API_PATHS
+        local = threading.local()
+
+        def fetch(url):
+            session = getattr(local, "session", None)
+            if session is None:
+                session = local.session = requests.Session()
+            start = time.perf_counter()
+            try:
+                response = session.get(url, allow_redirects=False)
+                ok = response.status_code == 200
+            except requests.RequestException:
+                ok = False
+            return time.perf_counter() - start, ok
+
+        results = {}
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for path in paths:
+                url = urljoin(server, path)
+                start = time.perf_counter()
+                timings = list(executor.map(fetch, [url] * count))
+                elapsed = time.perf_counter() - start
+
+                result = summarize([duration for duration, ok in timings])
+                result["errors"] = sum(1 for duration, ok in timings if not ok)
+                result["requests_per_second"] = count / elapsed
+                results[path] = result
+
+        self.stdout.write(
+            f"{'Path':<50} {'Requests/s':>10} {'Median (ms)':>12} {'p99 (ms)':>10} {'Errors':>7}"
+        )
+        for path, result in results.items():
+            self.stdout.write(
+                f"{path:<50} {result['requests_per_second']:>10.1f} {result['median']:>12.3f} "
+                f"{result['p99']:>10.3f} {result['errors']:>7}"
+            )
+
+        if output:
+            with open(output, "w") as f:
+                json.dump(
+                    {"server": server, "concurrency": concurrency, "paths": results},
+                    f,
+                    indent=2,
+                    sort_keys=True,
+                )
+
+        if any(result["errors"] == result["rounds"] for result in results.values()):
+            raise CommandError("Every request to at least one path failed")
@@ -0,0 +1,36 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from normandy.recipes.jobs import run_pending_jobs
+
+
+class Command(BaseCommand):
+    """
+    Work the background job queue. Several workers can run at once, since
+    each job is claimed by only one of them.
+    """
+
+    help = "Run queued signing and publishing jobs"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once", action="store_true", help="Run the jobs that are ready, and then exit"
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=settings.JOBS_POLL_INTERVAL,
+            help="Seconds to wait before checking for new jobs when the queue is empty",
+        )
+
+    def handle(self, *args, once, poll_interval, **options):
+        while True:
+            count = run_pending_jobs()
+            if count:
+                self.stdout.write(f"Ran {count} jobs")
+            if once:
+                break
+            if not count:
+                time.sleep(poll_interval)
@@ -1,16 +1,29 @@
 from django.core.management.base import BaseCommand
 
+from normandy.base.utils import canonical_json
+from normandy.recipes.api.v1.serializers import SignatureSerializer
 from normandy.recipes.models import Recipe
-from normandy.recipes.exports import RemoteSettings, recipe_as_record
+from normandy.recipes.exports import RemoteSettings
 
 
 KINTO_INTERNAL_FIELDS = ("last_modified", "schema")
 
 
 def compare_remote(recipe, record):
-    as_record = recipe_as_record(recipe)
+    """
+    Check if a published record is up to date with a local recipe.
+
+    The recipes are compared by their canonical JSON, which is cached for the
+    local recipe, so unchanged recipes aren't serialized again.
+    """
     cleaned_record = {k: v for k, v in record.items() if k not in KINTO_INTERNAL_FIELDS}
-    return as_record == cleaned_record
+    if cleaned_record.keys() != {"id", "recipe", "signature"}:
+        return False
+    if cleaned_record["id"] != str(recipe.id):
+        return False
+    if cleaned_record["signature"] != SignatureSerializer(recipe.signature).data:
+        return False
+    return canonical_json(cleaned_record["recipe"]) == recipe.canonical_json()
 
 
 class Command(BaseCommand):
@@ -1,9 +1,14 @@
+import json
+import os
 from urllib.parse import urlparse
 
 from django.core.management.base import BaseCommand
+from django.db import transaction
 from django.template.defaultfilters import pluralize
+from django.utils import timezone
 
-from normandy.recipes.models import RecipeRevision
+from normandy.recipes.exports import RemoteSettings
+from normandy.recipes.models import Recipe, RecipeRevision
 from normandy.studies.models import Extension
 
 
@@ -15,19 +20,75 @@ class Command(BaseCommand):
     """
     Rewrite all revisions to update the URL of add-ons stored in Normandy's
     file storage to a new hostname.
+
+    Revisions are updated in batches. Recipes whose approved revision changed
+    are re-signed with one request to Autograph per batch, and published to
+    Remote Settings together at the end. With ``--checkpoint``, progress is
+    saved to a file after each batch, so an interrupted run can continue
+    where it stopped.
     """
 
     help = "Updates add-on URL in revisions to match the current storage system"
 
-    def handle(self, *args, **options):
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=500, help="Number of revisions to update at once"
+        )
+        parser.add_argument(
+            "--checkpoint", help="File to record progress in, to resume an interrupted run"
+        )
+
+    def handle(self, *args, batch_size, checkpoint, **options):
+        progress = self.load_progress(checkpoint)
+        if progress["last_revision_id"]:
+            self.stdout.write(f"Resuming after revision {progress['last_revision_id']}")
+
         extension_by_filename = {}
         for extension in Extension.objects.all():
             filename = get_filename_from_url(extension.xpi.url)
             extension_by_filename[filename] = extension
 
         target_revisions = RecipeRevision.objects.filter(action__name="opt-out-study")
-        update_count = 0
-        for rev in target_revisions:
+        while True:
+            revisions = list(
+                target_revisions.filter(id__gt=progress["last_revision_id"]).order_by("id")[
+                    :batch_size
+                ]
+            )
+            if not revisions:
+                break
+
+            # Each batch is updated and signed together, so an interruption
+            # can't leave updated revisions with old signatures.
+            with transaction.atomic():
+                updated = self.update_revisions(revisions, extension_by_filename)
+                signed = Recipe.objects.filter(approved_revision__in=updated).update_signatures()
+
+            progress["last_revision_id"] = revisions[-1].id
+            progress["update_count"] += len(updated)
+            progress["recipe_ids"] = sorted(
+                set(progress["recipe_ids"]) | {recipe.id for recipe in signed}
+            )
+            self.save_progress(checkpoint, progress)
+
+        # The revisions have changed, so publish their new URLs and signatures
+        recipes = list(Recipe.objects.filter(id__in=progress["recipe_ids"]).only_enabled())
+        if recipes:
+            remote_settings = RemoteSettings()
+            for recipe in recipes:
+                remote_settings.publish(recipe, approve_changes=False)
+            remote_settings.approve_changes()
+
+        if checkpoint and os.path.exists(checkpoint):
+            os.remove(checkpoint)
+
+        update_count = progress["update_count"]
+        self.stdout.write(f"{update_count} revision{pluralize(update_count)} updated")
+
+    def update_revisions(self, revisions, extension_by_filename):
+        """Update the add-on URLs of a batch of revisions, and return the ones that changed."""
+        updated = []
+        for rev in revisions:
             # Pull into a local variable to modify the arguments since
             # `rev.arguments` is actually a property that parses JSON, not a
             # real attribute of the object
@@ -35,7 +96,7 @@ class Command(BaseCommand):
 
             if not arguments.get("addonUrl"):
                 self.stderr.write(
-                    f"Warning: Recipe {rev.recipe.id} revision {rev.id} has action=opt-out-study, "
+                    f"Warning: Recipe {rev.recipe_id} revision {rev.id} has action=opt-out-study, "
                     f"but no addonUrl"
                 )
                 continue
@@ -44,7 +105,7 @@ class Command(BaseCommand):
 
             if filename not in extension_by_filename:
                 self.stderr.write(
-                    f"Warning: Recipe {rev.recipe.id} revision {rev.id} has an addonUrl that does "
+                    f"Warning: Recipe {rev.recipe_id} revision {rev.id} has an addonUrl that does "
                     f"not match any in the database."
                 )
                 continue
@@ -55,15 +116,24 @@ class Command(BaseCommand):
                 # nothing to do
                 continue
 
-            arguments["addonUrl"] = extension.xpi.url
+            arguments["addonUrl"] = new_url
             rev.arguments = arguments
-            rev.save()
-
-            # The revision has changed so update the signature
-            recipe = rev.recipe
-            recipe.update_signature()
-            recipe.save()
-
-            update_count += 1
-
-        self.stdout.write(f"{update_count} revision{pluralize(update_count)} updated")
+            rev.updated = timezone.now()
+            updated.append(rev)
+
+        # Saving each revision would validate its arguments and look up the
+        # extensions it uses again, but neither changes when only the host
+        # of the add-on URL does.
+        RecipeRevision.objects.bulk_update(updated, ["arguments_json", "updated"])
+        return updated
+
+    def load_progress(self, checkpoint):
+        if checkpoint and os.path.exists(checkpoint):
+            with open(checkpoint) as f:
+                return json.load(f)
+        return {"last_revision_id": 0, "update_count": 0, "recipe_ids": []}
+
+    def save_progress(self, checkpoint, progress):
+        if checkpoint:
+            with open(checkpoint, "w") as f:
+                json.dump(progress, f)
@@ -0,0 +1,16 @@
+# Generated by Django 2.2.28 on 2026-10-18 23:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("recipes", "0018_windowsversion")]
+
+    operations = [
+        migrations.AddField(
+            model_name="signature",
+            name="data_sha384",
+            field=models.CharField(max_length=96, null=True),
+        )
+    ]
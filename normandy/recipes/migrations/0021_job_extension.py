@@ -0,0 +1,35 @@
+# Generated by Django 2.2.28 on 2026-10-18 23:19
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("studies", "0008_extension_status"), ("recipes", "0020_job")]
+
+    operations = [
+        migrations.AddField(
+            model_name="job",
+            name="extension",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="jobs",
+                to="studies.Extension",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="job",
+            name="kind",
+            field=models.CharField(
+                choices=[
+                    ("sign-recipe", "Sign recipe"),
+                    ("publish-recipe", "Publish recipe"),
+                    ("sign-action", "Sign action"),
+                    ("validate-extension", "Validate extension"),
+                ],
+                max_length=32,
+            ),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 2.2.28 on 2026-10-18 23:23
+
+import json
+
+from urllib.parse import unquote_plus, urlparse
+
+from django.db import migrations, models
+from django.db.models import Q
+
+
+EXTENSION_ID_ARGUMENTS = {"extensionApiId", "extensionId"}
+
+
+def find_extension_references(arguments):
+    ids = set()
+    xpi_names = set()
+    values = [arguments]
+    while values:
+        value = values.pop()
+        if isinstance(value, dict):
+            for key, item in value.items():
+                if key in EXTENSION_ID_ARGUMENTS and isinstance(item, int):
+                    ids.add(item)
+                else:
+                    values.append(item)
+        elif isinstance(value, list):
+            values.extend(value)
+        elif isinstance(value, str) and "/" in value:
+            path = urlparse(value).path.split("/")
+            if len(path) >= 2 and path[-2] == "extensions" and path[-1]:
+                xpi_names.add(f"extensions/{unquote_plus(path[-1])}")
+    return ids, xpi_names
+
+
+def populate_extensions(apps, schema_editor):
+    RecipeRevision = apps.get_model("recipes", "RecipeRevision")
+    Extension = apps.get_model("studies", "Extension")
+
+    for revision in RecipeRevision.objects.iterator():
+        ids, xpi_names = find_extension_references(json.loads(revision.arguments_json))
+        if ids or xpi_names:
+            revision.extensions.set(Extension.objects.filter(Q(id__in=ids) | Q(xpi__in=xpi_names)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("studies", "0008_extension_status"), ("recipes", "0021_job_extension")]
+
+    operations = [
+        migrations.AddField(
+            model_name="reciperevision",
+            name="extensions",
+            field=models.ManyToManyField(related_name="revisions", to="studies.Extension"),
+        ),
+        migrations.RunPython(populate_extensions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,12 @@
+# Generated by Django 2.2.28 on 2026-10-19 01:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("recipes", "0022_reciperevision_extensions")]
+
+    operations = [
+        migrations.AddField(model_name="signature", name="data", field=models.TextField(null=True))
+    ]
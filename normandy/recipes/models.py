@@ -1,3 +1,4 @@
+import hashlib
 import json
 import logging
 from collections import defaultdict
@@ -5,6 +6,7 @@ from collections import defaultdict
 from django.conf import settings
 from django.contrib.auth.models import User
 from django.contrib.postgres.fields import ArrayField
+from django.core.cache import cache
 from django.core.exceptions import ImproperlyConfigured, ValidationError
 from django.db import models, transaction
 from django.utils import timezone
@@ -14,6 +16,7 @@ from dirtyfields import DirtyFieldsMixin
 from rest_framework import serializers
 from rest_framework.reverse import reverse
 
+from normandy.base import tracing
 from normandy.base.api.renderers import CanonicalJSONRenderer
 from normandy.base.utils import filter_m2m, get_client_ip, sri_hash
 from normandy.recipes import filters
@@ -29,6 +32,10 @@ INFO_CREATE_REVISION = "normandy.recipes.I002"
 INFO_REQUESTING_ACTION_SIGNATURES = "normandy.recipes.I003"
 WARNING_BYPASSING_PEER_APPROVAL = "normandy.recipes.W001"
 
+#: Part of the cache key for recipes' canonical JSON. Bump it whenever the
+#: signed serialization of recipes changes, so cached copies are not reused.
+CANONICAL_JSON_VERSION = 1
+
 
 logger = logging.getLogger(__name__)
 
@@ -82,6 +89,29 @@ class Signature(models.Model):
     timestamp = models.DateTimeField(default=timezone.now)
     public_key = models.TextField()
     x5u = models.TextField(null=True)
+    # Hex encoded sha384 of the exact bytes that were signed. This is null
+    # for signatures created before it was recorded.
+    data_sha384 = models.CharField(max_length=96, null=True)
+    # The exact bytes that were signed, so that they can be served until a
+    # newer signature replaces this one. This is null for signatures created
+    # before it was recorded.
+    data = models.TextField(null=True)
+
+    @classmethod
+    def for_data(cls, data, signature_data):
+        """Build a signature of ``data`` from Autograph's response for it."""
+        return cls(data=data.decode(), data_sha384=cls.hash_data(data), **signature_data)
+
+    @staticmethod
+    def hash_data(data):
+        return hashlib.sha384(data).hexdigest()
+
+    def matches_data(self, data):
+        """
+        Check if ``data`` is what was signed. Signatures without a recorded
+        hash are assumed to match.
+        """
+        return self.data_sha384 is None or self.data_sha384 == self.hash_data(data)
 
 
 class RecipeQuerySet(models.QuerySet):
@@ -91,6 +121,39 @@ class RecipeQuerySet(models.QuerySet):
     def only_disabled(self):
         return self.exclude(approved_revision__enabled_state__enabled=True)
 
+    def update_signatures(self):
+        """
+        Sign the enabled recipes in this queryset with a single request to
+        Autograph, and save the new signatures. Returns the updated recipes.
+        """
+        recipes = list(self.only_enabled())
+        if not recipes:
+            return []
+
+        try:
+            autographer = Autographer()
+        except ImproperlyConfigured:
+            signatures = [None] * len(recipes)
+        else:
+            logger.info(
+                f"Requesting signatures for {len(recipes)} recipes from Autograph",
+                extra={
+                    "code": INFO_REQUESTING_RECIPE_SIGNATURES,
+                    "recipe_ids": [recipe.id for recipe in recipes],
+                },
+            )
+            data = [recipe.canonical_json() for recipe in recipes]
+            signatures = [
+                Signature.for_data(d, signature_data)
+                for d, signature_data in zip(data, autographer.sign_data(data))
+            ]
+            Signature.objects.bulk_create(signatures)
+
+        for recipe, signature in zip(recipes, signatures):
+            recipe.signature = signature
+        self.model.objects.bulk_update(recipes, ["signature"])
+        return recipes
+
 
 class Recipe(DirtyFieldsMixin, models.Model):
     """A set of actions to be fetched and executed by users."""
@@ -130,13 +193,70 @@ class Recipe(DirtyFieldsMixin, models.Model):
         except ApprovalRequest.DoesNotExist:
             return None
 
+    @tracing.traced("recipes.recipe.canonical_json")
     def canonical_json(self):
+        """
+        The canonical JSON of the approved revision of this recipe, which is
+        what gets signed. It is cached per approved revision and signature.
+        """
+        approved_revision = self.approved_revision
+        if (
+            not settings.CANONICAL_JSON_CACHE_TIME
+            or approved_revision is None
+            or approved_revision.is_dirty()
+        ):
+            return self._canonical_json()
+
+        cache_key = self.canonical_json_cache_key()
+        data = cache.get(cache_key)
+        if data is None:
+            data = self._canonical_json()
+            cache.set(cache_key, data, settings.CANONICAL_JSON_CACHE_TIME)
+        return data
+
+    def canonical_json_cache_key(self):
+        revision = self.approved_revision
+        # Capabilities depend on the baseline capabilities setting
+        baseline = hashlib.sha1(
+            ",".join(sorted(settings.BASELINE_CAPABILITIES)).encode()
+        ).hexdigest()
+        return (
+            f"recipe-canonical-json::v{CANONICAL_JSON_VERSION}::{self.id}::{revision.id}::"
+            f"{revision.updated.isoformat()}::{self.signature_id}::{baseline}"
+        )
+
+    def _canonical_json(self):
         # Avoid circular import
         from normandy.recipes.api.v1.serializers import MinimalRecipeSerializer
 
         data = MinimalRecipeSerializer(self).data
         return CanonicalJSONRenderer().render(data)
 
+    def schedule_signature_update(self):
+        """
+        Update the signature now, or queue a job to update it after the
+        current transaction commits if background jobs are enabled.
+
+        Until the job runs, the signed API keeps serving the content that
+        the current signature was made for.
+        """
+        if settings.JOBS_ENABLED:
+            Job.enqueue_on_commit(Job.SIGN_RECIPE, recipe=self)
+        else:
+            self.update_signature()
+
+    def schedule_publish(self):
+        """
+        Publish or unpublish the recipe on Remote Settings, depending on
+        whether it is enabled, either now or with a background job.
+        """
+        if settings.JOBS_ENABLED:
+            Job.enqueue_on_commit(Job.PUBLISH_RECIPE, recipe=self)
+        elif self.approved_revision and self.approved_revision.enabled:
+            RemoteSettings().publish(self)
+        else:
+            RemoteSettings().unpublish(self)
+
     def update_signature(self):
         try:
             autographer = Autographer()
@@ -153,8 +273,9 @@ class Recipe(DirtyFieldsMixin, models.Model):
             extra={"code": INFO_REQUESTING_RECIPE_SIGNATURES, "recipe_ids": [self.id]},
         )
 
-        signature_data = autographer.sign_data([self.canonical_json()])[0]
-        signature = Signature(**signature_data)
+        data = self.canonical_json()
+        signature_data = autographer.sign_data([data])[0]
+        signature = Signature.for_data(data, signature_data)
         signature.save()
         self.signature = signature
 
@@ -255,7 +376,7 @@ class Recipe(DirtyFieldsMixin, models.Model):
                 super().save(*args, **kwargs)
                 kwargs["force_insert"] = False
 
-                self.update_signature()
+                self.schedule_signature_update()
 
         super().save(*args, **kwargs)
 
@@ -293,6 +414,9 @@ class RecipeRevision(DirtyFieldsMixin, models.Model):
     experimenter_slug = models.CharField(null=True, max_length=255, blank=True)
     extra_capabilities = ArrayField(models.CharField(max_length=255), default=list)
 
+    # Uploaded extensions used by the arguments, kept up to date on save
+    extensions = models.ManyToManyField("studies.Extension", related_name="revisions")
+
     class Meta:
         ordering = ("-created",)
 
@@ -314,6 +438,7 @@ class RecipeRevision(DirtyFieldsMixin, models.Model):
         }
 
     @property
+    @tracing.traced("recipes.revision.filter_expression")
     def filter_expression(self):
         parts = []
 
@@ -385,6 +510,7 @@ class RecipeRevision(DirtyFieldsMixin, models.Model):
         return self.enabled_state.enabled if self.enabled_state else False
 
     @property
+    @tracing.traced("recipes.revision.capabilities")
     def capabilities(self):
         """Calculates the set of capabilities required for this recipe."""
         capabilities = set(self.extra_capabilities) | self.action.capabilities
@@ -404,16 +530,31 @@ class RecipeRevision(DirtyFieldsMixin, models.Model):
 
     def save(self, *args, **kwargs):
         self.action.validate_arguments(self.arguments, self)
+        adding = self._state.adding
+        arguments_changed = "arguments_json" in self.get_dirty_fields()
 
         if not self.created:
             self.created = timezone.now()
         self.updated = timezone.now()
         super().save(*args, **kwargs)
 
+        if arguments_changed:
+            self.update_extensions(adding=adding)
+
+    def update_extensions(self, adding=False):
+        """Record which uploaded extensions the arguments of this revision refer to."""
+        # Avoid circular import
+        from normandy.studies.models import find_extensions
+
+        extensions = list(find_extensions(self.arguments))
+        # New revisions have nothing to clear
+        if extensions or not adding:
+            self.extensions.set(extensions)
+
     def request_approval(self, creator):
         approval_request = ApprovalRequest(revision=self, creator=creator)
         approval_request.save()
-        self.recipe.update_signature()
+        self.recipe.schedule_signature_update()
         self.recipe.save()
         return approval_request
 
@@ -428,7 +569,7 @@ class RecipeRevision(DirtyFieldsMixin, models.Model):
         self.save()
 
         self.recipe.approved_revision.refresh_from_db()
-        self.recipe.update_signature()
+        self.recipe.schedule_signature_update()
         self.recipe.save()
 
     def enable(self, user, carryover_from=None):
@@ -439,7 +580,7 @@ class RecipeRevision(DirtyFieldsMixin, models.Model):
 
         self._create_new_enabled_state(creator=user, enabled=True, carryover_from=carryover_from)
 
-        RemoteSettings().publish(self.recipe)
+        self.recipe.schedule_publish()
 
     def disable(self, user):
         if not self.enabled:
@@ -447,7 +588,7 @@ class RecipeRevision(DirtyFieldsMixin, models.Model):
 
         self._create_new_enabled_state(creator=user, enabled=False)
 
-        RemoteSettings().unpublish(self.recipe)
+        self.recipe.schedule_publish()
 
     def _validate_preference_rollout_rollback_enabled_invariance(self):
         """Raise ValidationError if you're trying to enable a preference-rollback
@@ -523,6 +664,9 @@ class ApprovalRequest(models.Model):
     class CannotActOnOwnRequest(Exception):
         pass
 
+    class ExtensionsNotReady(Exception):
+        pass
+
     def verify_approver(self, approver):
         if approver == self.creator:
             if settings.PEER_APPROVAL_ENFORCED:
@@ -544,6 +688,13 @@ class ApprovalRequest(models.Model):
 
         self.verify_approver(approver)
 
+        # Avoid circular import
+        from normandy.studies.models import Extension
+
+        # Extensions may have been replaced since the revision was saved
+        if self.revision.extensions.exclude(status=Extension.READY).exists():
+            raise self.ExtensionsNotReady()
+
         self.approved = True
         self.approver = approver
         self.comment = comment
@@ -576,7 +727,7 @@ class ApprovalRequest(models.Model):
         self.save()
 
         recipe = self.revision.recipe
-        recipe.update_signature()
+        recipe.schedule_signature_update()
         recipe.save()
 
     @transaction.atomic
@@ -584,7 +735,7 @@ class ApprovalRequest(models.Model):
         self.delete()
 
         recipe = self.revision.recipe
-        recipe.update_signature()
+        recipe.schedule_signature_update()
         recipe.save()
 
 
@@ -610,6 +761,8 @@ class Action(DirtyFieldsMixin, models.Model):
         "rollout_slug_not_found": "Rollout slug not found for rollback",
         "duplicate_survey_id": "Survey ID must be globally unique",
         "duplicate_study_name": "Study name must be globally unique",
+        "extension_validating": "Extension is still being validated",
+        "extension_invalid": "Extension is invalid",
     }
 
     @property
@@ -652,6 +805,16 @@ class Action(DirtyFieldsMixin, models.Model):
         # server.
         return sri_hash(self.implementation.encode(), url_safe=True)
 
+    def schedule_signature_update(self):
+        """
+        Update the signature now, or queue a job to update it after the
+        current transaction commits if background jobs are enabled.
+        """
+        if settings.JOBS_ENABLED:
+            Job.enqueue_on_commit(Job.SIGN_ACTION, action=self)
+        else:
+            self.update_signature()
+
     def update_signature(self):
         try:
             autographer = Autographer()
@@ -664,8 +827,9 @@ class Action(DirtyFieldsMixin, models.Model):
             extra={"code": INFO_REQUESTING_ACTION_SIGNATURES, "action_names": [self.name]},
         )
 
-        signature_data = autographer.sign_data([self.canonical_json()])[0]
-        signature = Signature(**signature_data)
+        data = self.canonical_json()
+        signature_data = autographer.sign_data([data])[0]
+        signature = Signature.for_data(data, signature_data)
         signature.save()
         self.signature = signature
 
@@ -694,7 +858,7 @@ class Action(DirtyFieldsMixin, models.Model):
 
                 if self.implementation:
                     self.implementation_hash = self.compute_implementation_hash()
-                self.update_signature()
+                self.schedule_signature_update()
 
         super().save(*args, **kwargs)
 
@@ -810,10 +974,98 @@ class Action(DirtyFieldsMixin, models.Model):
                 if recipe.latest_revision.arguments["name"] == arguments["name"]:
                     errors["name"] = self.errors["duplicate_study_name"]
 
+        self._validate_extension_references(arguments, errors)
+
         # Raise errors, if any
         if errors:
             raise serializers.ValidationError({"arguments": errors})
 
+    def _validate_extension_references(self, arguments, errors):
+        """Add an error for each uploaded extension in `arguments` that isn't ready to use."""
+        # Avoid circular import
+        from normandy.studies.models import Extension, find_extension_references, find_extensions
+
+        unready = find_extensions(arguments).exclude(status=Extension.READY)
+        if not unready:
+            return
+
+        for path, field, value in find_extension_references(arguments):
+            for extension in unready:
+                if value == (extension.id if field == "id" else extension.xpi.name):
+                    current_level = errors
+                    for part in path[:-1]:
+                        current_level = current_level[part]
+                    if extension.status == Extension.INVALID:
+                        current_level[path[-1]] = self.errors["extension_invalid"]
+                    else:
+                        current_level[path[-1]] = self.errors["extension_validating"]
+
+
+class Job(models.Model):
+    """
+    Work on a recipe, action or extension, such as signing or publishing,
+    that is done by the ``run_jobs`` worker instead of in the request that
+    needed it.
+
+    Jobs are queued with :meth:`enqueue_on_commit` once the change that
+    needs them has been committed, so the worker never runs a job for a
+    change that was rolled back or that it can't see yet.
+    """
+
+    SIGN_RECIPE = "sign-recipe"
+    PUBLISH_RECIPE = "publish-recipe"
+    SIGN_ACTION = "sign-action"
+    VALIDATE_EXTENSION = "validate-extension"
+    KIND_CHOICES = (
+        (SIGN_RECIPE, "Sign recipe"),
+        (PUBLISH_RECIPE, "Publish recipe"),
+        (SIGN_ACTION, "Sign action"),
+        (VALIDATE_EXTENSION, "Validate extension"),
+    )
+
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    STATUS_CHOICES = (
+        (PENDING, "Pending"),
+        (RUNNING, "Running"),
+        (SUCCEEDED, "Succeeded"),
+        (FAILED, "Failed"),
+    )
+
+    kind = models.CharField(max_length=32, choices=KIND_CHOICES)
+    recipe = models.ForeignKey(Recipe, null=True, on_delete=models.CASCADE, related_name="jobs")
+    action = models.ForeignKey(Action, null=True, on_delete=models.CASCADE, related_name="jobs")
+    extension = models.ForeignKey(
+        "studies.Extension", null=True, on_delete=models.CASCADE, related_name="jobs"
+    )
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, default="")
+    created = models.DateTimeField(default=timezone.now)
+    run_after = models.DateTimeField(default=timezone.now)
+    started = models.DateTimeField(null=True)
+    finished = models.DateTimeField(null=True)
+
+    class Meta:
+        ordering = ("id",)
+        indexes = [models.Index(fields=["status", "run_after"])]
+
+    @classmethod
+    def enqueue(cls, kind, recipe=None, action=None, extension=None):
+        """Queue a job, unless an identical one is already waiting to run."""
+        targets = {"recipe": recipe, "action": action, "extension": extension}
+        pending = cls.objects.filter(kind=kind, status=cls.PENDING, **targets)
+        return pending.first() or cls.objects.create(kind=kind, **targets)
+
+    @classmethod
+    def enqueue_on_commit(cls, kind, recipe=None, action=None, extension=None):
+        """Queue a job when the current transaction commits, or now if there isn't one."""
+        transaction.on_commit(
+            lambda: cls.enqueue(kind, recipe=recipe, action=action, extension=extension)
+        )
+
 
 class Client(object):
     """A client attempting to fetch a set of recipes."""
@@ -22,6 +22,8 @@ from django.core.exceptions import ImproperlyConfigured
 from django.utils import timezone
 from django.utils.functional import cached_property
 
+from normandy.base import tracing
+
 
 INFO_RECEIVED_SIGNATURES = "normandy.autograph.I001"
 
@@ -56,6 +58,7 @@ class Autographer(object):
                 msg = "set settings.AUTOGRAPH_{} to use action signatures".format(key)
                 raise ImproperlyConfigured(msg)
 
+    @tracing.traced("recipes.signing.sign_data")
     def sign_data(self, content_list):
         """
         Fetches Signatures objects from Autograph for each item in `content_list`.
@@ -183,6 +186,7 @@ def read_timestamp_object(obj):
         )
 
 
+@tracing.traced("recipes.signing.verify_x5u")
 def verify_x5u(url, expire_early=None):
     """
     Verify the certificate chain at a URL.
@@ -429,6 +429,7 @@ class SignatureFactory(factory.DjangoModelFactory):
 
     data = b""
     signature = factory.LazyAttribute(lambda o: hashlib.sha256(o.data).hexdigest())
+    data_sha384 = factory.LazyAttribute(lambda o: Signature.hash_data(o.data) if o.data else None)
     public_key = "MHYwEAYHKoZIzj0CAQYFK4EEACIDYgAEh+JqU60off8jnvWkQAnP/P4vdKjP0aFiK4rrDne5rsqNd4A4A/z5P2foRFltlS6skODDIUu4X/C2pwROMgSXpkRFZxXk9IwATCRCVQ7YnffR8f1Jw5fWzCerDmf5fAj5"  # noqa
     x5u = "https://example.com/fake.x5u"
 
@@ -460,5 +461,23 @@ ARGUMENTS_SCHEMA = {
 }
 
 
+def create_populated_recipes(count):
+    """
+    Create recipes that use every relation the API serializes.
+
+    Each recipe has an approved, enabled and signed revision, as well as a
+    newer revision that is pending approval, all by distinct users.
+    """
+    recipes = []
+    for _ in range(count):
+        recipe = RecipeFactory(approver=UserFactory(), enabler=UserFactory())
+        recipe.revise(name=FuzzyUnicode().fuzz(), user=UserFactory())
+        ApprovalRequestFactory(revision=recipe.latest_revision, creator=UserFactory())
+        recipe.signature = SignatureFactory(data=recipe.canonical_json())
+        recipe.save()
+        recipes.append(recipe)
+    return recipes
+
+
 def fake_sign(datas):
     return [{"signature": hashlib.sha256(d).hexdigest()} for d in datas]
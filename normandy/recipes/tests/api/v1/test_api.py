@@ -1,3 +1,4 @@
+import gzip
 import hashlib
 from unittest.mock import patch
 
@@ -9,11 +10,13 @@ from rest_framework.reverse import reverse
 
 from normandy.base.tests import UserFactory, Whatever
 from normandy.base.utils import aware_datetime
+from normandy.recipes.api.v1.views import get_implementation_variants
 from normandy.recipes.tests import (
     ActionFactory,
     ApprovalRequestFactory,
     RecipeFactory,
     RecipeRevisionFactory,
+    create_populated_recipes,
 )
 
 
@@ -167,6 +170,55 @@ class TestImplementationAPI(object):
         assert res.status_code == 200
         assert res.client.cookies == {}
 
+    def test_it_404s_if_action_doesnt_exist(self, api_client):
+        res = api_client.get("/api/v1/action/missing/implementation/nohash/")
+        assert res.status_code == 404
+        assert res["Content-Type"] == "application/javascript; charset=utf-8"
+
+    def test_it_serves_gzipped_implementations(self, api_client):
+        action = ActionFactory()
+        res = api_client.get(
+            "/api/v1/action/{name}/implementation/{hash}/".format(
+                name=action.name, hash=action.implementation_hash
+            ),
+            HTTP_ACCEPT_ENCODING="gzip, deflate",
+        )
+        assert res.status_code == 200
+        assert res["Content-Encoding"] == "gzip"
+        assert "Accept-Encoding" in res["Vary"]
+        assert gzip.decompress(res.content).decode() == action.implementation
+        assert res["Content-Type"] == "application/javascript; charset=utf-8"
+
+    def test_it_caches_implementations(self, api_client):
+        action = ActionFactory()
+        url = "/api/v1/action/{name}/implementation/{hash}/".format(
+            name=action.name, hash=action.implementation_hash
+        )
+        api_client.get(url)
+        get_implementation_variants.cache_clear()
+
+        # The shared cache is enough to avoid loading the implementation
+        # from the database. Only the hash is checked.
+        with CaptureQueriesContext(connection) as captured:
+            res = api_client.get(url)
+        assert res.status_code == 200
+        assert res.content.decode() == action.implementation
+        assert len(captured) == 1
+        assert '"recipes_action"."implementation",' not in captured[0]["sql"]
+
+    def test_it_404s_for_replaced_implementations(self, api_client):
+        action = ActionFactory(implementation="original")
+        url = "/api/v1/action/{name}/implementation/{hash}/".format(
+            name=action.name, hash=action.implementation_hash
+        )
+        assert api_client.get(url).status_code == 200
+
+        action.implementation = "replaced"
+        action.save()
+        res = api_client.get(url)
+        assert res.status_code == 404
+        assert res.content.decode() == "/* Hash does not match current stored action. */"
+
 
 @pytest.mark.django_db
 class TestRecipeAPI(object):
@@ -544,3 +596,29 @@ def test_apis_make_a_reasonable_number_of_db_queries(client, endpoint, Factory):
         assert res.status_code == 200
     # Anything under 100 isn't doing one query per recipe.
     assert len(queries) < 100
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "endpoint,max_queries",
+    [
+        ("/api/v1/action/", 1),
+        ("/api/v1/action/signed/", 1),
+        ("/api/v1/recipe/", 7),
+        ("/api/v1/recipe/signed/", 7),
+        ("/api/v1/recipe_revision/", 4),
+        ("/api/v1/approval_request/", 1),
+    ],
+)
+def test_apis_make_a_constant_number_of_db_queries(
+    client, endpoint, max_queries, django_assert_max_num_queries
+):
+    """
+    The number of queries must not depend on the amount of data, only on
+    the number of relations the serializers use.
+    """
+    create_populated_recipes(100)
+
+    with django_assert_max_num_queries(max_queries):
+        res = client.get(endpoint)
+        assert res.status_code == 200
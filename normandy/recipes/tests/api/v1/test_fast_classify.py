@@ -0,0 +1,159 @@
+import asyncio
+import json
+
+import pytest
+
+from normandy.recipes.api.v1.fast_classify import (
+    CLASSIFY_CLIENT_PATH,
+    ClassifyClientASGIMiddleware,
+    ClassifyClientWSGIMiddleware,
+    get_fast_response,
+)
+
+
+@pytest.fixture
+def mock_country(mocker):
+    mocker.patch("normandy.recipes.models.get_country_code", return_value="US")
+    mocker.patch("normandy.recipes.api.v1.fast_classify.get_country_code", return_value="US")
+
+
+def without_request_time(body):
+    data = json.loads(body)
+    assert data.pop("request_time")
+    return data
+
+
+@pytest.mark.django_db
+class TestGetFastResponse(object):
+    @pytest.mark.parametrize(
+        "extra",
+        [
+            {},
+            {"secure": True},
+            {"HTTP_ORIGIN": "https://example.com"},
+            {"HTTP_ACCEPT": "application/json"},
+            {"HTTP_ACCEPT": "*/*"},
+            {"REMOTE_ADDR": "207.126.102.129"},
+        ],
+    )
+    def test_it_matches_the_full_stack(self, client, rf, mock_country, extra):
+        full = client.get(CLASSIFY_CLIENT_PATH, **extra)
+        status, headers, body = get_fast_response(rf.get(CLASSIFY_CLIENT_PATH, **extra).environ)
+
+        assert status == full.status_code
+        assert without_request_time(body) == without_request_time(full.content)
+        time_dependent = {"Expires", "Content-Length"}
+        assert [(k, v) for k, v in headers if k not in time_dependent] == [
+            (k, v) for k, v in full.items() if k not in time_dependent
+        ]
+
+    def test_it_formats_the_body(self, rf, mocker):
+        mocker.patch("normandy.recipes.api.v1.fast_classify.get_country_code", return_value="CA")
+        _, headers, body = get_fast_response(rf.get(CLASSIFY_CLIENT_PATH).environ)
+        data = json.loads(body)
+        assert data["country"] == "CA"
+        assert data["request_time"].endswith("Z")
+        assert dict(headers)["Content-Length"] == str(len(body))
+
+    @pytest.mark.parametrize(
+        "method,path,extra",
+        [
+            ("post", CLASSIFY_CLIENT_PATH, {}),
+            ("head", CLASSIFY_CLIENT_PATH, {}),
+            ("options", CLASSIFY_CLIENT_PATH, {}),
+            ("get", "/api/v1/classify_client", {}),
+            ("get", "/api/v1/action/", {}),
+            ("get", CLASSIFY_CLIENT_PATH + "?format=api", {}),
+            ("get", CLASSIFY_CLIENT_PATH, {"HTTP_ACCEPT": "text/html,*/*;q=0.8"}),
+            ("get", CLASSIFY_CLIENT_PATH, {"HTTP_ACCEPT": "application/yaml"}),
+            ("get", CLASSIFY_CLIENT_PATH, {"HTTP_HOST": "evil.example.com"}),
+        ],
+    )
+    def test_it_passes_on_other_requests(self, rf, method, path, extra):
+        request = getattr(rf, method)(path, **extra)
+        assert get_fast_response(request.environ) is None
+
+    def test_it_can_be_disabled(self, rf, settings):
+        settings.CLASSIFY_CLIENT_FAST_PATH = False
+        assert get_fast_response(rf.get(CLASSIFY_CLIENT_PATH).environ) is None
+
+    def test_it_passes_on_insecure_requests_to_redirect(self, rf, settings):
+        settings.SECURE_SSL_REDIRECT = True
+        assert get_fast_response(rf.get(CLASSIFY_CLIENT_PATH).environ) is None
+        assert get_fast_response(rf.get(CLASSIFY_CLIENT_PATH, secure=True).environ) is not None
+
+    def test_it_passes_on_requests_with_cors_whitelists(self, rf, settings):
+        settings.CORS_ORIGIN_ALLOW_ALL = False
+        assert get_fast_response(rf.get(CLASSIFY_CLIENT_PATH).environ) is None
+
+    def test_headers_follow_settings(self, rf, settings):
+        settings.X_FRAME_OPTIONS = "sameorigin"
+        settings.SECURE_HSTS_SECONDS = 42
+        _, headers, _ = get_fast_response(rf.get(CLASSIFY_CLIENT_PATH, secure=True).environ)
+        headers = dict(headers)
+        assert headers["X-Frame-Options"] == "SAMEORIGIN"
+        assert headers["Strict-Transport-Security"].startswith("max-age=42")
+
+
+@pytest.mark.django_db
+class TestClassifyClientWSGIMiddleware(object):
+    def test_it_serves_classify_client(self, rf, mocker):
+        app = mocker.Mock()
+        start_response = mocker.Mock()
+        middleware = ClassifyClientWSGIMiddleware(app)
+
+        body = middleware(rf.get(CLASSIFY_CLIENT_PATH).environ, start_response)
+
+        assert not app.called
+        start_response.assert_called_once_with("200 OK", mocker.ANY)
+        assert "request_time" in json.loads(b"".join(body))
+
+    def test_it_passes_on_other_requests(self, rf, mocker):
+        app = mocker.Mock()
+        start_response = mocker.Mock()
+        middleware = ClassifyClientWSGIMiddleware(app)
+        environ = rf.get("/api/v1/action/").environ
+
+        assert middleware(environ, start_response) == app.return_value
+        app.assert_called_once_with(environ, start_response)
+
+
+@pytest.mark.django_db
+class TestClassifyClientASGIMiddleware(object):
+    def make_scope(self, path=CLASSIFY_CLIENT_PATH, method="GET"):
+        return {
+            "type": "http",
+            "method": method,
+            "path": path,
+            "query_string": b"",
+            "scheme": "http",
+            "client": ("207.126.102.129", 12345),
+            "headers": [(b"host", b"testserver"), (b"accept", b"application/json")],
+        }
+
+    def test_it_serves_classify_client(self, mock_country):
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        async def app(scope, receive, send):
+            raise AssertionError("Should not be called")
+
+        asyncio.run(ClassifyClientASGIMiddleware(app)(self.make_scope(), None, send))
+
+        assert sent[0]["type"] == "http.response.start"
+        assert sent[0]["status"] == 200
+        assert (b"Content-Type", b"application/json") in sent[0]["headers"]
+        assert sent[1]["type"] == "http.response.body"
+        assert json.loads(sent[1]["body"])["country"] == "US"
+
+    def test_it_passes_on_other_requests(self):
+        calls = []
+
+        async def app(scope, receive, send):
+            calls.append(scope)
+
+        scope = self.make_scope(method="POST")
+        asyncio.run(ClassifyClientASGIMiddleware(app)(scope, None, None))
+        assert calls == [scope]
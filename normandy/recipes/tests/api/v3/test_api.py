@@ -1,6 +1,7 @@
 from datetime import timedelta
 
 from django.conf import settings
+from django.core.cache import cache
 from django.db import connection
 from django.test.utils import CaptureQueriesContext
 
@@ -10,10 +11,11 @@ from rest_framework.reverse import reverse
 from pathlib import Path
 
 from normandy.base.api.permissions import AdminEnabledOrReadOnly
-from normandy.base.tests import UserFactory, Whatever
+from normandy.base.tests import FuzzyUnicode, UserFactory, Whatever
 from normandy.base.utils import canonical_json_dumps
-from normandy.recipes.models import ApprovalRequest, Recipe, RecipeRevision
+from normandy.recipes.models import ApprovalRequest, Job, Recipe, RecipeRevision
 from normandy.recipes import filters as filter_objects
+from normandy.recipes.api.v3 import shield_identicon
 from normandy.recipes.tests import (
     ActionFactory,
     ApprovalRequestFactory,
@@ -22,8 +24,11 @@ from normandy.recipes.tests import (
     LocaleFactory,
     RecipeFactory,
     RecipeRevisionFactory,
+    create_populated_recipes,
     fake_sign,
 )
+from normandy.studies.models import Extension
+from normandy.studies.tests import ExtensionFactory
 
 
 @pytest.mark.django_db
@@ -1364,6 +1369,22 @@ class TestApprovalRequestAPI(object):
         assert res.status_code == 400
         assert res.data["error"] == "This approval request has already been approved or rejected."
 
+    def test_approve_unready_extensions(self, api_client, storage):
+        extension = ExtensionFactory()
+        r = RecipeFactory(arguments={"extensionApiId": extension.id})
+        a = ApprovalRequestFactory(revision=r.latest_revision)
+        Extension.objects.filter(id=extension.id).update(status=Extension.INVALID)
+
+        res = api_client.post(
+            "/api/v3/approval_request/{}/approve/".format(a.id), {"comment": "r+"}
+        )
+        assert res.status_code == 400
+        assert res.data["error"] == (
+            "All extensions used by this revision must be valid before approval."
+        )
+        r.refresh_from_db()
+        assert not r.is_approved
+
     def test_reject(self, api_client):
         r = RecipeFactory()
         a = ApprovalRequestFactory(revision=r.latest_revision)
@@ -1434,6 +1455,63 @@ class TestApprovalRequestAPI(object):
                 ), f"Expected alias {alias!r} to return the right approval request"
 
 
+@pytest.mark.django_db
+class TestJobAPI(object):
+    def test_it_works(self, api_client):
+        res = api_client.get("/api/v3/job/")
+        assert res.status_code == 200
+        assert res.data == {"count": 0, "next": None, "previous": None, "results": []}
+
+    def test_it_requires_authentication(self, client):
+        job = Job.enqueue(Job.SIGN_ACTION, action=ActionFactory())
+        res = client.get("/api/v3/job/")
+        assert res.status_code == 401
+        res = client.get(f"/api/v3/job/{job.id}/")
+        assert res.status_code == 401
+
+    def test_approving_an_enabled_recipe_queues_jobs(self, api_client, settings, run_on_commit):
+        settings.JOBS_ENABLED = True
+        recipe = RecipeFactory(approver=UserFactory(), enabler=UserFactory())
+        recipe.revise(name="changed")
+        approval_request = recipe.latest_revision.request_approval(UserFactory())
+        Job.objects.all().delete()
+
+        res = api_client.post(
+            f"/api/v3/approval_request/{approval_request.id}/approve/", {"comment": "r+"}
+        )
+        assert res.status_code == 200
+
+        res = api_client.get(f"/api/v3/job/?recipe={recipe.id}")
+        assert res.status_code == 200
+        assert [(job["kind"], job["status"]) for job in res.data["results"]] == [
+            (Job.PUBLISH_RECIPE, Job.PENDING),
+            (Job.SIGN_RECIPE, Job.PENDING),
+        ]
+        assert res.data["results"][0] == {
+            "id": Whatever(),
+            "kind": Job.PUBLISH_RECIPE,
+            "status": Job.PENDING,
+            "recipe_id": recipe.id,
+            "action_id": None,
+            "extension_id": None,
+            "attempts": 0,
+            "last_error": "",
+            "created": Whatever(),
+            "run_after": Whatever(),
+            "started": None,
+            "finished": None,
+        }
+
+    def test_it_filters_by_status(self, api_client):
+        recipe = RecipeFactory()
+        Job.objects.create(kind=Job.SIGN_RECIPE, recipe=recipe, status=Job.FAILED)
+        Job.objects.create(kind=Job.SIGN_RECIPE, recipe=recipe)
+
+        res = api_client.get("/api/v3/job/?status=failed")
+        assert res.status_code == 200
+        assert [job["status"] for job in res.data["results"]] == [Job.FAILED]
+
+
 @pytest.mark.django_db
 class TestApprovalFlow(object):
     def verify_signatures(self, api_client, expected_count=None):
@@ -1705,7 +1783,51 @@ def test_apis_makes_a_reasonable_number_of_db_queries(endpoint, Factory, client,
     assert len(queries) < page_size * 2, queries
 
 
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "endpoint,max_queries",
+    [
+        ("/api/v3/action/", 2),
+        ("/api/v3/recipe/", 11),
+        ("/api/v3/recipe_revision/", 7),
+        ("/api/v3/approval_request/", 2),
+    ],
+)
+def test_apis_make_a_constant_number_of_db_queries(
+    endpoint, max_queries, client, django_assert_max_num_queries
+):
+    # The number of queries must not depend on the amount of data, only on
+    # the number of relations the serializers use.
+    create_populated_recipes(100)
+
+    with django_assert_max_num_queries(max_queries):
+        res = client.get(endpoint)
+        assert res.status_code == 200
+
+
+@pytest.mark.django_db
+def test_recipe_history_makes_a_constant_number_of_db_queries(
+    client, django_assert_max_num_queries
+):
+    recipe = RecipeFactory()
+    for _ in range(100):
+        recipe.revise(name=FuzzyUnicode().fuzz(), user=UserFactory())
+
+    with django_assert_max_num_queries(10):
+        res = client.get(f"/api/v3/recipe/{recipe.id}/history/")
+        assert res.status_code == 200
+        assert len(res.json()) == 101
+
+
 class TestIdenticonAPI(object):
+    @pytest.fixture(autouse=True)
+    def clear_caches(self):
+        shield_identicon.get_identicon_svg.cache_clear()
+        cache.clear()
+        yield
+        shield_identicon.get_identicon_svg.cache_clear()
+        cache.clear()
+
     def test_it_works(self, client):
         res = client.get("/api/v3/identicon/v1:foobar.svg")
         assert res.status_code == 200
@@ -1734,6 +1856,57 @@ class TestIdenticonAPI(object):
         assert res.status_code == 400
         assert res.json()["error"] == "Invalid identicon generation, only v1 is supported."
 
+    def test_it_renders_each_seed_once(self, client, mocker):
+        generate_svg = mocker.patch(
+            "normandy.recipes.api.v3.shield_identicon.generate_svg",
+            wraps=shield_identicon.generate_svg,
+        )
+        res1 = client.get("/api/v3/identicon/v1:foobar.svg")
+        res2 = client.get("/api/v3/identicon/v1:foobar.svg")
+        assert res1.content == res2.content
+        assert generate_svg.call_count == 1
+
+    def test_it_shares_rendered_identicons(self, client, mocker):
+        res1 = client.get("/api/v3/identicon/v1:foobar.svg")
+        # Another process would only have the shared cache
+        shield_identicon.get_identicon_svg.cache_clear()
+        generate_svg = mocker.patch("normandy.recipes.api.v3.shield_identicon.generate_svg")
+        res2 = client.get("/api/v3/identicon/v1:foobar.svg")
+        assert res1.content == res2.content
+        assert not generate_svg.called
+
+
+class TestIdenticonBatchAPI(object):
+    def test_it_works(self, client):
+        res = client.get("/api/v3/identicon/v1/?seed=foobar&seed=v1:other seed")
+        assert res.status_code == 200
+        assert res.json() == {
+            "foobar": client.get("/api/v3/identicon/v1:foobar.svg").content.decode(),
+            "v1:other seed": client.get("/api/v3/identicon/v1:v1:other seed.svg").content.decode(),
+        }
+
+    def test_includes_cache_headers(self, client):
+        res = client.get("/api/v3/identicon/v1/?seed=foobar")
+        assert f"max-age={settings.IMMUTABLE_CACHE_TIME}" in res["Cache-Control"]
+        assert "immutable" in res["Cache-Control"]
+
+    def test_unrecognized_generation(self, client):
+        res = client.get("/api/v3/identicon/v9/?seed=foobar")
+        assert res.status_code == 400
+        assert res.json()["error"] == "Invalid identicon generation, only v1 is supported."
+
+    def test_it_requires_seeds(self, client):
+        res = client.get("/api/v3/identicon/v1/")
+        assert res.status_code == 400
+
+    def test_it_limits_seeds(self, client):
+        seeds = "&".join(f"seed={i}" for i in range(101))
+        res = client.get(f"/api/v3/identicon/v1/?{seeds}")
+        assert res.status_code == 400
+
+        res = client.get(f"/api/v3/identicon/v1/?seed={'x' * 65}")
+        assert res.status_code == 400
+
 
 @pytest.mark.django_db
 class TestFilterObjects(object):
@@ -1,6 +1,15 @@
+import hashlib
+from pathlib import Path
+
 import pytest
 
-from normandy.recipes.api.v3.shield_identicon import Genome
+from normandy.recipes.api.v3.shield_identicon import Genome, generate_svg
+
+
+#: SHA-256 digests of the identicons for the seeds "seed-0" to "seed-4999",
+#: in blocks of ``DIGEST_BLOCK_SIZE`` seeds, one block per line.
+GOLDEN_DIGESTS = Path(__file__).with_name("identicons.sha256")
+DIGEST_BLOCK_SIZE = 500
 
 
 @pytest.fixture
@@ -43,3 +52,23 @@ class TestGenome(object):
             genome.color().rgb_color,
         ]
         assert color_values == [(7, 54, 66), (255, 207, 0), (88, 110, 117)]
+
+
+class TestGenerateSVG(object):
+    def test_it_matches_known_output(self):
+        """
+        Identicons are cached forever by clients, so rendering must keep
+        producing exactly the same bytes for every seed.
+        """
+        for line in GOLDEN_DIGESTS.read_text().splitlines():
+            start, expected = line.split()
+            digest = hashlib.sha256()
+            for i in range(int(start), int(start) + DIGEST_BLOCK_SIZE):
+                digest.update(generate_svg(Genome(f"seed-{i}")).encode())
+            assert digest.hexdigest() == expected, f"seeds from seed-{start} changed"
+
+    def test_it_covers_every_treatment(self):
+        svgs = [generate_svg(Genome(f"seed-{i}")) for i in range(DIGEST_BLOCK_SIZE)]
+        assert any("rotate" not in svg for svg in svgs)
+        assert any('height="0.75"' in svg for svg in svgs)
+        assert any('height="1.5"\n' in svg for svg in svgs)
@@ -0,0 +1,25 @@
+from django.apps import apps
+
+import pytest
+
+
+class TestRecipesAppReady(object):
+    @pytest.fixture
+    def mocks(self, mocker):
+        mocker.patch("normandy.recipes.apps.checks")
+        return {
+            "remote_settings": mocker.patch("normandy.recipes.apps.RemoteSettings"),
+            "load_geoip_database": mocker.patch("normandy.recipes.apps.load_geoip_database"),
+        }
+
+    def test_it_checks_remote_settings_and_loads_geoip(self, mocks, settings):
+        settings.DEFER_STARTUP_CHECKS = False
+        apps.get_app_config("recipes").ready()
+        mocks["remote_settings"].return_value.check_config.assert_called_once_with()
+        mocks["load_geoip_database"].assert_called_once_with()
+
+    def test_it_can_defer_startup_checks(self, mocks, settings):
+        settings.DEFER_STARTUP_CHECKS = True
+        apps.get_app_config("recipes").ready()
+        assert not mocks["remote_settings"].called
+        assert not mocks["load_geoip_database"].called
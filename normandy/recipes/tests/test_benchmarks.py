@@ -0,0 +1,77 @@
+import pytest
+
+from normandy.recipes import benchmarks, checks
+from normandy.recipes.models import Recipe
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("storage")
+class TestGenerateRecipes(object):
+    def test_it_creates_recipes_with_history(self):
+        recipes = benchmarks.generate_recipes(3, revisions=2)
+        assert Recipe.objects.count() == 3
+        for recipe in recipes:
+            assert 1 <= recipe.revisions.count() <= 2
+            assert recipe.approved_revision
+            assert recipe.latest_revision.filter_expression
+
+    def test_it_only_signs_enabled_recipes(self):
+        recipes = benchmarks.generate_recipes(10)
+        assert {r.signature is not None for r in recipes} == {True, False}
+        for recipe in recipes:
+            assert (recipe.signature is not None) == recipe.approved_revision.enabled
+
+    def test_it_is_deterministic(self):
+        def generate(seed):
+            recipes = benchmarks.generate_recipes(3, seed=seed)
+            data = [
+                (r.latest_revision.filter_object_json, r.approved_revision.enabled)
+                for r in recipes
+            ]
+            Recipe.objects.all().delete()
+            return data
+
+        assert generate(1) == generate(1)
+        assert generate(1) != generate(2)
+
+    def test_signatures_are_valid(self, settings):
+        benchmarks.generate_recipes(2, seed=3)
+        assert Recipe.objects.exclude(signature=None).exists()
+        assert checks.recipe_signatures_are_correct(None) == []
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("storage")
+class TestRunBenchmarks(object):
+    def test_it_times_every_benchmark(self):
+        benchmarks.generate_recipes(2)
+        results = benchmarks.run_benchmarks(rounds=2, only=["/api/v3/", "canonical_json"])
+        assert results["recipes"] == 2
+        assert set(results["benchmarks"]) == {
+            *(f"GET {path}" for path in benchmarks.API_PATHS),
+            "Recipe.canonical_json",
+        }
+        for result in results["benchmarks"].values():
+            assert result["rounds"] == 2
+            assert result["min"] <= result["median"] <= result["max"]
+
+    def test_it_times_identicons(self):
+        results = benchmarks.run_benchmarks(rounds=1, only=["generate_svg"])
+        assert set(results["benchmarks"]) == {"shield_identicon.generate_svg"}
+        assert results["benchmarks"]["shield_identicon.generate_svg"]["rounds"] == 1
+
+    def test_it_reports_errors(self, mocker):
+        mocker.patch(
+            "normandy.recipes.benchmarks.checks.recipe_signatures_are_correct",
+            side_effect=Exception("broken"),
+        )
+        results = benchmarks.run_benchmarks(rounds=1, only=["signatures"])
+        assert results["benchmarks"] == {
+            "recipe_signatures_are_correct": {"error": "Exception: broken"}
+        }
+
+
+def test_compare_results():
+    baseline = {"benchmarks": {"a": {"median": 2.0}, "b": {"median": 1.0}, "c": {"error": "x"}}}
+    current = {"benchmarks": {"a": {"median": 3.0}, "c": {"median": 1.0}, "d": {"median": 1.0}}}
+    assert benchmarks.compare_results(baseline, current) == [("a", 2.0, 3.0, 0.5)]
@@ -1,7 +1,9 @@
 from datetime import timedelta
 
+from django.core.exceptions import ImproperlyConfigured
 from django.db.utils import ProgrammingError
 
+import kinto_http
 import pytest
 import requests.exceptions
 
@@ -82,6 +84,29 @@ class TestRecipeSignatureAreCorrect:
         assert len(errors) == 1
         assert errors[0].id == checks.WARNING_COULD_NOT_CHECK_SIGNATURES
 
+    def test_it_reports_recipes_changed_since_signing(self, mocker):
+        recipe = RecipeFactory(approver=UserFactory(), signed=True)
+        mocker.patch("normandy.recipes.models.Recipe.canonical_json", return_value=b"changed")
+        mock_verify = mocker.patch("normandy.recipes.checks.signing.verify_signature_x5u")
+        errors = checks.recipe_signatures_are_correct(None)
+        assert len(errors) == 1
+        assert errors[0].id == checks.ERROR_RECIPE_CHANGED_SINCE_SIGNING
+        assert recipe.signature.data_sha384 in errors[0].msg
+        assert not mock_verify.called
+
+    def test_it_verifies_signatures_without_a_hash(self, mocker):
+        recipe = RecipeFactory(approver=UserFactory(), signed=True)
+        recipe.signature.data_sha384 = None
+        recipe.signature.save()
+        mock_verify = mocker.patch("normandy.recipes.checks.signing.verify_signature_x5u")
+        mock_verify.side_effect = signing.SignatureDoesNotMatch()
+        errors = checks.recipe_signatures_are_correct(None)
+        mock_verify.assert_called_once_with(
+            recipe.canonical_json(), recipe.signature.signature, recipe.signature.x5u
+        )
+        assert len(errors) == 1
+        assert errors[0].id == checks.ERROR_INVALID_RECIPE_SIGNATURE
+
 
 @pytest.mark.django_db
 class TestActionSignatureAreCorrect:
@@ -93,3 +118,68 @@ class TestActionSignatureAreCorrect:
         errors = checks.action_signatures_are_correct(None)
         assert len(errors) == 1
         assert errors[0].id == checks.WARNING_COULD_NOT_CHECK_SIGNATURES
+
+    def test_it_reports_actions_changed_since_signing(self, mocker):
+        ActionFactory(signed=True)
+        mocker.patch("normandy.recipes.models.Action.canonical_json", return_value=b"changed")
+        mock_verify = mocker.patch("normandy.recipes.checks.signing.verify_signature_x5u")
+        errors = checks.action_signatures_are_correct(None)
+        assert len(errors) == 1
+        assert errors[0].id == checks.ERROR_ACTION_CHANGED_SINCE_SIGNING
+        assert not mock_verify.called
+
+
+class TestRemoteSettingsAreConfigured:
+    @pytest.fixture
+    def mock_check_config(self, mocker):
+        return mocker.patch("normandy.recipes.checks.RemoteSettings").return_value.check_config
+
+    def test_it_works(self, mock_check_config):
+        assert checks.remote_settings_are_configured(None) == []
+        mock_check_config.assert_called_once_with()
+
+    def test_it_reports_bad_configuration(self, mock_check_config):
+        mock_check_config.side_effect = ImproperlyConfigured("Invalid Remote Settings credentials")
+        errors = checks.remote_settings_are_configured(None)
+        assert len(errors) == 1
+        assert errors[0].id == checks.ERROR_REMOTE_SETTINGS_MISCONFIGURED
+        assert "Invalid Remote Settings credentials" in errors[0].msg
+
+    @pytest.mark.parametrize(
+        "exception",
+        [requests.exceptions.ConnectionError(), kinto_http.KintoException("Server error")],
+    )
+    def test_it_reports_network_errors(self, mock_check_config, exception):
+        mock_check_config.side_effect = exception
+        errors = checks.remote_settings_are_configured(None)
+        assert len(errors) == 1
+        assert errors[0].id == checks.ERROR_REMOTE_SETTINGS_UNAVAILABLE
+
+
+class TestRegister:
+    @pytest.fixture
+    def mock_register_check(self, mocker):
+        return mocker.patch("normandy.recipes.checks.register_check")
+
+    def registered_deploy_checks(self, mock_register_check):
+        return {
+            call[0][0]
+            for call in mock_register_check.call_args_list
+            if call[1].get("deploy", False)
+        }
+
+    def test_it_runs_remote_settings_checks_on_deploy(self, mock_register_check, settings):
+        settings.DEFER_STARTUP_CHECKS = False
+        checks.register()
+        assert self.registered_deploy_checks(mock_register_check) == {
+            checks.remote_settings_are_configured
+        }
+
+    def test_it_defers_network_checks_to_deploy(self, mock_register_check, settings):
+        settings.DEFER_STARTUP_CHECKS = True
+        checks.register()
+        assert self.registered_deploy_checks(mock_register_check) == {
+            checks.remote_settings_are_configured,
+            checks.signatures_use_good_certificates,
+            checks.geoip_db_is_available,
+        }
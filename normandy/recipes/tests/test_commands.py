@@ -15,7 +15,8 @@ from markus import GAUGE
 
 from normandy.base.tests import UserFactory, Whatever
 from normandy.recipes import exports
-from normandy.recipes.models import Action, Recipe
+from normandy.recipes.management.commands.sync_remote_settings import compare_remote
+from normandy.recipes.models import Action, Recipe, Signature
 from normandy.recipes.tests import ActionFactory, RecipeFactory
 from normandy.studies.tests import ExtensionFactory
 
@@ -427,6 +428,61 @@ class TestUpdateAddonUrls(object):
         assert recipe1.latest_revision.arguments[addonUrl] == extension1.xpi.url
         assert recipe2.latest_revision.arguments[addonUrl] == extension2.xpi.url
 
+    def test_it_signs_and_publishes_in_batches(self, mocked_autograph, mocker, storage):
+        mocked_rs = mocker.patch(
+            "normandy.recipes.management.commands.update_addon_urls.RemoteSettings"
+        )
+        action = ActionFactory(name="opt-out-study")
+        recipes = [
+            RecipeFactory(
+                action=action,
+                arguments={addonUrl: extension.xpi.url.replace("/media/", "/media-old/")},
+                approver=UserFactory(),
+                enabler=UserFactory(),
+            )
+            for extension in ExtensionFactory.create_batch(3)
+        ]
+        mocked_autograph.return_value.sign_data.reset_mock()
+
+        call_command("update_addon_urls", "--batch-size", "2")
+
+        # One request to Autograph per batch
+        assert [len(c[0][0]) for c in mocked_autograph.return_value.sign_data.call_args_list] == [
+            2,
+            1,
+        ]
+        for recipe in recipes:
+            recipe = Recipe.objects.get(id=recipe.id)
+            assert recipe.signature.data_sha384 == Signature.hash_data(recipe.canonical_json())
+        assert mocked_rs.return_value.publish.call_count == 3
+        mocked_rs.return_value.approve_changes.assert_called_once_with()
+
+    def test_it_resumes_from_a_checkpoint(self, storage, tmpdir):
+        action = ActionFactory(name="opt-out-study")
+        extension1, extension2 = ExtensionFactory.create_batch(2)
+        old_url1 = extension1.xpi.url.replace("/media/", "/media-old/")
+        old_url2 = extension2.xpi.url.replace("/media/", "/media-old/")
+        recipe1 = RecipeFactory(action=action, arguments={addonUrl: old_url1})
+        recipe2 = RecipeFactory(action=action, arguments={addonUrl: old_url2})
+
+        checkpoint = tmpdir.join("checkpoint.json")
+        checkpoint.write(
+            json.dumps(
+                {
+                    "last_revision_id": recipe1.latest_revision.id,
+                    "update_count": 1,
+                    "recipe_ids": [],
+                }
+            )
+        )
+        call_command("update_addon_urls", "--checkpoint", str(checkpoint))
+
+        # The first revision was before the checkpoint, so isn't looked at again
+        assert Recipe.objects.get(id=recipe1.id).latest_revision.arguments[addonUrl] == old_url1
+        recipe2 = Recipe.objects.get(id=recipe2.id)
+        assert recipe2.latest_revision.arguments[addonUrl] == extension2.xpi.url
+        assert not checkpoint.exists()
+
 
 @pytest.mark.django_db
 class TestSyncRemoteSettings(object):
@@ -447,6 +503,19 @@ class TestSyncRemoteSettings(object):
         requestsmock.get(self.capabilities_published_records_url, json={"data": []})
         call_command("sync_remote_settings")
 
+    @pytest.mark.django_db
+    def test_compare_remote(self):
+        recipe = RecipeFactory(approver=UserFactory(), enabler=UserFactory(), signed=True)
+        record = json.loads(json.dumps(exports.recipe_as_record(recipe)))
+        record["last_modified"] = 123
+        assert compare_remote(recipe, record)
+
+        changed = dict(record, recipe=dict(record["recipe"], name="changed"))
+        assert not compare_remote(recipe, changed)
+        resigned = dict(record, signature=dict(record["signature"], signature="changed"))
+        assert not compare_remote(recipe, resigned)
+        assert not compare_remote(recipe, dict(record, extra=True))
+
     def test_it_fails_if_not_enabled(self):
         # We enabled Remote Settings without mocking server calls.
         with pytest.raises(ImproperlyConfigured):
@@ -577,3 +646,103 @@ class TestSyncRemoteSettings(object):
         assert requests[2].url.endswith(self.capabilities_workspace_collection_url)
         # And there are no extra requests
         assert len(requests) == 3
+
+
+@pytest.mark.django_db
+class TestBenchmarkClassifyClient(object):
+    def test_it_works(self, capsys):
+        call_command("benchmark_classify_client", "--requests", "5", "--host", "testserver")
+        output = capsys.readouterr().out
+        assert "Full stack (WSGI)" in output
+        assert "Fast path (WSGI)" in output
+        assert "Fast path (ASGI)" in output
+
+    def test_it_fails_if_the_fast_path_is_not_used(self):
+        with pytest.raises(CommandError):
+            call_command("benchmark_classify_client", "--requests", "5", "--host", "evil.com")
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("storage")
+class TestBenchmark(object):
+    def test_it_works(self, capsys, tmpdir):
+        output = tmpdir.join("results.json")
+        call_command(
+            "benchmark",
+            "--recipes",
+            "2",
+            "--rounds",
+            "1",
+            "--only",
+            "/api/v3/recipe/",
+            "--output",
+            str(output),
+        )
+        assert "GET /api/v3/recipe/" in capsys.readouterr().out
+
+        results = json.loads(output.read())
+        assert results["recipes"] == 2
+        assert results["seed"] == 0
+        assert "median" in results["benchmarks"]["GET /api/v3/recipe/"]
+        # The synthetic recipes are not kept
+        assert Recipe.objects.count() == 0
+
+    def test_it_compares_to_a_baseline(self, capsys, tmpdir):
+        baseline = tmpdir.join("baseline.json")
+        baseline.write(json.dumps({"benchmarks": {"GET /api/v1/action/": {"median": 1e-6}}}))
+        args = ["benchmark", "--recipes", "0", "--rounds", "1", "--only", "/api/v1/action/"]
+
+        call_command(*args, "--compare", str(baseline))
+        assert "GET /api/v1/action/" in capsys.readouterr().out.split("Change")[1]
+
+        with pytest.raises(CommandError):
+            call_command(*args, "--compare", str(baseline), "--max-slowdown", "0.5")
+
+
+class TestLoadTest(object):
+    def test_it_works(self, capsys, tmpdir):
+        output = tmpdir.join("results.json")
+        with requests_mock.Mocker() as mock:
+            mock.get("http://normandy.example.com/api/v1/action/", text="[]")
+            call_command(
+                "load_test",
+                "--server",
+                "http://normandy.example.com",
+                "--path",
+                "/api/v1/action/",
+                "-n",
+                "4",
+                "-c",
+                "2",
+                "--output",
+                str(output),
+            )
+            assert mock.call_count == 4
+
+        assert "/api/v1/action/" in capsys.readouterr().out
+        results = json.loads(output.read())
+        assert results["paths"]["/api/v1/action/"]["rounds"] == 4
+        assert results["paths"]["/api/v1/action/"]["errors"] == 0
+
+    def test_it_fails_if_every_request_fails(self):
+        with requests_mock.Mocker() as mock:
+            mock.get("http://normandy.example.com/api/v1/action/", status_code=500)
+            with pytest.raises(CommandError):
+                call_command(
+                    "load_test",
+                    "--server",
+                    "http://normandy.example.com",
+                    "--path",
+                    "/api/v1/action/",
+                    "-n",
+                    "2",
+                )
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("storage")
+class TestGenerateLoadData(object):
+    def test_it_works(self, capsys):
+        call_command("generate_load_data", "--recipes", "4", "--extensions", "2", "--seed", "3")
+        assert "Created 4 Recipe objects" in capsys.readouterr().out
+        assert Recipe.objects.count() == 4
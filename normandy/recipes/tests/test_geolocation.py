@@ -1,8 +1,12 @@
 import pytest
+from geoip2.database import MODE_MEMORY, MODE_MMAP_EXT
 from geoip2.errors import GeoIP2Error
+from maxminddb import InvalidDatabaseError
 
 from normandy.base.tests import Whatever
+from normandy.recipes import geolocation as geolocation_module
 from normandy.recipes.geolocation import (
+    get_country_code,
     load_geoip_database,
     WARNING_CANNOT_LOAD_DATABASE,
     WARNING_UNKNOWN_GEOIP_ERROR,
@@ -14,6 +18,14 @@ def mock_logger(mocker):
     return mocker.patch("normandy.recipes.geolocation.logger")
 
 
+@pytest.fixture
+def isolated_geolocation(mocker):
+    """Restore the module's loaded database state after the test."""
+    mocker.patch.object(geolocation_module, "geoip_reader", None)
+    mocker.patch.object(geolocation_module, "_database_stat", None)
+    mocker.patch.object(geolocation_module, "_last_checked_at", None)
+
+
 class TestGetCountryCode(object):
     def test_it_works(self, geolocation):
         assert geolocation.get_country_code("207.126.102.129") == "US"
@@ -31,6 +43,39 @@ class TestGetCountryCode(object):
             Whatever(), extra={"code": WARNING_UNKNOWN_GEOIP_ERROR}
         )
 
+    def test_it_caches_lookups(self, isolated_geolocation, mocker):
+        mock_reader = mocker.patch("normandy.recipes.geolocation.geoip_reader")
+        mock_reader.country.return_value.country.iso_code = "CA"
+
+        assert get_country_code("207.126.102.129") == "CA"
+        assert get_country_code("207.126.102.129") == "CA"
+        assert mock_reader.country.call_count == 1
+
+    def test_it_loads_the_database_on_first_use(self, isolated_geolocation, mocker):
+        MockReader = mocker.patch("normandy.recipes.geolocation.Reader")
+        MockReader.return_value.country.return_value.country.iso_code = "CA"
+
+        assert get_country_code("207.126.102.129") == "CA"
+        assert get_country_code("207.126.102.130") == "CA"
+        assert MockReader.call_count == 1
+
+    def test_it_only_tries_loading_once(self, isolated_geolocation, mocker, mock_logger):
+        MockReader = mocker.patch("normandy.recipes.geolocation.Reader")
+        MockReader.side_effect = IOError()
+
+        assert get_country_code("207.126.102.129") is None
+        assert get_country_code("207.126.102.129") is None
+        assert mock_logger.warning.call_count == 1
+
+    def test_it_doesnt_retry_unexpected_errors_on_every_lookup(self, isolated_geolocation, mocker):
+        MockReader = mocker.patch("normandy.recipes.geolocation.Reader")
+        MockReader.side_effect = RuntimeError()
+
+        with pytest.raises(RuntimeError):
+            get_country_code("207.126.102.129")
+        assert get_country_code("207.126.102.129") is None
+        assert MockReader.call_count == 1
+
 
 class TestLoadGeoIPDatabase(object):
     def test_it_warns_when_cant_load_database(self, mocker, mock_logger):
@@ -41,3 +86,129 @@ class TestLoadGeoIPDatabase(object):
         mock_logger.warning.assert_called_with(
             Whatever(), extra={"code": WARNING_CANNOT_LOAD_DATABASE}
         )
+
+    def test_it_warns_when_the_database_is_corrupt(
+        self, isolated_geolocation, settings, tmp_path, mock_logger
+    ):
+        path = tmp_path / "GeoLite2-Country.mmdb"
+        path.write_bytes(b"not a database")
+        settings.GEOIP2_DATABASE = str(path)
+
+        load_geoip_database()
+        assert geolocation_module.geoip_reader is None
+        mock_logger.warning.assert_called_with(
+            Whatever(), extra={"code": WARNING_CANNOT_LOAD_DATABASE}
+        )
+
+    def test_it_memory_maps_the_database(self, isolated_geolocation, mocker):
+        MockReader = mocker.patch("normandy.recipes.geolocation.Reader")
+
+        load_geoip_database()
+        MockReader.assert_called_once_with(Whatever(), mode=MODE_MMAP_EXT)
+        assert geolocation_module.geoip_reader == MockReader.return_value
+
+    def test_it_falls_back_to_loading_into_memory(self, isolated_geolocation, mocker):
+        MockReader = mocker.patch("normandy.recipes.geolocation.Reader")
+        reader = mocker.Mock()
+        MockReader.side_effect = [ValueError(), ValueError(), reader]
+
+        load_geoip_database()
+        MockReader.assert_called_with(Whatever(), mode=MODE_MEMORY)
+        assert geolocation_module.geoip_reader == reader
+
+
+class TestReloadGeoIPDatabase(object):
+    @pytest.fixture
+    def database(self, isolated_geolocation, settings, tmp_path):
+        path = tmp_path / "GeoLite2-Country.mmdb"
+        path.write_bytes(b"original")
+        settings.GEOIP2_DATABASE = str(path)
+        settings.GEOIP2_RELOAD_INTERVAL = 60
+        return path
+
+    @pytest.fixture
+    def mock_time(self, mocker):
+        mock_time = mocker.patch("normandy.recipes.geolocation.time")
+        mock_time.monotonic.return_value = 1000
+        return mock_time
+
+    @pytest.fixture
+    def MockReader(self, mocker):
+        MockReader = mocker.patch("normandy.recipes.geolocation.Reader")
+        MockReader.side_effect = lambda *args, **kwargs: mocker.Mock()
+        return MockReader
+
+    def replace_database(self, path, content):
+        new_path = path.with_name("new.mmdb")
+        new_path.write_bytes(content)
+        new_path.rename(path)
+
+    def test_it_reloads_changed_databases(self, database, mock_time, MockReader):
+        load_geoip_database()
+        original_reader = geolocation_module.geoip_reader
+
+        self.replace_database(database, b"updated database")
+        mock_time.monotonic.return_value += 61
+        get_country_code("207.126.102.129")
+
+        assert MockReader.call_count == 2
+        assert geolocation_module.geoip_reader != original_reader
+
+    def test_it_waits_between_checks(self, database, mock_time, MockReader):
+        load_geoip_database()
+
+        self.replace_database(database, b"updated database")
+        mock_time.monotonic.return_value += 30
+        get_country_code("207.126.102.129")
+
+        assert MockReader.call_count == 1
+
+    def test_it_doesnt_reload_unchanged_databases(self, database, mock_time, MockReader):
+        load_geoip_database()
+
+        mock_time.monotonic.return_value += 61
+        get_country_code("207.126.102.129")
+
+        assert MockReader.call_count == 1
+
+    def test_it_keeps_the_old_database_if_loading_fails(
+        self, database, mock_time, MockReader, mock_logger
+    ):
+        load_geoip_database()
+        original_reader = geolocation_module.geoip_reader
+
+        self.replace_database(database, b"broken database")
+        MockReader.side_effect = IOError()
+        mock_time.monotonic.return_value += 61
+        get_country_code("207.126.102.129")
+
+        assert geolocation_module.geoip_reader == original_reader
+        mock_logger.warning.assert_called_with(
+            Whatever(), extra={"code": WARNING_CANNOT_LOAD_DATABASE}
+        )
+
+    def test_it_keeps_the_old_database_if_the_new_one_is_corrupt(
+        self, database, mock_time, MockReader, mock_logger
+    ):
+        load_geoip_database()
+        original_reader = geolocation_module.geoip_reader
+
+        self.replace_database(database, b"corrupt database")
+        MockReader.side_effect = InvalidDatabaseError()
+        mock_time.monotonic.return_value += 61
+        get_country_code("207.126.102.129")
+
+        assert geolocation_module.geoip_reader == original_reader
+        mock_logger.warning.assert_called_with(
+            Whatever(), extra={"code": WARNING_CANNOT_LOAD_DATABASE}
+        )
+
+    def test_it_can_be_disabled(self, database, mock_time, MockReader, settings):
+        settings.GEOIP2_RELOAD_INTERVAL = 0
+        load_geoip_database()
+
+        self.replace_database(database, b"updated database")
+        mock_time.monotonic.return_value += 61
+        get_country_code("207.126.102.129")
+
+        assert MockReader.call_count == 1
@@ -0,0 +1,222 @@
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.utils import timezone
+
+import pytest
+
+from normandy.base.tests import UserFactory
+from normandy.recipes import jobs
+from normandy.recipes.models import Job, Recipe, Signature
+from normandy.recipes.tests import ActionFactory, RecipeFactory, fake_sign
+
+
+@pytest.fixture
+def jobs_enabled(settings, run_on_commit):
+    settings.JOBS_ENABLED = True
+    settings.JOBS_MAX_ATTEMPTS = 3
+    settings.JOBS_RETRY_DELAY = 10
+    return settings
+
+
+@pytest.fixture
+def mocked_jobs_remotesettings(mocker):
+    return mocker.patch("normandy.recipes.jobs.RemoteSettings")
+
+
+@pytest.mark.django_db
+class TestScheduling(object):
+    def test_it_signs_immediately_when_disabled(self, mocked_autograph, mocked_remotesettings):
+        recipe = RecipeFactory(approver=UserFactory(), enabler=UserFactory())
+        assert recipe.signature is not None
+        mocked_remotesettings.return_value.publish.assert_called_with(recipe)
+        assert not Job.objects.exists()
+
+    def test_enabling_queues_jobs(self, jobs_enabled, mocked_autograph, mocked_remotesettings):
+        recipe = RecipeFactory(approver=UserFactory(), enabler=UserFactory())
+
+        assert recipe.signature is None
+        assert not mocked_autograph.return_value.sign_data.called
+        assert not mocked_remotesettings.return_value.publish.called
+        assert list(recipe.jobs.values_list("kind", "status")) == [
+            (Job.SIGN_RECIPE, Job.PENDING),
+            (Job.PUBLISH_RECIPE, Job.PENDING),
+        ]
+
+    def test_signed_content_is_served_until_the_job_runs(
+        self, jobs_enabled, mocked_autograph, api_client, settings
+    ):
+        recipe = RecipeFactory(name="original", approver=UserFactory(), enabler=UserFactory())
+        jobs.run_pending_jobs()
+        recipe.refresh_from_db()
+        settings.BASELINE_CAPABILITIES |= recipe.approved_revision.capabilities
+
+        recipe.revise(name="changed")
+        approval_request = recipe.latest_revision.request_approval(UserFactory())
+        approval_request.approve(UserFactory(), "r+")
+
+        # The recipe stays signed, with the content the signature is for
+        recipe.refresh_from_db()
+        old_signature = recipe.signature
+        res = api_client.get("/api/v1/recipe/signed/")
+        assert res.status_code == 200
+        assert [r["recipe"]["name"] for r in res.data] == ["original"]
+        assert res.data[0]["signature"]["signature"] == old_signature.signature
+        assert old_signature.data_sha384 == Signature.hash_data(old_signature.data.encode())
+
+        jobs.run_pending_jobs()
+        res = api_client.get("/api/v1/recipe/signed/")
+        assert [r["recipe"]["name"] for r in res.data] == ["changed"]
+        assert res.data[0]["signature"]["signature"] != old_signature.signature
+
+    def test_signed_actions_are_served_until_the_job_runs(
+        self, jobs_enabled, mocked_autograph, api_client
+    ):
+        action = ActionFactory(implementation="console.log('original')")
+        jobs.run_pending_jobs()
+        action.refresh_from_db()
+        original = api_client.get("/api/v1/action/signed/").data
+
+        action.implementation = "console.log('changed')"
+        action.save()
+        action.refresh_from_db()
+        assert action.signature is not None
+        assert api_client.get("/api/v1/action/signed/").data == original
+
+        jobs.run_pending_jobs()
+        changed = api_client.get("/api/v1/action/signed/").data
+        assert changed[0]["action"]["implementation_url"] != (
+            original[0]["action"]["implementation_url"]
+        )
+
+    def test_jobs_are_queued_when_the_transaction_commits(self, settings, mocker):
+        settings.JOBS_ENABLED = True
+        on_commit = mocker.patch("django.db.transaction.on_commit")
+        recipe = RecipeFactory(approver=UserFactory(), enabler=UserFactory())
+        assert not recipe.jobs.exists()
+
+        for call in on_commit.call_args_list:
+            call[0][0]()
+        assert set(recipe.jobs.values_list("kind", flat=True)) == {
+            Job.SIGN_RECIPE,
+            Job.PUBLISH_RECIPE,
+        }
+
+    def test_identical_pending_jobs_are_not_duplicated(self, jobs_enabled):
+        recipe = RecipeFactory()
+        job = Job.enqueue(Job.SIGN_RECIPE, recipe=recipe)
+        assert Job.enqueue(Job.SIGN_RECIPE, recipe=recipe) == job
+
+        job.status = Job.SUCCEEDED
+        job.save()
+        assert Job.enqueue(Job.SIGN_RECIPE, recipe=recipe) != job
+
+    def test_saving_an_action_queues_a_job(self, jobs_enabled, mocked_autograph):
+        action = ActionFactory()
+        assert not mocked_autograph.return_value.sign_data.called
+        assert list(action.jobs.values_list("kind", flat=True)) == [Job.SIGN_ACTION]
+
+
+@pytest.mark.django_db
+class TestRunJobs(object):
+    def test_it_signs_and_publishes(
+        self, jobs_enabled, mocked_autograph, mocked_jobs_remotesettings
+    ):
+        recipe = RecipeFactory(approver=UserFactory(), enabler=UserFactory())
+
+        # One more job signs the recipe's action
+        assert jobs.run_pending_jobs() == 3
+
+        recipe = Recipe.objects.get(id=recipe.id)
+        data = recipe.canonical_json()
+        assert recipe.signature.signature == fake_sign([data])[0]["signature"]
+        assert recipe.signature.data_sha384 == Signature.hash_data(data)
+        # Once for the action and once for the recipe. The publish job found
+        # the recipe's signature up to date, so didn't sign it again.
+        assert mocked_autograph.return_value.sign_data.call_count == 2
+        mocked_jobs_remotesettings.return_value.publish.assert_called_once_with(recipe)
+        assert set(recipe.jobs.values_list("status", flat=True)) == {Job.SUCCEEDED}
+
+    def test_publish_signs_stale_recipes(
+        self, jobs_enabled, mocked_autograph, mocked_jobs_remotesettings
+    ):
+        recipe = RecipeFactory(approver=UserFactory(), enabler=UserFactory())
+        recipe.jobs.filter(kind=Job.SIGN_RECIPE).delete()
+
+        jobs.run_pending_jobs()
+
+        recipe = Recipe.objects.get(id=recipe.id)
+        assert recipe.signature.data_sha384 == Signature.hash_data(recipe.canonical_json())
+        mocked_jobs_remotesettings.return_value.publish.assert_called_once_with(recipe)
+
+    def test_publish_unpublishes_disabled_recipes(
+        self, jobs_enabled, mocked_autograph, mocked_jobs_remotesettings
+    ):
+        recipe = RecipeFactory(approver=UserFactory(), enabler=UserFactory())
+        recipe.approved_revision.disable(UserFactory())
+
+        jobs.run_pending_jobs()
+
+        mocked_jobs_remotesettings.return_value.unpublish.assert_called_once_with(recipe)
+        assert not mocked_jobs_remotesettings.return_value.publish.called
+
+    def test_it_signs_actions(self, jobs_enabled, mocked_autograph):
+        action = ActionFactory()
+        jobs.run_pending_jobs()
+        action.refresh_from_db()
+        assert action.signature.signature == fake_sign([action.canonical_json()])[0]["signature"]
+
+    def test_failed_jobs_are_retried_with_backoff(self, jobs_enabled, mocked_autograph):
+        mocked_autograph.return_value.sign_data.side_effect = ConnectionError("autograph is down")
+        recipe = RecipeFactory(approver=UserFactory(), enabler=UserFactory(), signed=False)
+        Job.objects.exclude(kind=Job.SIGN_RECIPE).delete()
+
+        assert jobs.run_pending_jobs() == 1
+        job = recipe.jobs.get()
+        assert job.status == Job.PENDING
+        assert job.attempts == 1
+        assert job.last_error == "ConnectionError: autograph is down"
+        assert job.run_after > timezone.now() + timedelta(seconds=9)
+
+        # It isn't run again until the backoff is over
+        assert jobs.run_pending_jobs() == 0
+        job.run_after = timezone.now()
+        job.save()
+        jobs.run_pending_jobs()
+        job.refresh_from_db()
+        assert job.attempts == 2
+        assert job.run_after > timezone.now() + timedelta(seconds=19)
+
+    def test_jobs_fail_after_max_attempts(self, jobs_enabled, mocked_autograph):
+        mocked_autograph.return_value.sign_data.side_effect = ConnectionError()
+        action = ActionFactory()
+
+        for _ in range(jobs_enabled.JOBS_MAX_ATTEMPTS):
+            Job.objects.update(run_after=timezone.now())
+            jobs.run_pending_jobs()
+
+        job = action.jobs.get()
+        assert job.status == Job.FAILED
+        assert job.attempts == 3
+        assert job.finished is not None
+        Job.objects.update(run_after=timezone.now())
+        assert jobs.run_pending_jobs() == 0
+
+    def test_abandoned_jobs_are_claimed_again(self, jobs_enabled):
+        action = ActionFactory()
+        job = action.jobs.get()
+        job.status = Job.RUNNING
+        job.started = timezone.now()
+        job.save()
+        assert jobs.claim_job() is None
+
+        job.started = timezone.now() - timedelta(seconds=jobs_enabled.JOBS_TIMEOUT + 1)
+        job.save()
+        claimed = jobs.claim_job()
+        assert claimed == job
+        assert claimed.attempts == 1
+
+    def test_command(self, jobs_enabled, mocked_autograph):
+        ActionFactory()
+        call_command("run_jobs", "--once")
+        assert set(Job.objects.values_list("status", flat=True)) == {Job.SUCCEEDED}
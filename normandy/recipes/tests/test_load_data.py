@@ -0,0 +1,93 @@
+import json
+
+import pytest
+
+from normandy.recipes import filters
+from normandy.recipes.load_data import FILTER_GENERATORS, generate_load_data
+from normandy.recipes.models import ApprovalRequest, Recipe, RecipeRevision
+from normandy.studies.models import Extension
+
+
+def test_there_is_a_generator_for_every_filter():
+    assert set(FILTER_GENERATORS) == set(filters.by_type)
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("storage")
+class TestGenerateLoadData(object):
+    def test_it_creates_recipes_with_history(self):
+        created = generate_load_data(recipes=10, revisions=4, extensions=3)
+
+        assert Recipe.objects.count() == created["Recipe"] == 10
+        assert Extension.objects.count() == created["Extension"] == 3
+        assert RecipeRevision.objects.count() == created["RecipeRevision"]
+        assert ApprovalRequest.objects.count() == created["RecipeRevision"]
+
+        for recipe in Recipe.objects.all():
+            revisions = list(recipe.revisions.order_by("created"))
+            assert 1 <= len(revisions) <= 4
+            assert recipe.latest_revision == revisions[-1]
+            assert revisions[0].parent is None
+            for parent, child in zip(revisions, revisions[1:]):
+                assert child.parent == parent
+            assert recipe.approved_revision.approval_status == RecipeRevision.APPROVED
+
+        assert Recipe.objects.only_enabled().exists()
+
+    def test_it_uses_valid_filters_of_every_type(self):
+        generate_load_data(recipes=30, revisions=2, extensions=1)
+
+        types = set()
+        for revision in RecipeRevision.objects.all():
+            for data in json.loads(revision.filter_object_json):
+                assert filters.from_data(data).is_valid(), data
+                types.add(data["type"])
+            # Every filter can be rendered
+            assert revision.filter_expression
+            assert revision.capabilities
+        assert types == set(filters.by_type)
+
+    def test_it_is_deterministic(self):
+        def generate(seed):
+            generate_load_data(recipes=5, revisions=3, extensions=0, seed=seed)
+            data = list(
+                RecipeRevision.objects.order_by("created").values_list(
+                    "name", "created", "filter_object_json", "arguments_json"
+                )
+            )
+            Recipe.objects.all().delete()
+            return data
+
+        assert generate(1) == generate(1)
+        assert generate(1) != generate(2)
+
+    def test_addon_studies_use_the_generated_extensions(self):
+        generate_load_data(recipes=30, revisions=1, extensions=3)
+        extension_ids = set(Extension.objects.values_list("id", flat=True))
+
+        studies = RecipeRevision.objects.filter(action__name="branched-addon-study")
+        assert studies.exists()
+        for revision in studies:
+            assert "extensionUrl" not in revision.arguments
+            branches = revision.arguments["branches"]
+            assert len(branches) == 2
+            for branch in branches:
+                assert branch["extensionApiId"] in extension_ids
+
+    def test_revisions_record_their_extensions(self):
+        created = generate_load_data(recipes=30, revisions=3, extensions=3)
+
+        studies = RecipeRevision.objects.filter(action__name="branched-addon-study")
+        through = RecipeRevision.extensions.through
+        assert through.objects.count() == created[through.__name__] == studies.count() * 2
+        for revision in studies:
+            assert set(revision.extensions.values_list("id", flat=True)) == {
+                branch["extensionApiId"] for branch in revision.arguments["branches"]
+            }
+        assert any(extension.in_use for extension in Extension.objects.all())
+
+    def test_the_api_can_serialize_it(self, api_client):
+        generate_load_data(recipes=5, revisions=3, extensions=2)
+        res = api_client.get("/api/v3/recipe/")
+        assert res.status_code == 200
+        assert res.data["count"] == 5
@@ -483,3 +483,40 @@ class Test0008Through0010(MigrationTest):
 
         new_recipe2 = Recipe.objects.get(pk=recipe2.pk)
         assert new_recipe2.enabled is False
+
+
+@pytest.mark.django_db
+class Test0022(MigrationTest):
+    def test_forwards(self, migrations):
+        old_apps = migrations.migrate("recipes", "0021_job_extension")
+        Recipe = old_apps.get_model("recipes", "Recipe")
+        Action = old_apps.get_model("recipes", "Action")
+        RecipeRevision = old_apps.get_model("recipes", "RecipeRevision")
+        Extension = old_apps.get_model("studies", "Extension")
+
+        by_id = Extension.objects.create(name="by id", xpi="extensions/by-id.xpi")
+        by_url = Extension.objects.create(name="by url", xpi="extensions/by url.xpi")
+        Extension.objects.create(name="unused", xpi="extensions/unused.xpi")
+        action = Action.objects.create()
+        recipe = Recipe.objects.create()
+        revision = RecipeRevision.objects.create(
+            recipe=recipe,
+            action=action,
+            identicon_seed="v1:test",
+            arguments_json=json.dumps(
+                {
+                    "branches": [{"slug": "a", "extensionApiId": by_id.id}],
+                    "addonUrl": "https://cdn.example.com/extensions/by+url.xpi",
+                }
+            ),
+        )
+        unrelated = RecipeRevision.objects.create(
+            recipe=recipe, action=action, identicon_seed="v1:test"
+        )
+
+        new_apps = migrations.migrate("recipes", "0022_reciperevision_extensions")
+        RecipeRevision = new_apps.get_model("recipes", "RecipeRevision")
+
+        revision = RecipeRevision.objects.get(id=revision.id)
+        assert set(revision.extensions.values_list("id", flat=True)) == {by_id.id, by_url.id}
+        assert not RecipeRevision.objects.get(id=unrelated.id).extensions.exists()
@@ -1,3 +1,4 @@
+import hashlib
 import json
 from unittest.mock import patch
 
@@ -7,6 +8,7 @@ import pytest
 from rest_framework import serializers
 from kinto_http import exceptions as remote_settings_exceptions
 
+from normandy.base import tracing
 from normandy.base.tests import UserFactory, Whatever
 from normandy.recipes.models import (
     ApprovalRequest,
@@ -72,6 +74,7 @@ class TestAction(object):
         action.save()
         assert action.signature is not None
         assert action.signature.signature == "fake signature"
+        assert action.signature.data_sha384 == hashlib.sha384(action.canonical_json()).hexdigest()
 
     def test_canonical_json(self):
         action = ActionFactory(name="test-action", implementation="console.log(true)")
@@ -477,6 +480,12 @@ class TestRecipe(object):
         r = RecipeFactory(extra_filter_expression="2 + 2 == 4", filter_object_json=None)
         assert r.latest_revision.filter_expression == "2 + 2 == 4"
 
+    def test_filter_expression_is_traced(self):
+        r = RecipeFactory(extra_filter_expression="2 + 2 == 4", filter_object_json=None)
+        with tracing.Trace() as trace:
+            r.latest_revision.filter_expression
+        assert trace.spans["recipes.revision.filter_expression"][0] == 1
+
     def test_canonical_json(self):
         recipe = RecipeFactory(
             action=ActionFactory(name="action"),
@@ -508,11 +517,60 @@ class TestRecipe(object):
         expected = expected.encode()
         assert recipe.canonical_json() == expected
 
+    def test_canonical_json_is_cached(self, mocker):
+        recipe = RecipeFactory(approver=UserFactory())
+        expected = recipe.canonical_json()
+        serialize = mocker.patch.object(Recipe, "_canonical_json", return_value=b"fresh")
+        assert Recipe.objects.get(id=recipe.id).canonical_json() == expected
+        assert not serialize.called
+
+    def test_canonical_json_cache_changes_with_signature(self, mocker):
+        recipe = RecipeFactory(approver=UserFactory(), signed=False)
+        recipe.canonical_json()
+        recipe.signature = SignatureFactory()
+        recipe.save()
+        mocker.patch.object(Recipe, "_canonical_json", return_value=b"fresh")
+        assert recipe.canonical_json() == b"fresh"
+
+    def test_canonical_json_cache_changes_with_baseline_capabilities(self, mocker, settings):
+        recipe = RecipeFactory(approver=UserFactory())
+        recipe.canonical_json()
+        settings.BASELINE_CAPABILITIES = settings.BASELINE_CAPABILITIES | {"new-capability"}
+        mocker.patch.object(Recipe, "_canonical_json", return_value=b"fresh")
+        assert recipe.canonical_json() == b"fresh"
+
+    def test_canonical_json_cache_changes_with_version(self, mocker):
+        recipe = RecipeFactory(approver=UserFactory())
+        recipe.canonical_json()
+        mocker.patch("normandy.recipes.models.CANONICAL_JSON_VERSION", 2)
+        mocker.patch.object(Recipe, "_canonical_json", return_value=b"fresh")
+        assert recipe.canonical_json() == b"fresh"
+
+    def test_canonical_json_is_not_cached_for_unsaved_changes(self):
+        recipe = RecipeFactory(approver=UserFactory())
+        recipe.canonical_json()
+        recipe.approved_revision.name = "unsaved"
+        assert b'"name":"unsaved"' in recipe.canonical_json()
+
+    def test_canonical_json_cache_can_be_disabled(self, mocker, settings):
+        settings.CANONICAL_JSON_CACHE_TIME = 0
+        recipe = RecipeFactory(approver=UserFactory())
+        recipe.canonical_json()
+        mocker.patch.object(Recipe, "_canonical_json", return_value=b"fresh")
+        assert recipe.canonical_json() == b"fresh"
+
     def test_signature_is_correct_on_creation_if_autograph_available(self, mocked_autograph):
         recipe = RecipeFactory(approver=UserFactory(), enabler=UserFactory())
         expected_sig = fake_sign([recipe.canonical_json()])[0]["signature"]
         assert recipe.signature.signature == expected_sig
 
+    def test_signature_records_hash_of_signed_data(self, mocked_autograph):
+        recipe = RecipeFactory(approver=UserFactory(), enabler=UserFactory())
+        expected = hashlib.sha384(recipe.canonical_json()).hexdigest()
+        assert recipe.signature.data_sha384 == expected
+        assert recipe.signature.matches_data(recipe.canonical_json())
+        assert not recipe.signature.matches_data(b"something else")
+
     def test_signature_is_updated_if_autograph_available(self, mocked_autograph):
         recipe = RecipeFactory(name="unchanged", approver=UserFactory(), enabler=UserFactory())
         original_signature = recipe.signature
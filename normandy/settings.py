@@ -1,6 +1,7 @@
 import json
 import os
 
+import dj_database_url
 from configurations import Configuration, values
 from corsheaders.defaults import default_methods
 
@@ -39,9 +40,12 @@ class Core(Configuration):
     # details.
     MIDDLEWARE = [
         "normandy.base.middleware.response_metrics_middleware",
+        "normandy.base.middleware.profiling_middleware",
         "corsheaders.middleware.CorsMiddleware",
         "normandy.base.middleware.request_received_at_middleware",
-        "dockerflow.django.middleware.DockerflowMiddleware",
+        "normandy.base.middleware.replica_routing_middleware",
+        "normandy.base.middleware.NormandyDockerflowMiddleware",
+        "normandy.base.middleware.tracing_middleware",
         "normandy.base.middleware.NormandySecurityMiddleware",
         "normandy.base.middleware.NormandyWhiteNoiseMiddleware",
         "normandy.base.middleware.NormandyCommonMiddleware",
@@ -104,6 +108,10 @@ class Core(Configuration):
 
     GRAPHENE = {"SCHEMA": "normandy.schema.schema"}
 
+    # Swagger UI loads the pre-rendered schema next to it, instead of
+    # generating one on each visit.
+    SWAGGER_SETTINGS = {"SPEC_URL": "../swagger.json"}
+
     # Content Security Policy
     def CSP_DEFAULT_SRC(self):
         srcs = ["'self'"]
@@ -192,6 +200,24 @@ class Metrics:
     METRICS_STATSD_PORT = values.IntegerValue(8125)
     METRICS_STATSD_NAMESPACE = values.Value("")
 
+    # Log requests that make at least this many database queries. 0 disables logging.
+    DB_QUERY_COUNT_LOG_THRESHOLD = values.IntegerValue(100)
+
+    # Time spans of code on hot paths, such as recipe serialization and signing.
+    TRACING_ENABLED = values.BooleanValue(True)
+    # Add the spans traced during a request to its request summary log.
+    TRACING_LOG_SPANS = values.BooleanValue(False)
+
+    # Fraction of requests to profile, between 0 and 1.
+    PROFILING_SAMPLE_RATE = values.FloatValue(0.0)
+    # How long, in seconds, profiling tokens are valid for.
+    PROFILING_TOKEN_MAX_AGE = values.IntegerValue(60 * 60)
+    # How long, in seconds, to keep profiles, and how many to keep.
+    PROFILING_RETENTION = values.IntegerValue(60 * 60 * 24)
+    PROFILING_MAX_PROFILES = values.IntegerValue(50)
+    # Directory to store profiles in. If not set, they are stored in the cache.
+    PROFILING_DIRECTORY = values.Value(None)
+
 
 # ==================== ENVIRONMENTS ====================
 
@@ -266,9 +292,62 @@ class Base(Core, CORS, OIDC, Metrics):
         }
 
     # Remote services
-    DATABASES = values.DatabaseURLValue("postgres://postgres@localhost/normandy")
+    DATABASE_URL = values.DatabaseURLValue("postgres://postgres@localhost/normandy")
+    # How long, in seconds, to keep database connections open between
+    # requests. 0 closes them after every request.
     CONN_MAX_AGE = values.IntegerValue(0)
+    # Check that persistent connections are still alive before each request,
+    # and reconnect if they aren't.
+    CONN_HEALTH_CHECKS = values.BooleanValue(True)
+    # Server-side cursors don't work in transaction pooling mode of external
+    # connection poolers like PgBouncer, and must be disabled to use them.
+    DATABASE_DISABLE_SERVER_SIDE_CURSORS = values.BooleanValue(False)
+    DATABASE_CONNECT_TIMEOUT = values.IntegerValue(10)
+    # Read-only replicas of the primary database. Safe requests from
+    # anonymous clients are served from these, if any are configured.
+    DATABASE_REPLICA_URLS = values.ListValue([])
+    # How long, in seconds, a client that has made a write keeps reading from
+    # the primary database, so that it sees its own changes despite replica lag.
+    DATABASE_REPLICA_STICKY_SECONDS = values.IntegerValue(30)
+    DATABASE_ROUTERS = ["normandy.base.db.ReplicaRouter"]
+
+    def DATABASES(self):
+        urls = dict(self.DATABASE_URL)
+        for index, url in enumerate(self.DATABASE_REPLICA_URLS):
+            urls[f"replica{index}"] = {
+                **dj_database_url.parse(url),
+                # Replicas see the same data as the primary in tests
+                "TEST": {"MIRROR": "default"},
+            }
+
+        databases = {}
+        for alias, config in urls.items():
+            databases[alias] = {
+                **config,
+                "CONN_MAX_AGE": self.CONN_MAX_AGE,
+                "CONN_HEALTH_CHECKS": self.CONN_HEALTH_CHECKS,
+                "DISABLE_SERVER_SIDE_CURSORS": self.DATABASE_DISABLE_SERVER_SIDE_CURSORS,
+                "OPTIONS": {
+                    "connect_timeout": self.DATABASE_CONNECT_TIMEOUT,
+                    **config.get("OPTIONS", {}),
+                },
+            }
+        return databases
+
     GEOIP2_DATABASE = values.Value(os.path.join(Core.BASE_DIR, "GeoLite2-Country.mmdb"))
+    # Number of threads that run Django when serving over ASGI.
+    ASGI_THREADS = values.IntegerValue(10)
+    # Largest request body, in bytes, accepted when serving over ASGI.
+    ASGI_MAX_REQUEST_BODY_SIZE = values.IntegerValue(100 * 1024 * 1024)
+    # Serve /api/v1/classify_client/ from a handler that bypasses Django's
+    # middleware and DRF where it can give an identical response.
+    CLASSIFY_CLIENT_FAST_PATH = values.BooleanValue(True)
+    # How often, in seconds, to check if the GeoIP database file has been
+    # updated, and reload it if so. 0 disables reloading.
+    GEOIP2_RELOAD_INTERVAL = values.IntegerValue(60)
+    # Skip checking Remote Settings and loading the GeoIP database when the
+    # app starts. They are checked by `manage.py check --deploy` instead.
+    DEFER_STARTUP_CHECKS = values.BooleanValue(False)
     # Email settings
     EMAIL_HOST_USER = values.Value()
     EMAIL_HOST = values.Value()
@@ -332,6 +411,7 @@ class Base(Core, CORS, OIDC, Metrics):
     STATIC_ROOT = values.Value(os.path.join(Core.BASE_DIR, "static"))
     MEDIA_URL = values.Value("/media/")
     MEDIA_ROOT = values.Value(os.path.join(Core.BASE_DIR, "media"))
+    OPENAPI_SCHEMA_ROOT = values.Value(os.path.join(Core.BASE_DIR, "openapi"))
 
     STATICFILES_DIRS = (os.path.join(Core.BASE_DIR, "assets"),)
 
@@ -366,6 +446,19 @@ class Base(Core, CORS, OIDC, Metrics):
     AUTOGRAPH_SIGNATURE_MAX_AGE = values.IntegerValue(60 * 60 * 24 * 7)
     AUTOGRAPH_X5U_CACHE_BUST = values.Value(None)
 
+    # Encoder used for canonical JSON: auto, stdlib or orjson
+    CANONICAL_JSON_BACKEND = values.Value("auto")
+    CANONICAL_JSON_CACHE_TIME = values.IntegerValue(60 * 60 * 24)
+
+    EXTENSION_METADATA_CACHE_TIME = values.IntegerValue(60 * 60 * 24 * 30)
+
+    # Background jobs for signing, publishing and validation, worked by `run_jobs`
+    JOBS_ENABLED = values.BooleanValue(False)
+    JOBS_MAX_ATTEMPTS = values.IntegerValue(5)
+    JOBS_RETRY_DELAY = values.IntegerValue(30)
+    JOBS_TIMEOUT = values.IntegerValue(60 * 10)
+    JOBS_POLL_INTERVAL = values.IntegerValue(5)
+
     # Remote Settings connection configuration
     REMOTE_SETTINGS_URL = values.Value()
     REMOTE_SETTINGS_USERNAME = values.Value()
@@ -392,6 +485,7 @@ class Base(Core, CORS, OIDC, Metrics):
     AWS_STORAGE_BUCKET_NAME = values.Value()
     GS_BUCKET_NAME = values.Value()
     GS_DEFAULT_ACL = values.Value("publicRead")
+    GS_BLOB_CHUNK_SIZE = values.IntegerValue(8 * 1024 * 1024)
 
     GITHUB_URL = values.Value("https://github.com/mozilla/normandy")
 
@@ -537,6 +631,8 @@ class Test(InsecureAuthentication, Base):
     # that need access to storage
     DEFAULT_FILE_STORAGE = "normandy.base.storage.NotAllowedStorage"
     SECURE_SSL_REDIRECT = False
+    # Data written in a test's transaction can't be seen from replica connections
+    DATABASE_REPLICA_URLS = []
     AUTOGRAPH_URL = None
     AUTOGRAPH_HAWK_ID = None
     AUTOGRAPH_HAWK_SECRET_KEY = None
@@ -5,7 +5,7 @@ from normandy.studies import models
 
 @admin.register(models.Extension)
 class ExtensionAdmin(admin.ModelAdmin):
-    list_display = ["name", "xpi"]
+    list_display = ["name", "xpi", "status"]
     fieldsets = [[None, {"fields": ["name", "xpi", "recipes_used_by_html"]}]]
 
     readonly_fields = ["recipes_used_by_html"]
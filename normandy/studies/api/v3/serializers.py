@@ -1,9 +1,9 @@
+from django.conf import settings
 from django.core.exceptions import ValidationError as DjangoValidationError
 
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
-from normandy.recipes.models import RecipeRevision
 from normandy.studies.models import Extension
 
 
@@ -12,15 +12,34 @@ class ExtensionSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Extension
-        fields = ["id", "name", "xpi", "extension_id", "version", "hash", "hash_algorithm"]
-        read_only_fields = ["extension_id", "version", "hash", "hash_algorithm"]
+        fields = [
+            "id",
+            "name",
+            "xpi",
+            "extension_id",
+            "version",
+            "hash",
+            "hash_algorithm",
+            "status",
+            "validation_error",
+        ]
+        read_only_fields = [
+            "extension_id",
+            "version",
+            "hash",
+            "hash_algorithm",
+            "status",
+            "validation_error",
+        ]
 
     def is_valid(self, raise_exception=False):
         super().is_valid(raise_exception=raise_exception)
 
         if "xpi" in self.validated_data:
             try:
-                Extension(**self.validated_data).populate_metadata()
+                # Files that need a full check are validated by a background
+                # job if those are enabled
+                Extension(**self.validated_data).populate_metadata(defer=settings.JOBS_ENABLED)
             except DjangoValidationError as ex:
                 self._validated_data = {}
 
@@ -33,12 +52,7 @@ class ExtensionSerializer(serializers.ModelSerializer):
         return not bool(self._errors)
 
     def update(self, instance, validated_data):
-        revisions = RecipeRevision.objects.filter(action__name="opt-out-study").exclude(
-            latest_for_recipe=None, approved_for_recipe=None
-        )
-
-        for r in revisions:
-            if r.arguments.get("extensionId") == instance.id:
-                raise ValidationError("Extension cannot be updated while in use by a recipe.")
+        if instance.in_use:
+            raise ValidationError("Extension cannot be updated while in use by a recipe.")
 
         return super().update(instance, validated_data)
@@ -6,7 +6,6 @@ from rest_framework.views import Response, status
 from normandy.base.api.filters import AliasedOrderingFilter
 from normandy.base.api.mixins import CachingViewsetMixin
 from normandy.base.api.permissions import AdminEnabledOrReadOnly
-from normandy.recipes.models import RecipeRevision
 from normandy.studies.api.v3.serializers import ExtensionSerializer
 from normandy.studies.models import Extension
 
@@ -51,15 +50,10 @@ class ExtensionViewSet(CachingViewsetMixin, viewsets.ModelViewSet):
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
 
-        revisions = RecipeRevision.objects.filter(action__name="opt-out-study").exclude(
-            latest_for_recipe=None, approved_for_recipe=None
-        )
-
-        for r in revisions:
-            if r.arguments.get("extensionId") == instance.id:
-                return Response(
-                    ["Extension cannot be updated while in use by a recipe."],
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
+        if instance.in_use:
+            return Response(
+                ["Extension cannot be updated while in use by a recipe."],
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
         return super().destroy(request, *args, **kwargs)
@@ -0,0 +1,25 @@
+# Generated by Django 2.2.28 on 2026-10-18 23:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("studies", "0007_auto_20190316_0455")]
+
+    operations = [
+        migrations.AddField(
+            model_name="extension",
+            name="status",
+            field=models.CharField(
+                choices=[("validating", "Validating"), ("ready", "Ready"), ("invalid", "Invalid")],
+                default="ready",
+                max_length=16,
+            ),
+        ),
+        migrations.AddField(
+            model_name="extension",
+            name="validation_error",
+            field=models.TextField(blank=True, default=""),
+        ),
+    ]
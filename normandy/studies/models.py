@@ -1,23 +1,191 @@
 import hashlib
 import json
+import tempfile
 import zipfile
+from urllib.parse import unquote_plus, urlparse
+from xml.etree import ElementTree
 
-import untangle
-
-from xml.sax import SAXParseException
-
+from django.conf import settings
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
+from django.core.files import File
 from django.db import models
+from django.db.models import Q
 
 from dirtyfields import DirtyFieldsMixin
 
-from normandy.recipes.models import Recipe
+from normandy.recipes.models import Job, Recipe
 
 
 SIGNING_FILES = {"META-INF/mozilla.rsa", "META-INF/mozilla.sf", "META-INF/manifest.mf"}
 
+XPI_CHUNK_SIZE = 64 * 1024
+
+#: Action argument keys that hold the id of an uploaded extension, at the
+#: top level for opt-out-study, or in each branch for branched-addon-study.
+EXTENSION_ID_ARGUMENTS = {"extensionApiId", "extensionId"}
+
+
+def spool_and_hash(file, algorithm="sha256"):
+    """
+    Copy ``file`` to a temporary file in chunks, hashing it along the way.
+
+    Small files are kept in memory, and larger ones are written to disk, so
+    memory use is bounded by ``FILE_UPLOAD_MAX_MEMORY_SIZE``. Returns the
+    temporary file, rewound, and the hex digest of its contents.
+    """
+    digest = hashlib.new(algorithm)
+    spooled = tempfile.SpooledTemporaryFile(
+        max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE, dir=settings.FILE_UPLOAD_TEMP_DIR
+    )
+    for chunk in file.chunks(XPI_CHUNK_SIZE):
+        digest.update(chunk)
+        spooled.write(chunk)
+    spooled.seek(0)
+    return spooled, digest.hexdigest()
+
+
+def read_install_rdf(rdf_file):
+    """
+    Find the ``id`` and ``version`` of a legacy add-on in its ``install.rdf``.
+
+    The file is parsed incrementally, and elements are discarded as soon as
+    they have been looked at, instead of building the whole document.
+    """
+    found = {}
+    path = []
+    for event, element in ElementTree.iterparse(rdf_file, events=("start", "end")):
+        # Match on local names, ignoring namespaces
+        name = element.tag.rpartition("}")[2]
+        if event == "start":
+            path.append(name)
+            continue
+
+        # Only the top level description describes this add-on. Target
+        # applications have ids and versions too.
+        if path[:2] == ["RDF", "Description"] and len(path) == 3 and name in ["id", "version"]:
+            found.setdefault(name, element.text)
+        path.pop()
+        element.clear()
+
+    return found.get("id"), found.get("version")
+
+
+def read_xpi_metadata(xpi):
+    """
+    Validate an XPI file, and return the metadata Normandy needs from it as
+    a dict of ``Extension`` field values.
+
+    Raises ``ValidationError`` if the file isn't a signed web extension or
+    legacy add-on.
+    """
+    try:
+        with zipfile.ZipFile(xpi) as zf:
+            files = set(zf.namelist())
+
+            # Verify this is a web extension or legacy addon
+            if "manifest.json" in files:  # Web extension
+                with zf.open("manifest.json") as manifest_file:
+                    try:
+                        data = json.load(manifest_file)
+                    except json.decoder.JSONDecodeError:
+                        raise ValidationError({"xpi": "Web extension manifest is corrupt."})
+
+                is_legacy = False
+                extension_id = data.get("applications", {}).get("gecko", {}).get("id", None)
+                version = data.get("version")
+
+                if not extension_id:
+                    raise ValidationError(
+                        {"xpi": 'Web extensions must have a manifest key "applications.gecko.id".'}
+                    )
+
+                if not version:
+                    raise ValidationError(
+                        {"xpi": 'Web extensions must have a manifest key "version".'}
+                    )
+            elif "install.rdf" in files:  # Legacy addon
+                is_legacy = True
+
+                with zf.open("install.rdf", "r") as rdf_file:
+                    try:
+                        extension_id, version = read_install_rdf(rdf_file)
+                    except ElementTree.ParseError:
+                        raise ValidationError({"xpi": 'Legacy addon "install.rdf" is corrupt.'})
+
+                if not extension_id:
+                    raise ValidationError(
+                        {"xpi": 'Legacy addons "install.rdf" must specify an id.'}
+                    )
+
+                if not version:
+                    raise ValidationError(
+                        {"xpi": 'Legacy addons "install.rdf" must specify a version.'}
+                    )
+            else:
+                raise ValidationError(
+                    {"xpi": "Extension file must be a valid WebExtension or legacy addon."}
+                )
+
+            # Verify the extension is signed
+            if not SIGNING_FILES.issubset(files):
+                raise ValidationError({"xpi": "Extension file must be signed."})
+    except zipfile.BadZipFile:
+        raise ValidationError({"xpi": "Extension file must be zip-formatted."})
+
+    return {"extension_id": extension_id, "version": version, "is_legacy": is_legacy}
+
+
+def find_extension_references(arguments):
+    """
+    Find the values in a set of action arguments that may refer to an
+    uploaded extension, either by id, or by the URL of the uploaded file,
+    such as ``addonUrl``.
+
+    Yields a ``(path, field, value)`` tuple for each reference, where
+    ``path`` is the list of keys and indexes that lead to it, and ``field``
+    is the ``Extension`` field it is compared to, ``"id"`` or ``"xpi"``.
+    """
+    values = [([], arguments)]
+    while values:
+        path, value = values.pop()
+        if isinstance(value, dict):
+            for key, item in value.items():
+                if key in EXTENSION_ID_ARGUMENTS and isinstance(item, int):
+                    yield path + [key], "id", item
+                else:
+                    values.append((path + [key], item))
+        elif isinstance(value, list):
+            values.extend((path + [i], item) for i, item in enumerate(value))
+        elif isinstance(value, str) and "/" in value:
+            # Stored files are named after the upload path and filename,
+            # wherever they are served from.
+            parts = urlparse(value).path.split("/")
+            if len(parts) >= 2 and parts[-2] == "extensions" and parts[-1]:
+                yield path, "xpi", f"extensions/{unquote_plus(parts[-1])}"
+
+
+def find_extensions(arguments):
+    """Find the extensions that a set of action arguments refer to."""
+    ids = set()
+    xpi_names = set()
+    for path, field, value in find_extension_references(arguments):
+        if field == "id":
+            ids.add(value)
+        else:
+            xpi_names.add(value)
+
+    if not ids and not xpi_names:
+        return Extension.objects.none()
+    return Extension.objects.filter(Q(id__in=ids) | Q(xpi__in=xpi_names))
+
 
 class Extension(DirtyFieldsMixin, models.Model):
+    VALIDATING = "validating"
+    READY = "ready"
+    INVALID = "invalid"
+    STATUS_CHOICES = ((VALIDATING, "Validating"), (READY, "Ready"), (INVALID, "Invalid"))
+
     name = models.CharField(max_length=255)
     xpi = models.FileField(upload_to="extensions", unique=True)
     is_legacy = models.BooleanField(default=False)
@@ -25,6 +193,8 @@ class Extension(DirtyFieldsMixin, models.Model):
     version = models.CharField(max_length=32)
     hash = models.CharField(max_length=64)
     hash_algorithm = models.CharField(max_length=16)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=READY)
+    validation_error = models.TextField(blank=True, default="")
 
     class Meta:
         ordering = ("-id",)
@@ -32,82 +202,66 @@ class Extension(DirtyFieldsMixin, models.Model):
     @property
     def recipes_used_by(self):
         """Set of enabled recipes that are using this extension."""
-        return Recipe.objects.filter(latest_revision__arguments_json__contains=self.xpi.url)
+        return Recipe.objects.filter(latest_revision__extensions=self)
 
-    def populate_metadata(self):
-        # Validate XPI file
-        try:
-            with zipfile.ZipFile(self.xpi) as zf:
-                files = set(zf.namelist())
-
-                # Verify this is a web extension or legacy addon
-                if "manifest.json" in files:  # Web extension
-                    with zf.open("manifest.json") as manifest_file:
-                        try:
-                            data = json.load(manifest_file)
-                        except json.decoder.JSONDecodeError:
-                            raise ValidationError({"xpi": "Web extension manifest is corrupt."})
-
-                    self.extension_id = (
-                        data.get("applications", {}).get("gecko", {}).get("id", None)
-                    )
-                    self.version = data.get("version")
-
-                    if not self.extension_id:
-                        raise ValidationError(
-                            {
-                                "xpi": (
-                                    "Web extensions must have a manifest key "
-                                    '"applications.gecko.id".'
-                                )
-                            }
-                        )
-
-                    if not self.version:
-                        raise ValidationError(
-                            {"xpi": 'Web extensions must have a manifest key "version".'}
-                        )
-                elif "install.rdf" in files:  # Legacy addon
-                    self.is_legacy = True
-
-                    with zf.open("install.rdf", "r") as rdf_file:
-                        try:
-                            data = untangle.parse(rdf_file.read().decode())
-                        except SAXParseException:
-                            raise ValidationError(
-                                {"xpi": 'Legacy addon "install.rdf" is corrupt.'}
-                            )
-
-                    try:
-                        self.extension_id = data.RDF.Description.em_id.cdata
-                        self.version = data.RDF.Description.em_version.cdata
-                    except AttributeError:
-                        pass  # Ignore as this will be dealt with in the next step
-
-                    if not self.extension_id:
-                        raise ValidationError(
-                            {"xpi": 'Legacy addons "install.rdf" must specify an id.'}
-                        )
-
-                    if not self.version:
-                        raise ValidationError(
-                            {"xpi": 'Legacy addons "install.rdf" must specify a version.'}
-                        )
-                else:
-                    raise ValidationError(
-                        {"xpi": "Extension file must be a valid WebExtension or legacy addon."}
-                    )
+    @property
+    def in_use(self):
+        """Whether the latest or approved revision of any recipe uses this extension."""
+        return self.revisions.exclude(latest_for_recipe=None, approved_for_recipe=None).exists()
 
-                # Verify the extension is signed
-                if not SIGNING_FILES.issubset(files):
-                    raise ValidationError({"xpi": "Extension file must be signed."})
-        except zipfile.BadZipFile:
-            raise ValidationError({"xpi": "Extension file must be zip-formatted."})
+    def populate_metadata(self, defer=False):
+        """
+        Hash the XPI and fill in the metadata read from it, raising
+        ``ValidationError`` if it isn't a valid extension. Metadata is cached
+        by hash, so a file that has been seen before isn't read again.
 
-        # Make sure to read the XPI file from the start before hashing
-        self.xpi.seek(0)
-        self.hash = hashlib.sha256(self.xpi.read()).hexdigest()
+        If ``defer`` is true, files that aren't in the cache are left to be
+        validated later, by :meth:`validate`, and marked as validating.
+        """
+        # Read the XPI only once, hashing it while copying it somewhere that
+        # the zip file and the storage upload can read from.
+        spooled, self.hash = spool_and_hash(self.xpi)
         self.hash_algorithm = "sha256"
+        if not self.xpi._committed:
+            content = File(spooled, name=self.xpi.name)
+            content.content_type = getattr(self.xpi.file, "content_type", None)
+            self.xpi.file = content
+
+        cache_key = f"extension-metadata::{self.hash_algorithm}::{self.hash}"
+        metadata = cache.get(cache_key)
+        if metadata is None:
+            if defer:
+                self.status = self.VALIDATING
+                self.validation_error = ""
+                return
+
+            # SpooledTemporaryFile has no seekable() before Python 3.11,
+            # which ZipFile needs, so read the file it wraps instead.
+            metadata = read_xpi_metadata(spooled._file)
+            cache.set(cache_key, metadata, settings.EXTENSION_METADATA_CACHE_TIME)
+            # Storage backends upload from the current position, not the start
+            spooled.seek(0)
+
+        for name, value in metadata.items():
+            setattr(self, name, value)
+        self.status = self.READY
+        self.validation_error = ""
+
+    def validate(self):
+        """
+        Validate an extension that was saved while validating, and record
+        whether it is valid. The files of invalid extensions are deleted,
+        but their records are kept so that the error can be shown.
+        """
+        try:
+            self.populate_metadata()
+        except ValidationError as ex:
+            self.status = self.INVALID
+            self.validation_error = " ".join(ex.messages)
+            self.xpi.close()
+            # Keep the name, so that the record still matches what was uploaded
+            self.xpi.storage.delete(self.xpi.name)
+        self.save()
 
     def save(self, *args, **kwargs):
         dirty_fields = {
@@ -120,6 +274,11 @@ class Extension(DirtyFieldsMixin, models.Model):
             dirty_field_names = list(dirty_fields.keys())
 
             if "xpi" in dirty_field_names:
-                self.populate_metadata()
+                # With background jobs, new files are validated by a job
+                # instead of holding up the request.
+                self.populate_metadata(defer=settings.JOBS_ENABLED)
 
         super().save(*args, **kwargs)
+
+        if self.status == self.VALIDATING:
+            Job.enqueue_on_commit(Job.VALIDATE_EXTENSION, extension=self)
@@ -38,6 +38,8 @@ class TestExtensionAPI(object):
                 "version": extension.version,
                 "hash": extension.hash,
                 "hash_algorithm": extension.hash_algorithm,
+                "status": "ready",
+                "validation_error": "",
             }
         ]
 
@@ -108,6 +110,16 @@ class TestExtensionAPI(object):
         assert res.status_code == 201  # created
         Extension.objects.filter(id=res.data["id"]).exists()
 
+    def test_uploads_are_validated_later_with_jobs(
+        self, api_client, storage, settings, run_on_commit
+    ):
+        settings.JOBS_ENABLED = True
+        xpi = WebExtensionFileFactory(signed=False)
+        res = self._upload_extension(api_client, xpi.path)
+        assert res.status_code == 201  # created
+        assert res.data["status"] == "validating"
+        assert Extension.objects.get(id=res.data["id"]).jobs.count() == 1
+
     def test_can_update_xpi(self, api_client, storage):
         legacy = LegacyAddonFileFactory()
         e = ExtensionFactory(xpi__from_func=legacy.open)
@@ -243,7 +255,9 @@ class TestExtensionAPI(object):
         e = ExtensionFactory(xpi__from_func=xpi.open)
         a = ActionFactory(name="opt-out-study")
         r = RecipeFactory(action=a, arguments={"extensionId": e.id})
-        r.revise(arguments=OptOutStudyArgumentsFactory(extensionId=e.id + 1))
+        r.revise(
+            arguments=OptOutStudyArgumentsFactory(extensionId=e.id + 1, extensionApiId=e.id + 1)
+        )
         res = api_client.delete(f"/api/v3/extension/{e.id}/")
         assert res.status_code == 204
         assert Extension.objects.count() == 0
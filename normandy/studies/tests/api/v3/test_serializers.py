@@ -18,4 +18,6 @@ class TestExtensionSerializer:
             "version": extension.version,
             "hash": extension.hash,
             "hash_algorithm": extension.hash_algorithm,
+            "status": "ready",
+            "validation_error": "",
         }
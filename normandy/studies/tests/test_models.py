@@ -1,14 +1,21 @@
 import hashlib
+import io
 import os
 import pytest
 import tempfile
 import zipfile
 
 from django.core.exceptions import ValidationError
+from django.core.files import File
 from django.db import transaction
 
-from normandy.recipes.tests import RecipeFactory
-from normandy.studies.models import Extension
+from rest_framework import serializers
+
+from normandy.base.tests import UserFactory
+from normandy.recipes import jobs
+from normandy.recipes.models import Job
+from normandy.recipes.tests import ActionFactory, RecipeFactory
+from normandy.studies.models import Extension, read_xpi_metadata, spool_and_hash
 from normandy.studies.tests import (
     ExtensionFactory,
     LegacyAddonFileFactory,
@@ -37,6 +44,38 @@ class TestExtension(object):
 
         assert set(extension.recipes_used_by) == set([used_in_recipe_1, used_in_recipe_2])
 
+    @pytest.mark.django_db
+    def test_revisions_record_extensions(self, storage):
+        opt_out, branched, unused = ExtensionFactory.create_batch(3)
+        recipe = RecipeFactory(
+            action=ActionFactory(name="opt-out-study"),
+            arguments={"extensionApiId": opt_out.id, "addonUrl": opt_out.xpi.url},
+        )
+        assert list(recipe.latest_revision.extensions.all()) == [opt_out]
+
+        recipe.revise(
+            action=ActionFactory(name="branched-addon-study"),
+            arguments={
+                "branches": [
+                    {"slug": "a", "extensionApiId": branched.id},
+                    {"slug": "b", "extensionApiId": None},
+                ]
+            },
+        )
+        assert list(recipe.latest_revision.extensions.all()) == [branched]
+        assert list(branched.recipes_used_by) == [recipe]
+        assert list(opt_out.recipes_used_by) == []
+        assert list(unused.revisions.all()) == []
+
+    @pytest.mark.django_db
+    def test_in_use(self, storage):
+        extension = ExtensionFactory()
+        recipe = RecipeFactory(arguments={"extensionApiId": extension.id})
+        assert extension.in_use
+
+        recipe.revise(arguments={})
+        assert not extension.in_use
+
     @pytest.mark.django_db
     def test_extension_id(self, storage):
         xpi = WebExtensionFileFactory(gecko_id="test-addon@normandy.mozilla.org")
@@ -58,6 +97,42 @@ class TestExtension(object):
         extension = ExtensionFactory(xpi__from_func=xpi.open)
         assert extension.hash == hashed
 
+    @pytest.mark.django_db
+    def test_legacy_metadata(self, storage):
+        xpi = LegacyAddonFileFactory(addon_id="legacy@normandy.mozilla.org")
+        extension = ExtensionFactory(xpi__from_func=xpi.open)
+        assert extension.is_legacy
+        # Not the id or version of the target application
+        assert extension.extension_id == "legacy@normandy.mozilla.org"
+        assert extension.version == "0.1"
+
+    def test_metadata_is_cached_by_hash(self, mocker):
+        read_metadata = mocker.patch(
+            "normandy.studies.models.read_xpi_metadata", wraps=read_xpi_metadata
+        )
+        xpi = WebExtensionFileFactory()
+        for _ in range(2):
+            extension = Extension(xpi=File(xpi.open(), name="cached.xpi"))
+            extension.populate_metadata()
+            assert extension.extension_id == xpi.manifest["applications"]["gecko"]["id"]
+        assert read_metadata.call_count == 1
+
+    @pytest.mark.django_db
+    def test_large_files_are_stored_intact(self, storage, settings):
+        settings.FILE_UPLOAD_MAX_MEMORY_SIZE = 1024
+        xpi = WebExtensionFileFactory()
+        xpi.add_file("large.bin", os.urandom(256 * 1024))
+        with xpi.open() as f:
+            data = f.read()
+
+        extension = ExtensionFactory(xpi__from_func=xpi.open)
+
+        assert extension.hash == hashlib.sha256(data).hexdigest()
+        with storage.open(extension.xpi.name) as f:
+            stored = f.read()
+        assert len(stored) == len(data)
+        assert hashlib.sha256(stored).hexdigest() == extension.hash
+
     @pytest.mark.django_db
     def test_no_duplicate_files(self, storage):
         xpi = WebExtensionFileFactory()
@@ -171,3 +246,110 @@ class TestExtension(object):
             ExtensionFactory(xpi__from_func=xpi.open)
         assert len(exc.value.error_dict["xpi"]) == 1
         assert exc.value.error_dict["xpi"][0].message == "Extension file must be signed."
+
+
+class TestSpoolAndHash(object):
+    def test_it_copies_and_hashes(self):
+        data = b"some data" * 1000
+        spooled, digest = spool_and_hash(File(io.BytesIO(data)))
+        assert digest == hashlib.sha256(data).hexdigest()
+        assert spooled.read() == data
+
+    def test_large_files_are_written_to_disk(self, settings):
+        settings.FILE_UPLOAD_MAX_MEMORY_SIZE = 1024
+        data = os.urandom(200 * 1024)
+        spooled, digest = spool_and_hash(File(io.BytesIO(data)))
+        assert spooled._rolled
+        assert digest == hashlib.sha256(data).hexdigest()
+        assert spooled.read() == data
+
+
+@pytest.mark.django_db
+class TestDeferredValidation(object):
+    @pytest.fixture(autouse=True)
+    def jobs_enabled(self, settings, storage, run_on_commit):
+        settings.JOBS_ENABLED = True
+
+    def test_new_files_are_validated_by_a_job(self):
+        xpi = WebExtensionFileFactory(gecko_id="deferred@normandy.mozilla.org")
+        extension = ExtensionFactory(xpi__from_func=xpi.open)
+        assert extension.status == Extension.VALIDATING
+        assert extension.extension_id == ""
+        assert list(extension.jobs.values_list("kind", flat=True)) == [Job.VALIDATE_EXTENSION]
+
+        jobs.run_pending_jobs()
+
+        extension.refresh_from_db()
+        assert extension.status == Extension.READY
+        assert extension.extension_id == "deferred@normandy.mozilla.org"
+        assert extension.version == "0.1"
+
+    def test_invalid_files_are_marked_invalid(self):
+        xpi = WebExtensionFileFactory(signed=False)
+        extension = ExtensionFactory(xpi__from_func=xpi.open)
+
+        jobs.run_pending_jobs()
+
+        extension.refresh_from_db()
+        assert extension.status == Extension.INVALID
+        assert extension.validation_error == "Extension file must be signed."
+        assert set(extension.jobs.values_list("status", flat=True)) == {Job.SUCCEEDED}
+
+    def test_known_files_are_ready_immediately(self, settings):
+        xpi = WebExtensionFileFactory()
+        settings.JOBS_ENABLED = False
+        Extension(xpi=File(xpi.open(), name="known.xpi")).populate_metadata()
+        settings.JOBS_ENABLED = True
+
+        extension = ExtensionFactory(xpi__from_func=xpi.open)
+        assert extension.status == Extension.READY
+        assert extension.extension_id == xpi.manifest["applications"]["gecko"]["id"]
+        assert not extension.jobs.exists()
+
+    def test_invalid_files_are_deleted(self, storage):
+        xpi = WebExtensionFileFactory(signed=False)
+        extension = ExtensionFactory(xpi__from_func=xpi.open)
+        assert storage.exists(extension.xpi.name)
+
+        jobs.run_pending_jobs()
+
+        extension.refresh_from_db()
+        assert extension.status == Extension.INVALID
+        assert not storage.exists(extension.xpi.name)
+
+    def test_recipes_cannot_use_extensions_until_they_are_ready(self):
+        extension = ExtensionFactory(xpi__from_func=WebExtensionFileFactory().open)
+        action = ActionFactory(name="opt-out-study")
+
+        with pytest.raises(serializers.ValidationError) as exc:
+            RecipeFactory(action=action, arguments={"extensionApiId": extension.id})
+        errors = exc.value.detail["arguments"]
+        assert errors["extensionApiId"] == "Extension is still being validated"
+
+        jobs.run_pending_jobs()
+        recipe = RecipeFactory(action=action, arguments={"extensionApiId": extension.id})
+        assert list(recipe.latest_revision.extensions.all()) == [extension]
+
+    def test_recipes_cannot_use_invalid_extensions(self):
+        extension = ExtensionFactory(xpi__from_func=WebExtensionFileFactory(signed=False).open)
+        jobs.run_pending_jobs()
+
+        with pytest.raises(serializers.ValidationError) as exc:
+            RecipeFactory(
+                action=ActionFactory(name="branched-addon-study"),
+                arguments={"branches": [{"slug": "a", "addonUrl": extension.xpi.url}]},
+            )
+        errors = exc.value.detail["arguments"]
+        assert errors["branches"][0]["addonUrl"] == "Extension is invalid"
+
+    def test_revisions_using_unready_extensions_cannot_be_approved(self, settings):
+        settings.JOBS_ENABLED = False
+        extension = ExtensionFactory()
+        recipe = RecipeFactory(arguments={"extensionApiId": extension.id})
+        approval_request = recipe.latest_revision.request_approval(UserFactory())
+        Extension.objects.filter(id=extension.id).update(status=Extension.VALIDATING)
+
+        with pytest.raises(approval_request.ExtensionsNotReady):
+            approval_request.approve(UserFactory(), "r+")
+        recipe.refresh_from_db()
+        assert recipe.approved_revision is None
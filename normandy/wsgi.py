@@ -8,3 +8,7 @@ os.environ.setdefault("DJANGO_CONFIGURATION", "Production")
 
 
 application = get_wsgi_application()
+
+from normandy.recipes.api.v1.fast_classify import ClassifyClientWSGIMiddleware  # noqa
+
+application = ClassifyClientWSGIMiddleware(application)